@@ -3,15 +3,20 @@ from django.contrib import admin
 # Register your models here.
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import GymUser, OTP, Booking, Profile
+from .models import GymUser, OTP, Booking, Profile, SMSMessage, EmailOutbox
+from . import export
+from .paginator import EstimatedCountPaginator
+from .search import IndexedSearchMixin
 
 @admin.register(GymUser)
-class GymUserAdmin(UserAdmin):
+class GymUserAdmin(IndexedSearchMixin, UserAdmin):
     model        = GymUser
     list_display = ('phone', 'email', 'is_verified', 'is_staff', 'created_at')
     list_filter  = ('is_verified', 'is_staff', 'is_active')
-    search_fields = ('phone', 'email')
+    indexed_search_fields = ('phone', 'email')
     ordering     = ('-created_at',)
+    paginator    = EstimatedCountPaginator
+    show_full_result_count = False
 
     # Fields shown when EDITING a user
     fieldsets = (
@@ -33,17 +38,54 @@ class GymUserAdmin(UserAdmin):
     
 @admin.register(OTP)
 class OTPAdmin(admin.ModelAdmin):
-    list_display = ('phone', 'otp', 'created_at')
+    list_display = ('phone', 'attempts', 'created_at')
+    exclude = ('otp',)
     search_fields = ('phone',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['user', 'program', 'trainer', 'preferred_date', 'preferred_time', 'created_at']
     list_filter = ['preferred_date', 'preferred_time', 'program', 'trainer']
-    search_fields = ['user__phone','user__name','user__email']
+    # Only the booking's own snapshot columns: an OR across the join to
+    # GymUser (user__email) cannot use these indexes, so members are
+    # looked up by email in GymUserAdmin instead.
+    indexed_search_fields = ['user_name', 'user_phone']
+    list_select_related = ['user', 'program', 'trainer']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     date_hierarchy = 'preferred_date'
+    actions = ['export_csv', 'export_jsonl']
+
+    @admin.action(description='Export selected bookings as CSV')
+    def export_csv(self, request, queryset):
+        return export.export_response(queryset.order_by('pk'), 'csv')
+
+    @admin.action(description='Export selected bookings as JSON Lines')
+    def export_jsonl(self, request, queryset):
+        return export.export_response(queryset.order_by('pk'), 'jsonl')
     
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     list_display  = ('name', 'email', 'user', 'height', 'weight', 'updated_at')
-    search_fields = ('name', 'email', 'user__phone')
\ No newline at end of file
+    search_fields = ('name', 'email', 'user__phone')
+    list_select_related = ('user',)
+
+
+@admin.register(SMSMessage)
+class SMSMessageAdmin(admin.ModelAdmin):
+    list_display = ('phone', 'status', 'attempts', 'next_attempt_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('phone',)
+    # Bodies carry live login codes, so staff never see them.
+    exclude = ('body',)
+    readonly_fields = ('last_error',)
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('to', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('to',)
+    readonly_fields = ('body', 'last_error')
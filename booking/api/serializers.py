@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from booking.models import GymUser, Profile, Booking, OTP
+from booking import otp
+from booking.models import GymUser, Profile, Booking
 from gym.api.serializers import ProgramSerializer, TrainerSerializer
 from django.utils import timezone
 import random
@@ -78,22 +79,20 @@ class OTPVerifySerializer(serializers.Serializer):
     
     def validate(self, data):
         phone = data.get('phone')
-        otp = data.get('otp')
-        
-        try:
-            otp_obj = OTP.objects.filter(phone=phone).latest('created_at')
-        except OTP.DoesNotExist:
-            raise serializers.ValidationError("Invalid OTP")
-        
-        if otp_obj.is_expired():
+        code = data.get('otp')
+
+        result = otp.check(phone, code)
+
+        if result == otp.EXPIRED:
             raise serializers.ValidationError("OTP expired")
-        
-        if otp_obj.otp != otp:
+
+        if result == otp.EXHAUSTED:
+            raise serializers.ValidationError("Too many attempts. Please request a new OTP")
+
+        if result != otp.VALID:
             raise serializers.ValidationError("Invalid OTP")
         
-        user, created = GymUser.objects.get_or_create(phone=phone)
-        user.is_verified = True
-        user.save()
+        user = GymUser.objects.verify_phone(phone)
         
         data['user'] = user
         return data
\ No newline at end of file
@@ -1,44 +1,43 @@
 # booking/api/views.py
 
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.decorators import api_view, permission_classes, throttle_classes, action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken   # works natively now
 from django.utils import timezone
 
 
-from booking.models import GymUser, Profile, Booking, OTP
+from booking import export, otp, sms
+from booking.throttling import OTP_THROTTLES
+from booking.models import Profile, Booking
+from gym.api.relations import RelationPlanMixin
 from .serializers import (
     GymUserSerializer, ProfileSerializer,
     BookingSerializer, OTPRequestSerializer, OTPVerifySerializer
 )
-import random
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view, permission_classes
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(OTP_THROTTLES)
 def request_otp(request):
     """Request OTP for phone verification"""
     serializer = OTPRequestSerializer(data=request.data)
     if serializer.is_valid():
         phone = serializer.validated_data['phone']
         
-        # Create or get user
-        user, created = GymUser.objects.get_or_create(phone=phone)
-        
         # Generate OTP
-        otp_code = str(random.randint(100000, 999999))
-        OTP.objects.create(phone=phone, otp=otp_code)
+        otp_code = otp.issue(phone)
         
-        # In production, send via SMS
-        print(f"[DEV] OTP for {phone}: {otp_code}")
+        sms.send_otp(phone, otp_code)
         
+        # The code goes out by SMS only; echoing it here would let any
+        # caller log in as any phone number.
         return Response({
             'message': 'OTP sent successfully',
             'phone': phone,
-            'otp': otp_code  # Remove in production
         }, status=status.HTTP_200_OK)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -84,16 +83,29 @@ class ProfileViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(RelationPlanMixin, viewsets.ModelViewSet):
+    queryset           = Booking.objects.all()
     serializer_class   = BookingSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Booking.objects.filter(user=self.request.user)
+        # Joins the nested program and trainer (see RelationPlanMixin).
+        return super().get_queryset().filter(user=self.request.user)
 
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         bookings = self.get_queryset().filter(
             preferred_date__gte=timezone.now().date()
         )
-        return Response(self.get_serializer(bookings, many=True).data)
\ No newline at end of file
+        return Response(self.get_serializer(bookings, many=True).data)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """Stream every booking as CSV (default) or JSON Lines (``?output=jsonl``), staff only."""
+        output = request.query_params.get('output', 'csv')
+        if output not in export.FORMATS:
+            return Response(
+                {'output': f"Choose one of: {', '.join(export.FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return export.export_response(Booking.objects.order_by('pk'), output)
@@ -0,0 +1,30 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from booking import outbox
+
+
+class Command(BaseCommand):
+    help = "Send queued outbox emails over one persistent SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help="Emails claimed per database round trip")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to wait when nothing is due")
+        parser.add_argument('--drain', action='store_true', help="Exit once nothing is due instead of waiting")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        previous = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                previous[signum] = signal.signal(signum, lambda *args: stop.set())
+        try:
+            outbox.run(
+                batch_size=options['batch_size'], poll_interval=options['poll_interval'],
+                stop=stop, drain=options['drain'],
+            )
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from booking.otp import DatabaseOTPStore
+
+
+class Command(BaseCommand):
+    help = "Delete expired one-time login codes kept by the database OTP store"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows deleted per statement")
+
+    def handle(self, *args, **options):
+        count = DatabaseOTPStore().purge_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} expired OTPs"))
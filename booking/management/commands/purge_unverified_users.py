@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking.models import GymUser
+
+
+class Command(BaseCommand):
+    help = "Delete members who requested an OTP but never verified their number"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=1, help="Only delete members created before this many days ago",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help="Members deleted per statement")
+
+    def handle(self, *args, **options):
+        created_before = timezone.now() - timedelta(days=options['older_than_days'])
+        count = GymUser.objects.purge_unverified(created_before, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} unverified members"))
@@ -0,0 +1,26 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from booking.sms_stub import StubSMSServer
+
+
+class Command(BaseCommand):
+    help = "Run a local stand-in SMS gateway for development and benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8099)
+        parser.add_argument('--latency', type=float, default=0.0, help="Seconds to delay each response")
+        parser.add_argument('--fail-rate', type=float, default=0.0, help="Share of messages to fail, 0-1")
+
+    def handle(self, *args, **options):
+        asyncio.run(self.serve(options))
+
+    async def serve(self, options):
+        stub = await StubSMSServer(latency=options['latency'], fail_rate=options['fail_rate'], verbose=True).start(
+            options['host'], options['port'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Stub SMS gateway listening on {stub.url}"))
+        async with stub.server:
+            await stub.server.serve_forever()
@@ -0,0 +1,33 @@
+import asyncio
+import signal
+
+from django.core.management.base import BaseCommand
+
+from booking import sms
+
+
+class Command(BaseCommand):
+    help = "Deliver queued SMS messages through the configured gateway"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help="Messages sent per gateway request")
+        parser.add_argument('--concurrency', type=int, default=4, help="Batches in flight at once")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to wait when nothing is due")
+        parser.add_argument('--drain', action='store_true', help="Exit once nothing is due instead of waiting")
+
+    def handle(self, *args, **options):
+        asyncio.run(self.work(options))
+
+    async def work(self, options):
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):
+                # Not on the main thread, or not supported on this platform.
+                pass
+        await sms.run(
+            batch_size=options['batch_size'], concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'], stop=stop, drain=options['drain'],
+        )
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+# The DDL is copied from booking.search as it stood when this migration
+# was written, so later changes to that module cannot alter it.
+# table -> searched columns
+SEARCH_COLUMNS = {
+    'booking_booking': ['user_name', 'user_phone'],
+    'booking_gymuser': ['phone', 'email'],
+}
+CREATE_SQL = {
+    'postgresql': (
+        "CREATE INDEX IF NOT EXISTS {table}_{column}_search_idx ON {table} "
+        "USING GIN ((UPPER({column}::text)) gin_trgm_ops)"
+    ),
+    'sqlite': "CREATE INDEX IF NOT EXISTS {table}_{column}_search_idx ON {table} ({column} COLLATE NOCASE)",
+}
+DROP_SQL = "DROP INDEX IF EXISTS {table}_{column}_search_idx"
+
+
+def create_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in CREATE_SQL:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table, columns in SEARCH_COLUMNS.items():
+            for column in columns:
+                cursor.execute(CREATE_SQL[vendor].format(table=table, column=column))
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in CREATE_SQL:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, columns in SEARCH_COLUMNS.items():
+            for column in columns:
+                cursor.execute(DROP_SQL.format(table=table, column=column))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
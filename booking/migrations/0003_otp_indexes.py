@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0002_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(fields=['phone', 'created_at'], name='otp_phone_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(fields=['created_at'], name='otp_created_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0003_otp_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SMSMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone', models.CharField(max_length=20)),
+                ('body', models.CharField(max_length=320)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='sms_status_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0005_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='otp',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
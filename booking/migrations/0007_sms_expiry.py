@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_otp_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='smsmessage',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0007_sms_expiry'),
+        ('gym', '0006_program_ratings'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['-created_at', '-id'], name='booking_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['preferred_date'], name='booking_preferred_date_idx'),
+        ),
+    ]
@@ -1,8 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from gym.models import Trainer, Program
 from django.utils import timezone
 from datetime import timedelta
 
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -41,6 +42,42 @@ class GymUserManager(BaseUserManager):
         user.set_password(password)   # admin needs real password
         user.save(using=self._db)
         return user
+
+    def verify_phone(self, phone):
+        """
+        Return the member for ``phone`` marked as verified, creating it if needed.
+
+        Members only get a row once they have proven the number with an
+        OTP; concurrent verifications of a new number create one row.
+        """
+        with transaction.atomic(using=self._db):
+            user, created = self.get_or_create(
+                phone=phone,
+                defaults={'is_verified': True, 'password': make_password(None)},
+            )
+            if not user.is_verified:
+                user.is_verified = True
+                user.save(using=self._db, update_fields=['is_verified'])
+        return user
+
+    def purge_unverified(self, created_before, batch_size=1000):
+        """
+        Delete members who never verified their number, ``batch_size`` at a time.
+
+        Staff and anyone with a booking are kept.  Returns the number of
+        members deleted.
+        """
+        stale = self.filter(
+            is_verified=False, is_staff=False, is_superuser=False,
+            created_at__lt=created_before, bookings__isnull=True,
+        )
+        deleted = 0
+        while True:
+            pks = list(stale.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return deleted
+            self.filter(pk__in=pks).delete()
+            deleted += len(pks)
     
 
 
@@ -82,17 +119,100 @@ class GymUser(AbstractBaseUser, PermissionsMixin):
     def get_short_name(self):
         return self.phone
     
+# How long a one-time login code stays valid
+OTP_LIFETIME = timedelta(minutes=5)
+
+
 # OTP
 class OTP(models.Model):
     phone = models.CharField(max_length=20)
     otp = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Guesses made at this code
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Latest code for a phone
+            models.Index(fields=['phone', 'created_at'], name='otp_phone_created_idx'),
+            # Purging expired codes
+            models.Index(fields=['created_at'], name='otp_created_idx'),
+        ]
 
     def is_expired(self):
-        return timezone.now() > self.created_at + timedelta(minutes=5)
+        return timezone.now() > self.created_at + OTP_LIFETIME
+
+    def __str__(self):
+        # Never the code itself: this is what the admin shows.
+        return f"OTP for {self.phone}"
+
+
+class SMSMessage(models.Model):
+    """An outgoing text message waiting for ``manage.py sms_worker`` (see ``booking.sms``)."""
+    PENDING = 'pending'
+    SENDING = 'sending'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (FAILED, 'Failed'),
+    )
+
+    phone = models.CharField(max_length=20)
+    body = models.CharField(max_length=320)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When a pending message is due, or when a sending worker's claim lapses
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    # Not sent after this moment, e.g. once the login code it carries has expired
+    expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Claiming the next due batch
+            models.Index(fields=['status', 'next_attempt_at'], name='sms_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.phone} ({self.status})"
+
+
+class EmailOutbox(models.Model):
+    """
+    An email written in the same transaction as the change it reports and
+    sent later by ``manage.py email_worker`` (see ``booking.outbox``).
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    DEAD = 'dead'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (DEAD, 'Dead letter'),
+    )
+
+    to = models.EmailField()
+    from_email = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When a pending email is due, or when a sending worker's claim lapses
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'Email outbox'
+        indexes = [
+            # Claiming the next due batch
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.phone} - {self.otp}"
+        return f"{self.to}: {self.subject} ({self.status})"
 
 
 class Booking(models.Model):
@@ -120,6 +240,12 @@ class Booking(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Default ordering; the admin changelist adds -pk as a tie-breaker
+            models.Index(fields=['-created_at', '-id'], name='booking_created_idx'),
+            # Admin date_hierarchy
+            models.Index(fields=['preferred_date'], name='booking_preferred_date_idx'),
+        ]
 
 
 class Profile(models.Model):
@@ -0,0 +1,137 @@
+"""
+Storage for one-time login codes.
+
+``settings.OTP_STORE`` names the store class:
+
+* ``booking.otp.CacheOTPStore`` keeps the latest code per phone in the
+  Django cache with a timeout of ``OTP_LIFETIME``, so expired codes
+  disappear by themselves.  Every server process must see the same cache
+  (Redis, Memcached, database cache), so it is only the default when
+  ``CACHE_BACKEND`` is one of those.
+* ``booking.otp.DatabaseOTPStore`` keeps ``OTP`` rows, looked up through
+  the ``(phone, created_at)`` index.  ``manage.py purge_otps`` deletes
+  expired rows in batches.
+
+Either way a code is single use: a successful ``check`` consumes it, and
+issuing a new code replaces the previous one.  Each code allows
+``settings.OTP_MAX_ATTEMPTS`` guesses; the attempt after that discards it.
+"""
+import secrets
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Max
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OTP, OTP_LIFETIME
+
+# check() results
+VALID = 'valid'
+INVALID = 'invalid'
+EXPIRED = 'expired'
+MISSING = 'missing'
+EXHAUSTED = 'exhausted'
+
+
+def generate():
+    """A random six-digit code."""
+    return f'{secrets.randbelow(900000) + 100000}'
+
+
+def is_expired(created_at):
+    return timezone.now() > created_at + OTP_LIFETIME
+
+
+class CacheOTPStore:
+    key = 'booking:otp:{}'
+    attempts_key = 'booking:otp:{}:attempts'
+
+    def issue(self, phone, code):
+        timeout = OTP_LIFETIME.total_seconds()
+        cache.set_many({self.key.format(phone): (code, timezone.now()), self.attempts_key.format(phone): 0}, timeout)
+
+    def latest(self, phone):
+        """``(code, created_at)`` of the current code for ``phone``, or ``None``."""
+        return cache.get(self.key.format(phone))
+
+    def attempt(self, phone):
+        """Count one guess at the current code; returns the guesses so far."""
+        key = self.attempts_key.format(phone)
+        cache.add(key, 0, OTP_LIFETIME.total_seconds())
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr(), along with the code.
+            return 1
+
+    def consume(self, phone):
+        cache.delete_many([self.key.format(phone), self.attempts_key.format(phone)])
+
+
+class DatabaseOTPStore:
+    def issue(self, phone, code):
+        OTP.objects.filter(phone=phone).delete()
+        OTP.objects.create(phone=phone, otp=code)
+
+    def latest(self, phone):
+        """``(code, created_at)`` of the current code for ``phone``, or ``None``."""
+        return OTP.objects.filter(phone=phone).order_by('-created_at').values_list('otp', 'created_at').first()
+
+    def attempt(self, phone):
+        """Count one guess at the current code; returns the guesses so far."""
+        OTP.objects.filter(phone=phone).update(attempts=F('attempts') + 1)
+        return OTP.objects.filter(phone=phone).aggregate(attempts=Max('attempts'))['attempts'] or 0
+
+    def consume(self, phone):
+        OTP.objects.filter(phone=phone).delete()
+
+    def purge_expired(self, batch_size=1000):
+        """Delete expired codes ``batch_size`` rows at a time; returns the number deleted."""
+        cutoff = timezone.now() - OTP_LIFETIME
+        deleted = 0
+        while True:
+            pks = list(OTP.objects.filter(created_at__lt=cutoff).values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return deleted
+            deleted += OTP.objects.filter(pk__in=pks).delete()[0]
+
+
+@lru_cache
+def _load_store(path):
+    return import_string(path)()
+
+
+def get_store():
+    return _load_store(settings.OTP_STORE)
+
+
+def issue(phone):
+    """Create, store and return a new code for ``phone``."""
+    code = generate()
+    get_store().issue(phone, code)
+    return code
+
+
+def check(phone, code):
+    """
+    ``VALID``, ``INVALID``, ``EXPIRED``, ``MISSING`` or ``EXHAUSTED``.
+
+    A valid code is consumed, and so is a code that has had too many guesses.
+    """
+    store = get_store()
+    current = store.latest(phone) if phone else None
+    if current is None:
+        return MISSING
+    stored_code, created_at = current
+    if is_expired(created_at):
+        return EXPIRED
+    # Counted before comparing, so concurrent guesses cannot exceed the limit.
+    if store.attempt(phone) > settings.OTP_MAX_ATTEMPTS:
+        store.consume(phone)
+        return EXHAUSTED
+    if not code or not secrets.compare_digest(stored_code.encode(), code.encode()):
+        return INVALID
+    store.consume(phone)
+    return VALID
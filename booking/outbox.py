@@ -0,0 +1,171 @@
+"""
+Transactional email outbox.
+
+Views never talk to the SMTP server.  ``enqueue`` inserts an
+``EmailOutbox`` row inside the caller's transaction, so the email exists
+exactly when the change it reports was committed.  ``manage.py
+email_worker`` runs ``run()``, which
+
+* claims up to ``batch_size`` due emails, leasing them for
+  ``settings.EMAIL_OUTBOX_CLAIM_TIMEOUT`` seconds (``SKIP LOCKED`` on
+  PostgreSQL) so a crashed worker's emails are sent again;
+* sends them over one SMTP connection that stays open from batch to batch
+  and is reopened if the server drops it;
+* deletes sent emails and reschedules failed ones with exponential
+  backoff.  Emails the server refuses outright (5xx), or that still fail
+  after ``settings.EMAIL_OUTBOX_MAX_ATTEMPTS`` attempts, are kept as dead
+  letters.
+"""
+import logging
+import random
+import smtplib
+import textwrap
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF = 3600
+
+BOOKING_CONFIRMATION = textwrap.dedent("""\
+    Dear {name},
+
+    Your class booking for {program} with {trainer} on {date} ({time}) has been confirmed.
+
+    See you at the gym!
+
+    FitZone Team
+""")
+
+
+def enqueue(to, subject, body, from_email=None):
+    return EmailOutbox.objects.create(
+        to=to, subject=subject, body=body, from_email=from_email or settings.DEFAULT_FROM_EMAIL or '',
+    )
+
+
+def enqueue_booking_confirmation(booking, email):
+    trainer = booking.trainer.name if booking.trainer else "our team"
+    body = BOOKING_CONFIRMATION.format(
+        name=booking.user_name, program=booking.program.title, trainer=trainer,
+        date=booking.preferred_date, time=booking.preferred_time,
+    )
+    return enqueue(email, 'FitZone - Booking Confirmation', body, from_email='noreply@fitzone.com')
+
+
+def backoff(attempts):
+    """Seconds before retry number ``attempts``: doubling, capped, with jitter."""
+    delay = min(settings.EMAIL_OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1), MAX_BACKOFF)
+    return delay * random.uniform(0.5, 1)
+
+
+def claim(batch_size):
+    """Lease up to ``batch_size`` due emails to the caller."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = EmailOutbox.objects.filter(
+            status__in=[EmailOutbox.PENDING, EmailOutbox.SENDING], next_attempt_at__lte=now,
+        ).order_by('next_attempt_at')
+        emails = list(due.select_for_update(skip_locked=True)[:batch_size])
+        EmailOutbox.objects.filter(pk__in=[email.pk for email in emails]).update(
+            status=EmailOutbox.SENDING, next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT),
+        )
+    return emails
+
+
+def failed(email, error, permanent=False):
+    """Reschedule ``email`` after a failed attempt, or dead-letter it."""
+    attempts = email.attempts + 1
+    if permanent or attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        changes = {'status': EmailOutbox.DEAD}
+        logger.error("Email %s to %s dead-lettered: %s", email.pk, email.to, error)
+    else:
+        changes = {
+            'status': EmailOutbox.PENDING,
+            'next_attempt_at': timezone.now() + timedelta(seconds=backoff(attempts)),
+        }
+    EmailOutbox.objects.filter(pk=email.pk).update(attempts=attempts, last_error=str(error), **changes)
+
+
+def is_permanent(exc):
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(exc, smtplib.SMTPResponseException) and 500 <= exc.smtp_code < 600
+
+
+class Sender:
+    """Sends emails over one connection from ``get_connection()``, kept open between batches."""
+
+    def __init__(self, connection=None):
+        self.connection = connection or get_connection(fail_silently=False)
+        self.is_open = False
+
+    def send(self, email):
+        message = EmailMessage(email.subject, email.body, email.from_email, [email.to], connection=self.connection)
+        try:
+            self.open()
+            message.send()
+        except smtplib.SMTPServerDisconnected:
+            # The server timed out the idle connection: reconnect once.
+            self.close()
+            self.open()
+            message.send()
+
+    def open(self):
+        if not self.is_open:
+            self.connection.open()
+            self.is_open = True
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            try:
+                self.connection.close()
+            except (OSError, smtplib.SMTPException):
+                pass
+
+
+def deliver_batch(sender, batch_size):
+    """Claim and send one batch; returns the number of emails claimed."""
+    emails = claim(batch_size)
+    sent = []
+    for email in emails:
+        try:
+            sender.send(email)
+        except (OSError, smtplib.SMTPException) as exc:
+            if not is_permanent(exc):
+                # The connection may be unusable; start the next email on a fresh one.
+                sender.close()
+            failed(email, exc, permanent=is_permanent(exc))
+        else:
+            sent.append(email.pk)
+    EmailOutbox.objects.filter(pk__in=sent).delete()
+    return len(emails)
+
+
+def run(batch_size=50, poll_interval=2.0, stop=None, drain=False, connection=None):
+    """
+    Send outbox emails until ``stop`` (a ``threading.Event``) is set.
+
+    With ``drain`` it returns as soon as nothing is due.
+    """
+    sender = Sender(connection)
+    try:
+        while not (stop and stop.is_set()):
+            if deliver_batch(sender, batch_size):
+                continue
+            if drain:
+                return
+            if stop:
+                stop.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+    finally:
+        sender.close()
@@ -0,0 +1,76 @@
+"""
+Admin paginator that estimates large counts instead of running ``COUNT(*)``.
+
+Counting every row of an ever-growing table is a full scan per changelist
+page.  Above ``settings.ADMIN_ESTIMATED_COUNT_THRESHOLD`` rows the count
+comes from the planner statistics instead:
+
+* unfiltered changelists read the table estimate (``pg_class.reltuples``
+  on PostgreSQL, ``sqlite_stat1`` on SQLite, both refreshed by
+  ``ANALYZE``);
+* filtered changelists on PostgreSQL use the row estimate of the query
+  plan.
+
+Below the threshold, or when no estimate is available, the exact count
+is used.
+"""
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+def table_estimate(connection, table):
+    """Row count of ``table`` according to the planner statistics, or ``None``."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == 'sqlite':
+            try:
+                # The first number of every statistics row is the table's row count.
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            except DatabaseError:
+                # sqlite_stat1 only exists once ANALYZE has run.
+                return None
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    # PostgreSQL reports -1 for tables that were never analyzed.
+    return estimate if estimate >= 0 else None
+
+
+def plan_estimate(connection, queryset):
+    """Rows the PostgreSQL planner expects ``queryset`` to return, or ``None``."""
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimate_count(queryset):
+    """Estimated number of rows in ``queryset`` or ``None`` when there is none."""
+    connection = connections[queryset.db]
+    if not queryset.query.where and not queryset.query.distinct:
+        return table_estimate(connection, queryset.model._meta.db_table)
+    return plan_estimate(connection, queryset)
+
+
+class EstimatedCountPaginator(Paginator):
+    """``Paginator`` whose ``count`` is an estimate for large result sets."""
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return super().count
+        return estimate
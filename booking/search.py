@@ -0,0 +1,88 @@
+"""
+Indexed admin search over bookings and members.
+
+Staff look people up by name, phone or email.  The searched columns get
+an index each, created by ``booking.migrations.0002_search_indexes``:
+
+* PostgreSQL: a ``pg_trgm`` GIN index on ``UPPER(column::text)``, the
+  expression Django's ``icontains`` compares, so substring searches are
+  index scans;
+* SQLite: a ``COLLATE NOCASE`` B-tree index, which SQLite uses for
+  case-insensitive ``LIKE 'prefix%'``, so searches are prefix matches
+  (``istartswith``) there.
+
+On any other database the columns are searched with plain ``icontains``.
+"""
+from django.db import connection
+
+# table -> searched columns
+SEARCH_COLUMNS = {
+    'booking_booking': ['user_name', 'user_phone'],
+    'booking_gymuser': ['phone', 'email'],
+}
+
+
+def index_name(table, column):
+    return f'{table}_{column}_search_idx'
+
+
+class PostgresBackend:
+    # search_fields prefix: icontains
+    lookup_prefix = ''
+
+    def create_sql(self):
+        yield "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+        for table, columns in SEARCH_COLUMNS.items():
+            for column in columns:
+                yield (
+                    f"CREATE INDEX IF NOT EXISTS {index_name(table, column)} ON {table} "
+                    f"USING GIN ((UPPER({column}::text)) gin_trgm_ops)"
+                )
+
+    def drop_sql(self):
+        for table, columns in SEARCH_COLUMNS.items():
+            for column in columns:
+                yield f"DROP INDEX IF EXISTS {index_name(table, column)}"
+
+
+class SQLiteBackend:
+    # search_fields prefix: istartswith
+    lookup_prefix = '^'
+
+    def create_sql(self):
+        for table, columns in SEARCH_COLUMNS.items():
+            for column in columns:
+                yield f"CREATE INDEX IF NOT EXISTS {index_name(table, column)} ON {table} ({column} COLLATE NOCASE)"
+
+    def drop_sql(self):
+        for table, columns in SEARCH_COLUMNS.items():
+            for column in columns:
+                yield f"DROP INDEX IF EXISTS {index_name(table, column)}"
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend(),
+    'postgresql': PostgresBackend(),
+}
+
+
+def get_backend(conn=connection):
+    return BACKENDS.get(conn.vendor)
+
+
+def search_fields(fields, conn=connection):
+    """``ModelAdmin.search_fields`` for ``fields``, using the lookup the indexes serve."""
+    backend = get_backend(conn)
+    prefix = backend.lookup_prefix if backend else ''
+    return [prefix + field for field in fields]
+
+
+class IndexedSearchMixin:
+    """
+    ``ModelAdmin`` mixin searching ``indexed_search_fields`` with the
+    lookup their indexes support on the current database.
+    """
+    indexed_search_fields = ()
+
+    def get_search_fields(self, request):
+        return search_fields(self.indexed_search_fields)
@@ -0,0 +1,321 @@
+"""
+Asynchronous SMS delivery.
+
+Views never talk to the SMS gateway.  ``send_otp`` / ``enqueue`` insert an
+``SMSMessage`` row, which is durable across restarts, and return at once.
+``manage.py sms_worker`` runs ``run()``: an ``asyncio`` loop with
+``concurrency`` consumers, each of which
+
+* claims up to ``batch_size`` due messages (``SKIP LOCKED`` on
+  PostgreSQL, so several workers can share the queue), leasing them for
+  ``settings.SMS_CLAIM_TIMEOUT`` seconds so a crashed worker's claim
+  lapses and the messages are sent again;
+* hands the batch to the gateway in one call;
+* deletes delivered messages and reschedules failed ones with
+  exponential backoff, up to ``settings.SMS_MAX_ATTEMPTS`` attempts, after
+  which they stay in the table as ``failed``, with their body cleared.
+
+Messages past their ``expires_at`` are deleted when claimed instead of
+sent: a login code that arrives after ``OTP_LIFETIME`` is useless, and
+OTP bodies are secrets that should not outlive the code.
+
+The gateway is ``settings.SMS_GATEWAY``.  ``ConsoleGateway`` prints
+messages for development; ``HTTPGateway`` posts JSON batches over
+keep-alive HTTP/1.1 connections that are reused from batch to batch.
+``booking.sms_stub`` (``manage.py sms_stub_server``) implements the
+other end for tests and benchmarks.
+"""
+import asyncio
+import json
+import logging
+import random
+import ssl
+from collections import namedtuple
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OTP_LIFETIME, SMSMessage
+
+logger = logging.getLogger(__name__)
+
+OTP_MESSAGE = "Your FitZone login code is {code}. It expires in {minutes} minutes."
+MAX_BACKOFF = 300
+
+Outgoing = namedtuple('Outgoing', ['id', 'phone', 'body', 'attempts'])
+# Outcome of one message: ``error`` is None once delivered; permanent
+# errors are not retried.
+Result = namedtuple('Result', ['error', 'permanent'])
+DELIVERED = Result(None, False)
+
+
+class GatewayError(Exception):
+    """The gateway did not take the batch; every message in it is retried."""
+
+
+def enqueue(phone, body, expires_at=None):
+    return SMSMessage.objects.create(phone=phone, body=body, expires_at=expires_at)
+
+
+def send_otp(phone, code):
+    """Queue the text message carrying ``code`` to ``phone``, dropped once the code expires."""
+    minutes = int(OTP_LIFETIME.total_seconds() // 60)
+    return enqueue(phone, OTP_MESSAGE.format(code=code, minutes=minutes), expires_at=timezone.now() + OTP_LIFETIME)
+
+
+def backoff(attempts):
+    """Seconds before retry number ``attempts``: doubling, capped, with jitter."""
+    delay = min(settings.SMS_RETRY_BACKOFF * 2 ** (attempts - 1), MAX_BACKOFF)
+    return delay * random.uniform(0.5, 1)
+
+
+def claim(batch_size):
+    """Lease up to ``batch_size`` due messages to the caller, deleting expired ones on the way."""
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            due = SMSMessage.objects.filter(
+                status__in=[SMSMessage.PENDING, SMSMessage.SENDING], next_attempt_at__lte=now,
+            ).order_by('next_attempt_at')
+            rows = list(due.select_for_update(skip_locked=True).values_list(
+                'pk', 'phone', 'body', 'attempts', 'expires_at',
+            )[:batch_size])
+            expired = [row[0] for row in rows if row[4] is not None and row[4] <= now]
+            live = [Outgoing(*row[:4]) for row in rows if row[0] not in expired]
+            if expired:
+                SMSMessage.objects.filter(pk__in=expired).delete()
+                logger.warning("Dropped %d expired SMS before sending", len(expired))
+            SMSMessage.objects.filter(pk__in=[message.id for message in live]).update(
+                status=SMSMessage.SENDING, next_attempt_at=now + timedelta(seconds=settings.SMS_CLAIM_TIMEOUT),
+            )
+        # A batch that was all expired says nothing about what is left.
+        if live or not expired:
+            return live
+
+
+def record(messages, results):
+    """Delete delivered ``messages`` and reschedule or fail the rest."""
+    now = timezone.now()
+    SMSMessage.objects.filter(pk__in=[
+        message.id for message, result in zip(messages, results) if result.error is None
+    ]).delete()
+    for message, result in zip(messages, results):
+        if result.error is None:
+            continue
+        attempts = message.attempts + 1
+        if result.permanent or attempts >= settings.SMS_MAX_ATTEMPTS:
+            # The body may hold a login code; keep only the envelope.
+            changes = {'status': SMSMessage.FAILED, 'body': ''}
+            logger.error("SMS %s to %s failed for good: %s", message.id, message.phone, result.error)
+        else:
+            changes = {'status': SMSMessage.PENDING, 'next_attempt_at': now + timedelta(seconds=backoff(attempts))}
+        SMSMessage.objects.filter(pk=message.id).update(attempts=attempts, last_error=result.error, **changes)
+
+
+class SMSGateway:
+    """Sends batches of messages; implementations keep connections open between batches."""
+
+    async def send_batch(self, messages):
+        """Deliver ``messages``; returns one ``Result`` per message or raises ``GatewayError``."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class ConsoleGateway(SMSGateway):
+    """Prints messages instead of sending them, for development."""
+
+    async def send_batch(self, messages):
+        for message in messages:
+            print(f"[SMS] {message.phone}: {message.body}")
+        return [DELIVERED] * len(messages)
+
+
+class HTTPConnection:
+    """One keep-alive HTTP/1.1 client connection."""
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.netloc = parts.netloc
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.port = parts.port or (443 if self.ssl else 80)
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    @property
+    def is_open(self):
+        return self.writer is not None and not self.writer.is_closing()
+
+    async def request(self, method, path, body, headers):
+        """Send one request and return ``(status, body)``."""
+        reused = self.is_open
+        if not reused:
+            await self.connect()
+        try:
+            return await asyncio.wait_for(self.exchange(method, path, body, headers), self.timeout)
+        except (asyncio.IncompleteReadError, ConnectionError) as exc:
+            await self.close()
+            if not reused or getattr(exc, 'partial', b''):
+                raise
+        # The server closed the idle connection before reading the request.
+        await self.connect()
+        return await asyncio.wait_for(self.exchange(method, path, body, headers), self.timeout)
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout,
+        )
+
+    async def exchange(self, method, path, body, headers):
+        head = [f'{method} {path} HTTP/1.1', f'Host: {self.netloc}', f'Content-Length: {len(body)}']
+        head += [f'{name}: {value}' for name, value in headers.items()]
+        self.writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readuntil(b'\r\n')).split()[1])
+        response_headers = {}
+        while (line := await self.reader.readuntil(b'\r\n')) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            content = await self.read_chunked()
+        else:
+            content = await self.reader.readexactly(int(response_headers.get('content-length', 0)))
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, content
+
+    async def read_chunked(self):
+        chunks = []
+        while size := int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16):
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+        # Skip any trailers.
+        while await self.reader.readuntil(b'\r\n') != b'\r\n':
+            pass
+        return b''.join(chunks)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+
+class HTTPGateway(SMSGateway):
+    """
+    Posts JSON batches to ``settings.SMS_GATEWAY_URL``::
+
+        {"messages": [{"id": 1, "to": "5551112222", "body": "..."}]}
+
+    and expects one result per message::
+
+        {"results": [{"id": 1, "status": "sent"},
+                     {"id": 2, "status": "failed", "error": "...", "permanent": false}]}
+
+    A 429 or 5xx response retries the whole batch; any other 4xx fails it.
+    Subclasses adapt ``encode`` and ``decode`` to a provider's API.
+    Idle connections are kept for the next batch.
+    """
+
+    def __init__(self, url=None, token=None, timeout=10):
+        self.url = url or settings.SMS_GATEWAY_URL
+        self.path = urlsplit(self.url).path or '/'
+        self.token = settings.SMS_GATEWAY_TOKEN if token is None else token
+        self.timeout = timeout
+        self.idle = []
+
+    def encode(self, messages):
+        return json.dumps({
+            'messages': [{'id': message.id, 'to': message.phone, 'body': message.body} for message in messages],
+        }).encode()
+
+    def decode(self, messages, content):
+        results = {item['id']: item for item in json.loads(content)['results']}
+        decoded = []
+        for message in messages:
+            item = results.get(message.id, {'status': 'failed', 'error': 'missing from response'})
+            if item['status'] == 'sent':
+                decoded.append(DELIVERED)
+            else:
+                decoded.append(Result(item.get('error') or 'failed', bool(item.get('permanent'))))
+        return decoded
+
+    async def send_batch(self, messages):
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        connection = self.idle.pop() if self.idle else HTTPConnection(self.url, self.timeout)
+        try:
+            status, content = await connection.request('POST', self.path, self.encode(messages), headers)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as exc:
+            await connection.close()
+            raise GatewayError(f"{type(exc).__name__}: {exc}") from exc
+        if connection.is_open:
+            self.idle.append(connection)
+        if status == 429 or status >= 500:
+            raise GatewayError(f"HTTP {status}")
+        if status >= 400:
+            return [Result(f"HTTP {status}", True)] * len(messages)
+        try:
+            return self.decode(messages, content)
+        except (ValueError, KeyError, TypeError) as exc:
+            raise GatewayError(f"Unreadable response: {exc}") from exc
+
+    async def close(self):
+        while self.idle:
+            await self.idle.pop().close()
+
+
+def get_gateway():
+    return import_string(settings.SMS_GATEWAY)()
+
+
+async def deliver_batch(gateway, batch_size):
+    """Claim, send and record one batch; returns the number of messages claimed."""
+    messages = await sync_to_async(claim)(batch_size)
+    if not messages:
+        return 0
+    try:
+        results = await gateway.send_batch(messages)
+    except GatewayError as exc:
+        logger.warning("SMS batch of %d failed: %s", len(messages), exc)
+        results = [Result(str(exc), False)] * len(messages)
+    await sync_to_async(record)(messages, results)
+    return len(messages)
+
+
+async def run(gateway=None, batch_size=50, concurrency=4, poll_interval=1.0, stop=None, drain=False):
+    """
+    Deliver queued messages until ``stop`` (an ``asyncio.Event``) is set.
+
+    With ``drain`` each consumer returns as soon as nothing is due.
+    """
+    gateway = gateway or get_gateway()
+    stop = stop or asyncio.Event()
+
+    async def consume():
+        while not stop.is_set():
+            if await deliver_batch(gateway, batch_size):
+                continue
+            if drain:
+                return
+            try:
+                await asyncio.wait_for(stop.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    try:
+        await asyncio.gather(*(consume() for _ in range(concurrency)))
+    finally:
+        await gateway.close()
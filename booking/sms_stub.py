@@ -0,0 +1,85 @@
+"""
+Local stand-in for an SMS provider, for tests and benchmarks.
+
+Speaks the JSON protocol of ``booking.sms.HTTPGateway`` over keep-alive
+HTTP/1.1 and keeps every message it accepts in ``received``.  ``latency``
+delays each response, ``fail_rate`` fails that share of messages
+(retryably) and ``status`` answers every request with that HTTP status
+instead.  Run it with ``manage.py sms_stub_server``.
+"""
+import asyncio
+import json
+import random
+from http import HTTPStatus
+
+
+class StubSMSServer:
+    def __init__(self, latency=0.0, fail_rate=0.0, status=200, verbose=False):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.status = status
+        self.verbose = verbose
+        self.received = []
+        self.requests = 0
+        self.connections = 0
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=0):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self
+
+    @property
+    def url(self):
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f'http://{host}:{port}/messages'
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def respond(self, content):
+        """``(status, body)`` for one request body."""
+        if self.status != 200:
+            return self.status, {'error': HTTPStatus(self.status).phrase}
+        try:
+            messages = json.loads(content)['messages']
+        except (ValueError, KeyError):
+            return 400, {'error': 'Expected {"messages": [...]}'}
+        results = []
+        for message in messages:
+            if random.random() < self.fail_rate:
+                results.append({'id': message['id'], 'status': 'failed', 'error': 'carrier unavailable'})
+                continue
+            self.received.append(message)
+            if self.verbose:
+                print(f"[stub SMS] {message['to']}: {message['body']}")
+            results.append({'id': message['id'], 'status': 'sent'})
+        return 200, {'results': results}
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    await reader.readuntil(b'\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                headers = {}
+                while (line := await reader.readuntil(b'\r\n')) != b'\r\n':
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                content = await reader.readexactly(int(headers.get('content-length', 0)))
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                status, payload = self.respond(content)
+                body = json.dumps(payload).encode()
+                writer.write(
+                    f'HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n'
+                    f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
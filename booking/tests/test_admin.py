@@ -0,0 +1,151 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+from booking import sms
+from booking.models import Booking, OTP
+from booking.paginator import EstimatedCountPaginator, estimate_count
+
+
+def analyze():
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+@pytest.fixture
+def otps(db):
+    return OTP.objects.bulk_create(OTP(phone=f"55500000{i:02}", otp="123456") for i in range(5))
+
+
+@pytest.mark.django_db
+class TestEstimatedCountPaginator:
+    def test_small_tables_are_counted(self, otps, settings):
+        """Test counts below the threshold are exact"""
+        settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 100
+        analyze()
+        OTP.objects.create(phone="5550009999", otp="654321")
+
+        assert EstimatedCountPaginator(OTP.objects.order_by('pk'), 2).count == 6
+
+    def test_large_tables_use_statistics(self, otps, settings):
+        """Test counts at or above the threshold come from ANALYZE statistics, not COUNT(*)"""
+        settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 3
+        analyze()
+        OTP.objects.create(phone="5550009999", otp="654321")
+
+        assert EstimatedCountPaginator(OTP.objects.order_by('pk'), 2).count == 5
+
+    def test_without_statistics_counts(self, otps, settings):
+        """Test a table that was never analyzed falls back to COUNT(*)"""
+        settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 1
+
+        assert estimate_count(Booking.objects.all()) is None
+        assert EstimatedCountPaginator(OTP.objects.order_by('pk'), 2).count == 5
+
+    def test_filtered_queryset_is_counted(self, otps, settings):
+        """Test filtered changelists are counted exactly where no plan estimate exists"""
+        settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 1
+        analyze()
+
+        if connection.vendor == 'sqlite':
+            assert EstimatedCountPaginator(OTP.objects.filter(phone__endswith='1').order_by('pk'), 2).count == 1
+
+
+@pytest.mark.django_db
+class TestChangelists:
+    @pytest.fixture
+    def staff_client(self, client, admin_user):
+        client.force_login(admin_user)
+        return client
+
+    def booking_changelist_queries(self, staff_client, django_assert_max_num_queries, limit):
+        with django_assert_max_num_queries(limit) as context:
+            response = staff_client.get(reverse('admin:booking_booking_changelist'))
+        assert response.status_code == 200
+        return len(context.captured_queries)
+
+    def test_booking_rows_are_joined(self, staff_client, booking, django_assert_max_num_queries):
+        """Test extra bookings add no queries to the changelist"""
+        single = self.booking_changelist_queries(staff_client, django_assert_max_num_queries, 50)
+        for day in range(2, 7):
+            Booking.objects.create(
+                user=booking.user, user_name="Test User", user_phone=booking.user_phone, trainer=booking.trainer,
+                program=booking.program, preferred_date=f"2026-06-0{day}", preferred_time="evening",
+            )
+
+        assert self.booking_changelist_queries(staff_client, django_assert_max_num_queries, 50) == single
+
+    def test_no_full_result_count(self, staff_client, booking, django_assert_max_num_queries):
+        """Test filtered changelists do not count the whole table a second time"""
+        with django_assert_max_num_queries(50) as context:
+            staff_client.get(reverse('admin:booking_booking_changelist'), {'preferred_time__exact': 'morning'})
+
+        counts = [query['sql'] for query in context.captured_queries if 'COUNT(' in query['sql'].upper()]
+        assert all('WHERE' in sql.upper() for sql in counts)
+
+    def test_booking_ordering_is_indexed(self, booking):
+        """Test a changelist page reads the newest bookings from an index instead of sorting the table"""
+        queryset = Booking.objects.select_related('user', 'trainer', 'program').order_by('-created_at', '-pk')[:100]
+
+        plan = queryset.explain()
+
+        if connection.vendor == 'sqlite':
+            assert 'booking_created_idx' in plan
+            assert 'TEMP B-TREE' not in plan
+
+    @pytest.mark.parametrize('name', ['booking_gymuser', 'booking_otp'])
+    def test_other_changelists_render(self, staff_client, otps, name):
+        """Test the user and OTP changelists render with the estimating paginator"""
+        assert staff_client.get(reverse(f'admin:{name}_changelist')).status_code == 200
+
+
+    def test_login_codes_are_hidden(self, staff_client):
+        """Test staff cannot read queued OTP texts or stored codes"""
+        message = sms.send_otp("5551112222", "987654")
+        OTP.objects.create(phone="5551112222", otp="876543")
+
+        pages = [
+            staff_client.get(reverse('admin:booking_smsmessage_changelist')),
+            staff_client.get(reverse('admin:booking_smsmessage_change', args=[message.pk])),
+            staff_client.get(reverse('admin:booking_otp_changelist')),
+        ]
+
+        assert all(page.status_code == 200 for page in pages)
+        assert not any(b'987654' in page.content or b'876543' in page.content for page in pages)
+
+
+@pytest.mark.django_db
+class TestAdminSearch:
+    @pytest.fixture
+    def staff_client(self, client, admin_user):
+        client.force_login(admin_user)
+        return client
+
+    def search(self, staff_client, name, query):
+        response = staff_client.get(reverse(f'admin:{name}_changelist'), {'q': query})
+        assert response.status_code == 200
+        return list(response.context['cl'].result_list)
+
+    def test_bookings_by_snapshot_name(self, staff_client, booking):
+        """Test bookings are found by the booked name without joining the user"""
+        assert self.search(staff_client, 'booking_booking', 'test') == [booking]
+        assert self.search(staff_client, 'booking_booking', '"test us"') == [booking]
+        assert self.search(staff_client, 'booking_booking', 'nobody') == []
+
+    def test_bookings_by_phone(self, staff_client, booking):
+        """Test bookings are found by the booked phone number"""
+        assert self.search(staff_client, 'booking_booking', booking.user_phone[:4]) == [booking]
+
+    def test_members_by_email(self, staff_client, gym_user):
+        """Test members are found by email"""
+        assert self.search(staff_client, 'booking_gymuser', 'TEST@') == [gym_user]
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite', reason="SQLite prefix index")
+    def test_sqlite_search_uses_prefix_index(self, booking):
+        """Test the SQLite search lookup is answered from the NOCASE index"""
+        queryset = Booking.objects.filter(user_name__istartswith='test')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+
+        assert 'booking_booking_user_name_search_idx' in plan
@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+
+import pytest
+from django.urls import reverse
+from booking import export
+from booking.models import Booking
+
+
+def content(response):
+    assert response.streaming
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.fixture
+def bookings(booking, gym_user, program):
+    second = Booking.objects.create(
+        user=gym_user, user_name="=HYPERLINK(\"x\")", user_phone=gym_user.phone,
+        program=program, preferred_date="2026-06-02", preferred_time="evening",
+    )
+    return [booking, second]
+
+
+@pytest.mark.django_db
+class TestExportStreams:
+    def test_csv_rows(self, bookings):
+        """Test CSV export has a header and one row per booking with related columns"""
+        rows = list(csv.DictReader(io.StringIO(''.join(export.stream_csv(Booking.objects.order_by('pk'))))))
+
+        assert [int(row['id']) for row in rows] == [booking.pk for booking in bookings]
+        assert rows[0]['program'] == 'Cardio Blast'
+        assert rows[0]['trainer'] == 'John Trainer'
+        assert rows[0]['user_email'] == 'test@example.com'
+        assert rows[1]['trainer'] == ''
+
+    def test_csv_neutralises_formulas(self, bookings):
+        """Test cells that a spreadsheet would evaluate are quoted"""
+        rows = list(csv.DictReader(io.StringIO(''.join(export.stream_csv(Booking.objects.order_by('pk'))))))
+
+        assert rows[1]['user_name'].startswith("'=")
+
+    def test_jsonl_rows(self, bookings):
+        """Test JSON Lines export writes one object per line"""
+        lines = ''.join(export.stream_jsonl(Booking.objects.order_by('pk'))).splitlines()
+
+        records = [json.loads(line) for line in lines]
+        assert [record['id'] for record in records] == [booking.pk for booking in bookings]
+        assert records[1]['trainer'] is None
+        assert records[0]['preferred_date'] == '2026-06-01'
+
+    def test_one_query_per_chunk(self, bookings, django_assert_num_queries):
+        """Test related rows come from the same query as the bookings"""
+        with django_assert_num_queries(1):
+            list(export.records(Booking.objects.all(), chunk_size=1))
+
+
+@pytest.mark.django_db
+class TestAdminExport:
+    def test_action_streams_selection(self, client, admin_user, bookings):
+        """Test the admin action downloads only the selected bookings"""
+        client.force_login(admin_user)
+
+        response = client.post(reverse('admin:booking_booking_changelist'), {
+            'action': 'export_jsonl', '_selected_action': [bookings[0].pk],
+        })
+
+        assert response['Content-Disposition'].startswith('attachment; filename="bookings-')
+        assert [json.loads(line)['id'] for line in content(response).splitlines()] == [bookings[0].pk]
+
+
+@pytest.mark.django_db
+class TestApiExport:
+    url = '/api/booking/bookings/export/'
+
+    def test_staff_gets_csv(self, admin_api_client, bookings):
+        """Test staff download every booking as CSV by default"""
+        response = admin_api_client.get(self.url)
+
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/csv')
+        assert len(content(response).splitlines()) == 3
+
+    def test_jsonl_output(self, admin_api_client, bookings):
+        """Test ?output=jsonl switches to JSON Lines"""
+        response = admin_api_client.get(self.url, {'output': 'jsonl'})
+
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        assert len(content(response).splitlines()) == 2
+
+    def test_unknown_output(self, admin_api_client):
+        """Test an unsupported output format is rejected"""
+        assert admin_api_client.get(self.url, {'output': 'xml'}).status_code == 400
+
+    def test_members_forbidden(self, authenticated_api_client, bookings):
+        """Test non-staff users cannot export"""
+        assert authenticated_api_client.get(self.url).status_code == 403
+
+    def test_anonymous_rejected(self, api_client):
+        """Test anonymous requests cannot export"""
+        assert api_client.get(self.url).status_code == 401
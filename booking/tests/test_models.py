@@ -108,6 +108,52 @@ class TestGymUserModel:
         assert user.created_at is not None
 
 
+@pytest.mark.django_db
+class TestGymUserVerification:
+
+    def test_verify_phone_creates_verified_member(self):
+        """Test verifying an unknown number creates a verified member without a password"""
+        user = GymUser.objects.verify_phone("5551112222")
+
+        assert user.is_verified is True
+        assert not user.has_usable_password()
+        assert GymUser.objects.filter(phone="5551112222").count() == 1
+
+    def test_verify_phone_marks_existing_member(self, unverified_user):
+        """Test verifying a known number updates that member"""
+        user = GymUser.objects.verify_phone(unverified_user.phone)
+
+        assert user.pk == unverified_user.pk
+        unverified_user.refresh_from_db()
+        assert unverified_user.is_verified is True
+
+    def test_purge_unverified_in_batches(self, verified_user, admin_user):
+        """Test stale unverified members go, verified, staff and booked ones stay"""
+        stale = [GymUser.objects.create_user(phone=f"555000000{i}") for i in range(5)]
+        booked = BookingFactory(user=GymUser.objects.create_user(phone="5550000010")).user
+        fresh = GymUser.objects.create_user(phone="5550000011")
+        old = timezone.now() - timedelta(days=3)
+        GymUser.objects.exclude(pk=fresh.pk).update(created_at=old)
+
+        deleted = GymUser.objects.purge_unverified(timezone.now() - timedelta(days=1), batch_size=2)
+
+        assert deleted == 5
+        assert not GymUser.objects.filter(pk__in=[user.pk for user in stale]).exists()
+        assert set(GymUser.objects.values_list('pk', flat=True)) == {verified_user.pk, admin_user.pk, booked.pk, fresh.pk}
+
+    def test_purge_command(self, unverified_user, capsys):
+        """Test purge_unverified_users honours --older-than-days"""
+        from django.core.management import call_command
+        GymUser.objects.filter(pk=unverified_user.pk).update(created_at=timezone.now() - timedelta(days=10))
+
+        call_command('purge_unverified_users', '--older-than-days', '30')
+        assert GymUser.objects.filter(pk=unverified_user.pk).exists()
+
+        call_command('purge_unverified_users', '--older-than-days', '7')
+        assert not GymUser.objects.filter(pk=unverified_user.pk).exists()
+        assert 'Deleted 1 unverified members' in capsys.readouterr().out
+
+
 @pytest.mark.django_db
 class TestOTPModel:
 
@@ -115,7 +161,7 @@ class TestOTPModel:
         otp = OTPFactory(phone="1234567890", otp="123456")
         assert otp.phone == "1234567890"
         assert otp.otp == "123456"
-        assert str(otp) == "1234567890 - 123456"
+        assert str(otp) == "OTP for 1234567890"
 
     def test_otp_not_expired(self):
         otp = OTPFactory()
@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from booking import otp
+from booking.models import OTP
+from booking.tests.factories import OTPFactory
+
+STORES = ['booking.otp.CacheOTPStore', 'booking.otp.DatabaseOTPStore']
+
+
+@pytest.fixture(params=STORES)
+def store(request, settings, db):
+    settings.OTP_STORE = request.param
+    return otp.get_store()
+
+
+@pytest.mark.django_db
+class TestOTPStores:
+    def test_issue_and_check(self, store):
+        """Test a freshly issued code verifies once"""
+        code = otp.issue("5551112222")
+
+        assert len(code) == 6 and code.isdigit()
+        assert otp.check("5551112222", code) == otp.VALID
+        assert otp.check("5551112222", code) == otp.MISSING
+
+    def test_wrong_code_is_kept(self, store):
+        """Test a wrong guess leaves the issued code usable"""
+        store.issue("5551112222", "123456")
+
+        assert otp.check("5551112222", "654321") == otp.INVALID
+        assert otp.check("5551112222", "123456") == otp.VALID
+
+    def test_new_code_replaces_old(self, store):
+        """Test only the latest code for a phone is accepted"""
+        store.issue("5551112222", "111111")
+        store.issue("5551112222", "222222")
+
+        assert otp.check("5551112222", "111111") == otp.INVALID
+        assert otp.check("5551112222", "222222") == otp.VALID
+
+    def test_unknown_phone(self, store):
+        """Test a phone without a code is reported missing"""
+        assert otp.check("5550000000", "123456") == otp.MISSING
+        assert otp.check(None, "123456") == otp.MISSING
+
+    def test_guesses_are_limited(self, store, settings):
+        """Test a code is discarded once its guesses run out, even if the last guess is right"""
+        settings.OTP_MAX_ATTEMPTS = 3
+        store.issue("5551112222", "123456")
+
+        assert [otp.check("5551112222", "000000") for _ in range(3)] == [otp.INVALID] * 3
+        assert otp.check("5551112222", "123456") == otp.EXHAUSTED
+        assert otp.check("5551112222", "123456") == otp.MISSING
+
+    def test_new_code_resets_guesses(self, store, settings):
+        """Test guesses are counted per code"""
+        settings.OTP_MAX_ATTEMPTS = 2
+        store.issue("5551112222", "123456")
+        otp.check("5551112222", "000000")
+        otp.check("5551112222", "000000")
+
+        store.issue("5551112222", "654321")
+
+        assert otp.check("5551112222", "000000") == otp.INVALID
+        assert otp.check("5551112222", "654321") == otp.VALID
+
+    def test_non_ascii_guess(self, store):
+        """Test arbitrary user input is compared safely"""
+        store.issue("5551112222", "123456")
+
+        assert otp.check("5551112222", "١٢٣٤٥٦") == otp.INVALID
+
+
+@pytest.mark.django_db
+class TestCacheOTPStore:
+    def test_no_database_rows(self, settings, client):
+        """Test the cache store sends codes without writing OTP rows"""
+        settings.OTP_STORE = 'booking.otp.CacheOTPStore'
+
+        client.post(reverse('Booking:send_otp'), {'phone': "5551112222"})
+
+        assert not OTP.objects.exists()
+        assert otp.get_store().latest("5551112222") is not None
+
+    def test_evicted_code_is_missing(self, settings):
+        """Test a code the cache has expired or evicted can no longer be used"""
+        settings.OTP_STORE = 'booking.otp.CacheOTPStore'
+        store = otp.get_store()
+        store.issue("5551112222", "123456")
+
+        cache.delete(store.key.format("5551112222"))
+
+        assert otp.check("5551112222", "123456") == otp.MISSING
+
+
+@pytest.mark.django_db
+class TestDatabaseOTPStore:
+    def test_expired_code(self, settings):
+        """Test an old row is reported expired"""
+        settings.OTP_STORE = 'booking.otp.DatabaseOTPStore'
+        row = OTPFactory(phone="5551112222", otp="123456")
+        OTP.objects.filter(pk=row.pk).update(created_at=timezone.now() - timedelta(minutes=6))
+
+        assert otp.check("5551112222", "123456") == otp.EXPIRED
+
+    def test_purge_in_batches(self):
+        """Test purging deletes every expired row and keeps live ones"""
+        old = [OTPFactory() for _ in range(5)]
+        OTP.objects.filter(pk__in=[row.pk for row in old]).update(created_at=timezone.now() - timedelta(hours=1))
+        live = OTPFactory()
+
+        assert otp.DatabaseOTPStore().purge_expired(batch_size=2) == 5
+        assert list(OTP.objects.all()) == [live]
+
+    def test_purge_command(self, capsys):
+        """Test purge_otps reports the number of rows deleted"""
+        row = OTPFactory()
+        OTP.objects.filter(pk=row.pk).update(created_at=timezone.now() - timedelta(hours=1))
+
+        call_command('purge_otps', '--batch-size', '10')
+
+        assert 'Deleted 1 expired OTPs' in capsys.readouterr().out
@@ -0,0 +1,173 @@
+import smtplib
+import socket
+from datetime import timedelta
+
+import pytest
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from booking import outbox
+from booking.models import Booking, EmailOutbox
+
+
+@pytest.fixture
+def booking_data(program, trainer):
+    return {
+        'name': 'Test User', 'email': 'member@example.com', 'program': program.id, 'trainer': trainer.id,
+        'date': '2026-02-15', 'time': 'morning', 'message': '',
+    }
+
+
+@pytest.fixture
+def queued(db):
+    return [outbox.enqueue(f'member{i}@example.com', f'Subject {i}', 'Body') for i in range(5)]
+
+
+class FlakyBackend(LocmemBackend):
+    """Locmem backend raising ``errors`` (by recipient) instead of sending."""
+
+    def __init__(self, errors=None, **kwargs):
+        super().__init__(**kwargs)
+        self.errors = errors or {}
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+
+    def send_messages(self, messages):
+        for message in messages:
+            error = self.errors.get(message.to[0])
+            if error:
+                raise error
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db
+class TestBookingOutbox:
+    def test_booking_queues_confirmation(self, authenticated_session, booking_data, mailoutbox):
+        """Test a booking writes its confirmation to the outbox instead of sending it"""
+        authenticated_session.post(reverse('Booking:booking'), booking_data)
+
+        email = EmailOutbox.objects.get()
+        assert email.to == 'member@example.com'
+        assert email.subject == 'FitZone - Booking Confirmation'
+        assert 'Cardio Blast with John Trainer on 2026-02-15' in email.body
+        assert mailoutbox == []
+
+    def test_outbox_shares_booking_transaction(self, authenticated_session, booking_data, monkeypatch):
+        """Test a failure writing the email rolls the booking back too"""
+        def broken(*args, **kwargs):
+            raise RuntimeError("outbox unavailable")
+        monkeypatch.setattr(outbox, 'enqueue_booking_confirmation', broken)
+
+        with pytest.raises(RuntimeError):
+            authenticated_session.post(reverse('Booking:booking'), booking_data)
+
+        assert not Booking.objects.exists()
+
+
+@pytest.mark.django_db
+class TestOutboxWorker:
+    def test_drain_sends_and_removes(self, queued, mailoutbox):
+        """Test the worker sends every due email and deletes it"""
+        outbox.run(batch_size=2, drain=True)
+
+        assert sorted(message.to[0] for message in mailoutbox) == sorted(email.to for email in queued)
+        assert not EmailOutbox.objects.exists()
+
+    def test_connection_opened_once(self, queued):
+        """Test all batches share one connection"""
+        backend = FlakyBackend()
+
+        outbox.run(batch_size=2, drain=True, connection=backend)
+
+        assert backend.opened == 1
+
+    def test_transient_failure_is_retried(self, queued, mailoutbox):
+        """Test a dropped connection reschedules only the affected email"""
+        backend = FlakyBackend(errors={'member0@example.com': smtplib.SMTPServerDisconnected('gone')})
+
+        outbox.run(drain=True, connection=backend)
+
+        email = EmailOutbox.objects.get()
+        assert email.to == 'member0@example.com'
+        assert email.status == EmailOutbox.PENDING
+        assert email.attempts == 1
+        assert email.next_attempt_at > timezone.now()
+        assert len(mailoutbox) == 4
+
+    def test_refused_recipient_is_dead_lettered(self, queued):
+        """Test a permanent refusal goes straight to the dead-letter state"""
+        refused = smtplib.SMTPRecipientsRefused({'member1@example.com': (550, b'No such user')})
+        outbox.run(drain=True, connection=FlakyBackend(errors={'member1@example.com': refused}))
+
+        email = EmailOutbox.objects.get()
+        assert email.status == EmailOutbox.DEAD
+        assert email.attempts == 1
+
+    def test_dead_letter_after_max_attempts(self, queued, settings):
+        """Test an email that keeps failing is dead-lettered"""
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 3
+        EmailOutbox.objects.update(attempts=2)
+        error = smtplib.SMTPResponseException(451, b'Try later')
+
+        outbox.run(drain=True, connection=FlakyBackend(errors={email.to: error for email in queued}))
+
+        assert set(EmailOutbox.objects.values_list('status', 'attempts')) == {(EmailOutbox.DEAD, 3)}
+
+    def test_lapsed_claims_are_resent(self, queued, mailoutbox):
+        """Test emails claimed by a worker that died are sent once the lease lapses"""
+        outbox.claim(10)
+        outbox.run(drain=True)
+        assert mailoutbox == []
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        outbox.run(drain=True)
+
+        assert len(mailoutbox) == 5
+
+    def test_command(self, queued, mailoutbox):
+        """Test email_worker --drain empties the outbox"""
+        call_command('email_worker', '--drain')
+
+        assert len(mailoutbox) == 5
+
+
+@pytest.mark.django_db
+class TestSMTPDelivery:
+    def test_one_session_for_all_batches(self, queued):
+        """Test delivery to a local SMTP server uses a single session"""
+        pytest.importorskip('aiosmtpd')
+        from aiosmtpd.controller import Controller
+        from django.core.mail.backends.smtp import EmailBackend
+
+        class Recorder:
+            def __init__(self):
+                self.sessions = 0
+                self.recipients = []
+
+            async def handle_EHLO(self, server, session, envelope, hostname, responses):
+                self.sessions += 1
+                session.host_name = hostname
+                return responses
+
+            async def handle_DATA(self, server, session, envelope):
+                self.recipients += envelope.rcpt_tos
+                return '250 OK'
+
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        handler = Recorder()
+        controller = Controller(handler, hostname='127.0.0.1', port=port)
+        controller.start()
+        try:
+            backend = EmailBackend(host='127.0.0.1', port=port, use_tls=False, username='', password='')
+            outbox.run(batch_size=2, drain=True, connection=backend)
+        finally:
+            controller.stop()
+
+        assert sorted(handler.recipients) == sorted(email.to for email in queued)
+        assert handler.sessions == 1
+        assert not EmailOutbox.objects.exists()
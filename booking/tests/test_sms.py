@@ -0,0 +1,183 @@
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from django.utils import timezone
+from booking import otp, sms
+from booking.models import SMSMessage
+from booking.sms_stub import StubSMSServer
+
+
+def deliver(stub=None, **options):
+    """Run the worker against a fresh stub gateway until nothing is due."""
+    stub = stub or StubSMSServer()
+
+    async def scenario():
+        await stub.start()
+        try:
+            await sms.run(sms.HTTPGateway(url=stub.url, token='secret'), drain=True, **options)
+        finally:
+            await stub.close()
+        return stub
+
+    return async_to_sync(scenario)()
+
+
+@pytest.fixture
+def queued(db):
+    return [sms.enqueue(f"55500000{i:02}", f"Message {i}") for i in range(7)]
+
+
+@pytest.mark.django_db
+class TestEnqueue:
+    def test_login_form_queues_code(self, client):
+        """Test the login form queues the OTP text instead of sending it inline"""
+        client.post(reverse('Booking:send_otp'), {'phone': "5551112222"})
+
+        message = SMSMessage.objects.get()
+        assert message.phone == "5551112222"
+        assert message.status == SMSMessage.PENDING
+        assert "login code" in message.body
+
+    def test_api_queues_code(self, api_client):
+        """Test the API queues the same code it issued"""
+        response = api_client.post(reverse('request-otp'), {'phone': "5551112222"}, format='json')
+
+        code, _ = otp.get_store().latest("5551112222")
+        assert code in SMSMessage.objects.get().body
+        assert 'otp' not in response.data
+
+
+@pytest.mark.django_db
+class TestWorker:
+    def test_delivers_batches_over_one_connection(self, queued):
+        """Test every message is sent in batches reusing a single connection, then removed"""
+        stub = deliver(batch_size=3, concurrency=1)
+
+        assert sorted(message['to'] for message in stub.received) == sorted(message.phone for message in queued)
+        assert stub.requests == 3
+        assert stub.connections == 1
+        assert not SMSMessage.objects.exists()
+
+    def test_concurrent_consumers(self, queued):
+        """Test several consumers share the queue without sending a message twice"""
+        stub = deliver(batch_size=2, concurrency=3)
+
+        assert len(stub.received) == len(queued)
+        assert not SMSMessage.objects.exists()
+
+    def test_failed_messages_back_off(self, queued):
+        """Test messages the gateway rejects are rescheduled with backoff"""
+        deliver(StubSMSServer(fail_rate=1.0))
+
+        message = SMSMessage.objects.get(pk=queued[0].pk)
+        assert message.status == SMSMessage.PENDING
+        assert message.attempts == 1
+        assert message.last_error == 'carrier unavailable'
+        assert message.next_attempt_at > timezone.now()
+
+    def test_server_errors_retry_the_batch(self, queued):
+        """Test a 503 leaves the whole batch queued for retry"""
+        deliver(StubSMSServer(status=503))
+
+        assert set(SMSMessage.objects.values_list('attempts', 'last_error')) == {(1, 'HTTP 503')}
+
+    def test_client_errors_fail_permanently(self, queued):
+        """Test a rejected batch is not retried"""
+        deliver(StubSMSServer(status=400))
+
+        assert set(SMSMessage.objects.values_list('status', flat=True)) == {SMSMessage.FAILED}
+
+    def test_gives_up_after_max_attempts(self, queued, settings):
+        """Test a message that keeps failing ends up failed"""
+        settings.SMS_MAX_ATTEMPTS = 2
+        SMSMessage.objects.update(attempts=1)
+
+        deliver(StubSMSServer(fail_rate=1.0))
+
+        assert set(SMSMessage.objects.values_list('status', 'attempts')) == {(SMSMessage.FAILED, 2)}
+
+    def test_failed_messages_lose_their_body(self, queued):
+        """Test a dead message no longer holds the text, which may carry a login code"""
+        deliver(StubSMSServer(status=400))
+
+        assert set(SMSMessage.objects.values_list('body', flat=True)) == {''}
+
+    def test_unreachable_gateway(self, queued):
+        """Test connection errors are retried rather than raised"""
+        async def scenario():
+            await sms.run(sms.HTTPGateway(url='http://127.0.0.1:9/messages', timeout=1), drain=True)
+
+        async_to_sync(scenario)()
+
+        assert set(SMSMessage.objects.values_list('status', 'attempts')) == {(SMSMessage.PENDING, 1)}
+
+
+@pytest.mark.django_db
+class TestClaims:
+    def test_claimed_messages_are_leased(self, queued):
+        """Test a claimed message is not handed out again while its lease lasts"""
+        first = sms.claim(5)
+        second = sms.claim(5)
+
+        assert len(first) == 5
+        assert {message.id for message in first}.isdisjoint(message.id for message in second)
+        assert sms.claim(5) == []
+
+    def test_lapsed_claims_are_reclaimed(self, queued):
+        """Test messages of a worker that died are sent again once the lease lapses"""
+        sms.claim(7)
+        SMSMessage.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+        assert len(sms.claim(10)) == 7
+
+    def test_expired_messages_are_dropped(self, db):
+        """Test a login code still queued after it expired is deleted instead of sent"""
+        stale = sms.send_otp("5550000001", "123456")
+        fresh = sms.send_otp("5550000002", "654321")
+        SMSMessage.objects.filter(pk=stale.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        assert [message.id for message in sms.claim(10)] == [fresh.id]
+        assert list(SMSMessage.objects.values_list('pk', flat=True)) == [fresh.id]
+
+    def test_expired_batch_does_not_end_the_queue(self, queued):
+        """Test a batch made only of expired messages still reaches the live ones behind it"""
+        SMSMessage.objects.filter(pk__in=[message.pk for message in queued[:3]]).update(
+            expires_at=timezone.now() - timedelta(seconds=1), next_attempt_at=timezone.now() - timedelta(minutes=1),
+        )
+
+        assert len(sms.claim(3)) == 3
+        assert SMSMessage.objects.count() == 4
+
+    def test_backoff_grows_and_caps(self, settings):
+        """Test retry delays double up to the cap"""
+        settings.SMS_RETRY_BACKOFF = 2
+
+        assert 1 <= sms.backoff(1) <= 2
+        assert 4 <= sms.backoff(3) <= 8
+        assert sms.backoff(30) <= sms.MAX_BACKOFF
+
+
+class TestHTTPConnection:
+    def test_chunked_response(self):
+        """Test chunked response bodies are reassembled"""
+        import asyncio
+
+        async def serve(reader, writer):
+            await reader.readuntil(b'\r\n\r\n')
+            writer.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n4\r\nabcd\r\n2\r\nef\r\n0\r\n\r\n')
+            await writer.drain()
+            writer.close()
+
+        async def scenario():
+            server = await asyncio.start_server(serve, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            connection = sms.HTTPConnection(f'http://127.0.0.1:{port}/', timeout=5)
+            try:
+                return await connection.request('POST', '/', b'{}', {})
+            finally:
+                await connection.close()
+                server.close()
+
+        assert async_to_sync(scenario)() == (200, b'abcdef')
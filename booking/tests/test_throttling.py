@@ -0,0 +1,123 @@
+import pytest
+from django.urls import reverse
+from booking.models import GymUser
+from booking.throttling import TokenBucket, normalize_phone
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable bucket clock"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(TokenBucket, 'timer', lambda self: now[0])
+    return now
+
+
+@pytest.fixture
+def buckets(settings):
+    settings.OTP_THROTTLE_BUCKETS = {'phone': (2, 60), 'ip': (4, 10)}
+
+
+class TestTokenBucket:
+    def test_burst_then_reject(self, clock):
+        """Test a bucket allows its capacity at once and then asks to wait"""
+        bucket = TokenBucket('test', 3, 10)
+
+        assert [bucket.take('a') for _ in range(3)] == [0, 0, 0]
+        assert bucket.take('a') == pytest.approx(10)
+
+    def test_refills_over_time(self, clock):
+        """Test one token comes back per interval"""
+        bucket = TokenBucket('test', 2, 10)
+        bucket.take('a')
+        bucket.take('a')
+
+        clock[0] += 10
+        assert bucket.take('a') == 0
+        assert bucket.take('a') > 0
+
+    def test_rejections_do_not_drain(self, clock):
+        """Test rejected requests do not push the next token further away"""
+        bucket = TokenBucket('test', 1, 10)
+        bucket.take('a')
+        for _ in range(5):
+            bucket.take('a')
+
+        clock[0] += 10
+        assert bucket.take('a') == 0
+
+    def test_credit_is_capped(self, clock):
+        """Test a long idle period refills to capacity and no further"""
+        bucket = TokenBucket('test', 2, 10)
+        bucket.take('a')
+
+        clock[0] += 1000
+        assert [bucket.take('a') for _ in range(2)] == [0, 0]
+        assert bucket.take('a') > 0
+
+    def test_idents_are_separate(self, clock):
+        """Test each ident has its own bucket"""
+        bucket = TokenBucket('test', 1, 10)
+        bucket.take('a')
+
+        assert bucket.take('b') == 0
+
+    def test_normalize_phone(self):
+        """Test formatting variants of a number share one bucket"""
+        assert normalize_phone('+1 (555) 111-2222') == normalize_phone('15551112222') == '15551112222'
+
+
+@pytest.mark.django_db
+class TestOTPThrottling:
+    def test_api_phone_limit(self, api_client, buckets, clock):
+        """Test the API rejects a phone past its bucket with 429 and Retry-After"""
+        url = reverse('request-otp')
+        statuses = [api_client.post(url, {'phone': '555-111-2222'}, format='json').status_code for _ in range(2)]
+        response = api_client.post(url, {'phone': '5551112222'}, format='json')
+
+        assert statuses == [200, 200]
+        assert response.status_code == 429
+        assert int(response['Retry-After']) > 0
+
+    def test_api_ip_limit(self, api_client, buckets, clock):
+        """Test one client cannot spread requests over many phones"""
+        url = reverse('request-otp')
+        for i in range(4):
+            assert api_client.post(url, {'phone': f'555111000{i}'}, format='json').status_code == 200
+
+        assert api_client.post(url, {'phone': '5551110009'}, format='json').status_code == 429
+
+    def test_html_view_rejects_before_writing(self, client, buckets, clock):
+        """Test the login form stops at the bucket without creating a user"""
+        url = reverse('Booking:send_otp')
+        client.post(url, {'phone': '5551112222'})
+        client.post(url, {'phone': '5551112222'})
+        GymUser.objects.all().delete()
+
+        response = client.post(url, {'phone': '5551112222'})
+
+        assert response.status_code == 429
+        assert b'Too many OTP requests' in response.content
+        assert response['Retry-After'] == '60'
+        assert not GymUser.objects.exists()
+
+    def test_forwarded_for_is_not_trusted(self, api_client, buckets, clock):
+        """Test a spoofed X-Forwarded-For does not give the client a fresh IP bucket"""
+        url = reverse('request-otp')
+        for i in range(4):
+            api_client.post(url, {'phone': f'555111000{i}'}, format='json', HTTP_X_FORWARDED_FOR=f'10.0.0.{i}')
+
+        response = api_client.post(url, {'phone': '5551110009'}, format='json', HTTP_X_FORWARDED_FOR='10.0.0.99')
+
+        assert response.status_code == 429
+
+    def test_ip_rejection_spares_phone_bucket(self, api_client, buckets, clock):
+        """Test a request refused for its IP takes no token from the phone"""
+        url = reverse('request-otp')
+        for i in range(4):
+            api_client.post(url, {'phone': f'555111000{i}'}, format='json')
+        for _ in range(3):
+            assert api_client.post(url, {'phone': '5552223333'}, format='json').status_code == 429
+
+        other = api_client.post(url, {'phone': '5552223333'}, format='json', REMOTE_ADDR='10.0.0.2')
+
+        assert other.status_code == 200
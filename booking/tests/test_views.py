@@ -1,8 +1,12 @@
 import pytest
 from django.urls import reverse
+from booking import otp as otp_codes
 from booking.models import GymUser, OTP, Profile, Booking
+from gym.tests.factories import TestimonialFactory
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from booking.tests.factories import (
-    GymUserFactory, TrainerFactory, ProgramFactory, ProfileFactory
+    GymUserFactory, TrainerFactory, ProgramFactory, ProfileFactory, BookingFactory
 )
 
 
@@ -15,17 +19,17 @@ class TestSendOTPView:
         assert response.status_code == 200
         assert b'Login with Mobile' in response.content or b'mobile' in response.content.lower()
 
-    def test_post_send_otp_creates_user_and_otp(self, client):
-        """Test POST request creates user and OTP"""
+    def test_post_send_otp_creates_otp_only(self, client):
+        """Test POST request creates an OTP but no user before verification"""
         url = reverse('Booking:send_otp')
         phone = "1234567890"
         response = client.post(url, {'phone': phone})
         
-        # Check user created
-        assert GymUser.objects.filter(phone=phone).exists()
+        # No user until the number is verified
+        assert not GymUser.objects.filter(phone=phone).exists()
         
         # Check OTP created
-        assert OTP.objects.filter(phone=phone).exists()
+        assert otp_codes.get_store().latest(phone) is not None
         
         # Check session set
         assert client.session.get('otp_phone') == phone
@@ -45,7 +49,7 @@ class TestSendOTPView:
         assert GymUser.objects.count() == initial_count
         
         # Should create OTP
-        assert OTP.objects.filter(phone=gym_user.phone).exists()
+        assert otp_codes.get_store().latest(gym_user.phone) is not None
 
 
 @pytest.mark.django_db
@@ -60,7 +64,7 @@ class TestVerifyOTPView:
     def test_post_verify_otp_success(self, client, unverified_user):
         """Test successful OTP verification"""
         # Create OTP
-        otp = OTP.objects.create(phone=unverified_user.phone, otp="123456")
+        otp_codes.get_store().issue(unverified_user.phone, "123456")
         
         # Set session
         session = client.session
@@ -82,9 +86,22 @@ class TestVerifyOTPView:
         assert response.status_code == 302
         assert response.url == reverse('Booking:booking')
 
+    def test_post_verify_otp_creates_user(self, client):
+        """Test verifying a new number creates the verified member"""
+        phone = "5553334444"
+        client.post(reverse('Booking:send_otp'), {'phone': phone})
+        code = otp_codes.get_store().latest(phone)[0]
+
+        response = client.post(reverse('Booking:verify_otp'), {'otp': code})
+
+        user = GymUser.objects.get(phone=phone)
+        assert user.is_verified is True
+        assert client.session.get('user_id') == user.id
+        assert response.url == reverse('Booking:booking')
+
     def test_post_verify_otp_invalid(self, client, unverified_user):
         """Test invalid OTP"""
-        otp = OTP.objects.create(phone=unverified_user.phone, otp="123456")
+        otp_codes.get_store().issue(unverified_user.phone, "123456")
         
         session = client.session
         session['otp_phone'] = unverified_user.phone
@@ -101,11 +118,12 @@ class TestVerifyOTPView:
         unverified_user.refresh_from_db()
         assert unverified_user.is_verified is False
 
-    def test_post_verify_otp_expired(self, client, unverified_user):
+    def test_post_verify_otp_expired(self, client, unverified_user, settings):
         """Test expired OTP"""
         from django.utils import timezone
         from datetime import timedelta
-        
+
+        settings.OTP_STORE = 'booking.otp.DatabaseOTPStore'
         otp = OTP.objects.create(phone=unverified_user.phone, otp="123456")
         otp.created_at = timezone.now() - timedelta(minutes=6)
         otp.save()
@@ -261,7 +279,7 @@ class TestJWTAuthentication:
         """OTP verification returns both access and refresh tokens"""
         phone = "5551234567"
         GymUser.objects.create_user(phone=phone)
-        OTP.objects.create(phone=phone, otp="123456")
+        otp_codes.get_store().issue(phone, "123456")
 
         url = reverse('verify-otp')
         response = api_client.post(url, {
@@ -273,6 +291,20 @@ class TestJWTAuthentication:
         assert 'access' in response.data['tokens']
         assert 'refresh' in response.data['tokens']
 
+    def test_user_created_only_on_verification(self, api_client):
+        """Requesting an OTP writes no user; verifying it creates one"""
+        phone = "5557654321"
+        api_client.post(reverse('request-otp'), {"phone": phone}, format='json')
+        assert not GymUser.objects.filter(phone=phone).exists()
+
+        code, _ = otp_codes.get_store().latest(phone)
+        response = api_client.post(reverse('verify-otp'), {
+            "phone": phone, "otp": code
+        }, format='json')
+
+        assert response.status_code == 200
+        assert GymUser.objects.get(phone=phone).is_verified is True
+
     def test_protected_endpoint_with_valid_token(
         self, authenticated_api_client
     ):
@@ -300,7 +332,7 @@ class TestJWTAuthentication:
         """Refresh endpoint issues new access token"""
         phone = "5559876543"
         GymUser.objects.create_user(phone=phone)
-        OTP.objects.create(phone=phone, otp="654321")
+        otp_codes.get_store().issue(phone, "654321")
 
         # Get initial tokens
         token_response = api_client.post(
@@ -320,6 +352,35 @@ class TestJWTAuthentication:
         assert 'access' in response.data
 
 
+@pytest.mark.django_db
+class TestBookingAPI:
+    def list_queries(self, client):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('booking-list'))
+        assert response.status_code == 200
+        return len(queries)
+
+    def test_query_count_independent_of_bookings(self, authenticated_api_client, gym_user):
+        """Test nested programs, trainers and ratings add no queries per booking"""
+        BookingFactory(user=gym_user)
+        self.list_queries(authenticated_api_client)
+        one = self.list_queries(authenticated_api_client)
+
+        BookingFactory.create_batch(7, user=gym_user)
+
+        assert self.list_queries(authenticated_api_client) == one
+
+    def test_nested_program_includes_rating(self, authenticated_api_client, gym_user):
+        """Test the nested program still carries its testimonial rating"""
+        booking = BookingFactory(user=gym_user)
+        TestimonialFactory(program=booking.program.title, rating=4)
+
+        program = authenticated_api_client.get(reverse('booking-list')).json()['results'][0]['program_details']
+
+        assert program['rating']['count'] == 1
+        assert program['rating']['average'] == 4.0
+
+
 @pytest.mark.django_db
 class TestAdminUserBehavior:
     """Tests specific to superuser/admin behavior"""
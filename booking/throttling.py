@@ -0,0 +1,135 @@
+"""
+Token-bucket throttling for OTP issuance.
+
+Every phone number and every client IP has a bucket of
+``capacity`` tokens that refills by one token every ``interval``
+seconds (``settings.OTP_THROTTLE_BUCKETS``).  Each OTP request takes a
+token; with the bucket empty the request is rejected before any
+database write or SMS.
+
+Buckets live entirely in the cache as two entries, the time the bucket
+was last full and the tokens taken since.  Tokens are taken with an
+atomic ``incr``, so concurrent requests cannot overdraw a bucket.  An
+idle bucket simply expires once it would have refilled.
+
+``OTPPhoneThrottle`` and ``OTPIPThrottle`` are DRF throttle classes.
+``OTPThrottle`` checks the IP bucket before the phone bucket and stops at
+the first rejection, so a request refused for its IP costs the phone
+nothing; ``throttle_wait`` applies it to plain Django views.
+
+The client IP is DRF's ``get_ident()``, which trusts ``X-Forwarded-For``
+only as far as ``REST_FRAMEWORK['NUM_PROXIES']`` allows (``0`` unless the
+``NUM_PROXIES`` environment variable says otherwise), so a client cannot
+pick its own bucket by sending the header.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+
+def normalize_phone(phone):
+    """Digits of ``phone`` only, so formatting variants share one bucket."""
+    return ''.join(filter(str.isdigit, str(phone or '')))
+
+
+class TokenBucket:
+    key = 'booking:throttle:{}:{}:{}'
+    timer = time.time
+
+    def __init__(self, scope, capacity, interval):
+        self.scope = scope
+        self.capacity = capacity
+        self.interval = interval
+
+    def take(self, ident):
+        """Take one token for ``ident``; returns ``0`` or the seconds until one is available."""
+        now = self.timer()
+        start_key = self.key.format(self.scope, ident, 'start')
+        used_key = self.key.format(self.scope, ident, 'used')
+        # An empty bucket refills completely in capacity * interval seconds.
+        timeout = math.ceil(self.capacity * self.interval)
+        cache.add(start_key, now, timeout)
+        cache.add(used_key, 0, timeout)
+        try:
+            used = cache.incr(used_key)
+        except ValueError:
+            # Expired between add() and incr().
+            cache.set(used_key, 1, timeout)
+            used = 1
+        refilled = (now - cache.get(start_key, now)) / self.interval
+        if used > 1 and refilled >= used - 1:
+            # The bucket was full again before this request: start over from now.
+            cache.set_many({start_key: now, used_key: 1}, timeout)
+            return 0
+        if used > self.capacity + refilled:
+            # Rejected requests do not take a token.
+            cache.decr(used_key)
+            return (used - self.capacity - refilled) * self.interval
+        cache.touch(start_key, timeout)
+        cache.touch(used_key, timeout)
+        return 0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle drawing from the ``scope`` bucket of ``get_ident(request)``."""
+    scope = None
+
+    def get_bucket(self):
+        capacity, interval = settings.OTP_THROTTLE_BUCKETS[self.scope]
+        return TokenBucket(self.scope, capacity, interval)
+
+    def get_bucket_ident(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        ident = self.get_bucket_ident(request)
+        self.retry_after = self.get_bucket().take(ident) if ident else 0
+        return not self.retry_after
+
+    def wait(self):
+        return self.retry_after
+
+
+class OTPPhoneThrottle(TokenBucketThrottle):
+    scope = 'phone'
+
+    def get_bucket_ident(self, request):
+        data = getattr(request, 'data', request.POST)
+        return normalize_phone(data.get('phone'))
+
+
+class OTPIPThrottle(TokenBucketThrottle):
+    scope = 'ip'
+
+    def get_bucket_ident(self, request):
+        return self.get_ident(request)
+
+
+class OTPThrottle(BaseThrottle):
+    """Draws from ``throttle_classes`` in order, stopping at the first that rejects."""
+    throttle_classes = [OTPIPThrottle, OTPPhoneThrottle]
+
+    def allow_request(self, request, view):
+        self.retry_after = 0
+        for throttle in (cls() for cls in self.throttle_classes):
+            if not throttle.allow_request(request, view):
+                self.retry_after = throttle.wait()
+                return False
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+OTP_THROTTLES = [OTPThrottle]
+
+
+def throttle_wait(request, throttle_classes=OTP_THROTTLES):
+    """Seconds ``request`` must wait under ``throttle_classes``, or ``0`` if allowed."""
+    for throttle in (cls() for cls in throttle_classes):
+        if not throttle.allow_request(request, None):
+            return throttle.wait()
+    return 0
@@ -1,12 +1,12 @@
+import math
 from django.shortcuts import render, redirect
 from django.views.generic import View
 from django.contrib import messages
-from .models import GymUser, OTP, Booking, Profile
+from .models import GymUser, Booking, Profile
+from . import otp as otp_codes, outbox, sms
+from .throttling import throttle_wait
 from gym.models import Trainer, Program
-import random
-
-from django.conf import settings
-from django.core.mail import send_mail
+from django.db import transaction
 
 
 # otp send 
@@ -17,12 +17,18 @@ class SendOTPView(View):
     def post(self, request):
         phone = request.POST.get("phone")
 
-        user, _ = GymUser.objects.get_or_create(phone=phone)
-
-        otp = str(random.randint(100000, 999999))
-        OTP.objects.create(phone=phone, otp=otp)
+        wait = throttle_wait(request)
+        if wait:
+            response = render(
+                request, "booking/send_otp.html",
+                {"error": "Too many OTP requests. Please try again later."}, status=429,
+            )
+            response["Retry-After"] = math.ceil(wait)
+            return response
 
-        print(f"OTP for {phone}: {otp}")  # Demo only
+        # The member row is only created once the number is verified.
+        otp = otp_codes.issue(phone)
+        sms.send_otp(phone, otp)
 
         request.session["otp_phone"] = phone
         messages.success(request, "OTP sent successfully")
@@ -38,23 +44,25 @@ class VerifyOTPView(View):
         phone = request.session.get("otp_phone")
         entered_otp = request.POST.get("otp")
 
-        otp_obj = OTP.objects.filter(phone=phone).last()
+        result = otp_codes.check(phone, entered_otp)
 
-        if not otp_obj:
+        if result == otp_codes.MISSING:
             messages.error(request, "OTP not found")
             return redirect("Booking:send_otp")
 
-        if otp_obj.is_expired():
+        if result == otp_codes.EXPIRED:
             messages.error(request, "OTP expired. Please try again.")
             return redirect("Booking:send_otp")
 
-        if otp_obj.otp != entered_otp:
+        if result == otp_codes.EXHAUSTED:
+            messages.error(request, "Too many wrong codes. Please request a new OTP.")
+            return redirect("Booking:send_otp")
+
+        if result == otp_codes.INVALID:
             messages.error(request, "Invalid OTP")
             return redirect("Booking:verify_otp")
 
-        user = GymUser.objects.get(phone=phone)
-        user.is_verified = True
-        user.save()
+        user = GymUser.objects.verify_phone(phone)
 
         request.session["user_id"] = user.id
         del request.session["otp_phone"]
@@ -109,52 +117,37 @@ class BookingView(View):
             messages.error(request, "Please fill all required fields.")
             return redirect("Booking:booking")
 
-        # Update or create profile with name and email
-        profile, created = Profile.objects.get_or_create(user=user)
-        profile.name = name
-        profile.email = email
-        profile.save()
-
-        # Update user email
-        user.email = email
-        user.save()
-
         # Fetch program and trainer objects
         program = Program.objects.get(id=program_id)
         trainer = Trainer.objects.get(id=trainer_id) if trainer_id else None
 
-        # Create booking with snapshot data
-        booking = Booking.objects.create(
-            user=user,
-            user_name=name,
-            user_phone=user.phone,
-            program=program,
-            trainer=trainer,
-            preferred_date=date,
-            preferred_time=time,
-            message=message
-        )
+        # The confirmation email is committed together with the booking
+        # and sent by the outbox worker, never inline.
+        with transaction.atomic():
+            # Update or create profile with name and email
+            profile, created = Profile.objects.get_or_create(user=user)
+            profile.name = name
+            profile.email = email
+            profile.save()
+
+            # Update user email
+            user.email = email
+            user.save()
 
-        # Send confirmation email
-        if email:
-            try:
-                trainer_name = trainer.name if trainer else "our team"
-                send_mail(
-                    subject='FitZone - Booking Confirmation',
-                    message=f"""Dear {name},
-
-                    Your class booking for {program.title} with {trainer_name} on {date} ({time}) has been confirmed.
-
-                    See you at the gym!
-
-                    FitZone Team
-                    """,
-                    from_email='noreply@fitzone.com',
-                    recipient_list=[email],
-                    fail_silently=True,
-                )
-            except Exception as e:
-                print(f"Email not sent: {e}")
+            # Create booking with snapshot data
+            booking = Booking.objects.create(
+                user=user,
+                user_name=name,
+                user_phone=user.phone,
+                program=program,
+                trainer=trainer,
+                preferred_date=date,
+                preferred_time=time,
+                message=message
+            )
+
+            if email:
+                outbox.enqueue_booking_confirmation(booking, email)
 
         messages.success(request, "Your class has been booked successfully! Check your email for confirmation.")
         return redirect("gym:index")
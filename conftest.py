@@ -0,0 +1,32 @@
+# conftest.py
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog():
+    """Start every test with an empty cache and no catalog snapshots"""
+    from django.core.cache import cache
+    from gym import catalog, images
+    cache.clear()
+    catalog.clear()
+    images.clear()
+    yield
+    cache.clear()
+    catalog.clear()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """Store uploads and derivatives in a per-test directory"""
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture(autouse=True)
+def unhashed_staticfiles(settings):
+    """Render {% static %} without a collectstatic manifest"""
+    settings.STORAGES = {
+        **settings.STORAGES,
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
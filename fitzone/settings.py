@@ -97,6 +97,9 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
+    # Reverse proxies in front of the app; X-Forwarded-For is trusted only
+    # this many hops deep, so clients cannot choose their throttle bucket.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
 
 # JWT Settings
@@ -130,6 +133,55 @@ SPECTACULAR_SETTINGS = {
 
 
 
+# Cache
+# Catalog versions and snapshots are coordinated through this cache, so
+# production should point it at a backend shared by all workers.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'fitzone'),
+    }
+}
+
+# Cache backends private to each server process; `manage.py check` fails
+# when one is combined with several server workers
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Server worker processes (gunicorn.conf.py exports GUNICORN_WORKERS; runserver is one)
+SERVER_WORKERS = int(os.environ.get('GUNICORN_WORKERS', 1))
+
+# Where one-time login codes live: 'booking.otp.CacheOTPStore' expires them natively
+# but needs a cache shared by all server processes, so the default falls back to
+# 'booking.otp.DatabaseOTPStore' (OTP rows) while the cache is process-local
+OTP_STORE = os.environ.get('OTP_STORE', (
+    'booking.otp.DatabaseOTPStore' if CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHES
+    else 'booking.otp.CacheOTPStore'
+))
+# Guesses allowed per code before it is discarded
+OTP_MAX_ATTEMPTS = int(os.environ.get('OTP_MAX_ATTEMPTS', 5))
+
+# SMS delivery (booking.sms): gateway class and endpoint; run `manage.py sms_worker`
+SMS_GATEWAY = os.environ.get('SMS_GATEWAY', 'booking.sms.ConsoleGateway')
+SMS_GATEWAY_URL = os.environ.get('SMS_GATEWAY_URL', 'http://127.0.0.1:8099/messages')
+SMS_GATEWAY_TOKEN = os.environ.get('SMS_GATEWAY_TOKEN', '')
+# Attempts per message, seconds before the first retry (doubling), and how long a worker's claim lasts
+SMS_MAX_ATTEMPTS = int(os.environ.get('SMS_MAX_ATTEMPTS', 5))
+SMS_RETRY_BACKOFF = float(os.environ.get('SMS_RETRY_BACKOFF', 2))
+SMS_CLAIM_TIMEOUT = int(os.environ.get('SMS_CLAIM_TIMEOUT', 60))
+
+# OTP request token buckets: (burst capacity, seconds to refill one token)
+OTP_THROTTLE_BUCKETS = {
+    'phone': (3, 120),
+    'ip': (10, 30),
+}
+
+# Seconds an anonymous gym page stays in the shared page cache
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', 60 * 10))
+
+
 ROOT_URLCONF = 'fitzone.urls'
 
 TEMPLATES = [
@@ -223,6 +275,31 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
 
+STORAGES = {
+    # Uploads are named after their content hash so media URLs are immutable
+    'default': {'BACKEND': 'gym.storage.HashedMediaStorage'},
+    # Hashed, minified and precompressed at collectstatic time
+    'staticfiles': {'BACKEND': 'gym.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
+# Route MEDIA_URL to gym.media (format negotiation, immutable caching).  Turn off
+# only when the front web server serves MEDIA_ROOT itself
+MEDIA_SERVE = os.environ.get('MEDIA_SERVE', 'True') == 'True'
+# Hand media and static files to the front proxy instead of sending them from Python:
+# 'X-Accel-Redirect' (nginx) or 'X-Sendfile' (Apache, lighttpd).  Empty sends them
+# in-process, zero-copy through os.sendfile under gunicorn
+MEDIA_SENDFILE_HEADER = os.environ.get('MEDIA_SENDFILE_HEADER', '')
+# nginx `internal` location aliasing MEDIA_ROOT, used with X-Accel-Redirect
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+# nginx `internal` location aliasing STATIC_ROOT, used with X-Accel-Redirect for /static/
+STATIC_ACCEL_PREFIX = os.environ.get('STATIC_ACCEL_PREFIX', '/protected-static/')
+
+# Processes rendering thumb/card/hero image derivatives (0 = inline)
+IMAGE_DERIVATIVE_WORKERS = int(os.environ.get('IMAGE_DERIVATIVE_WORKERS', 2))
+
+# Admin changelists above this many rows show the planner's estimate instead of COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.environ.get('ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -236,3 +313,9 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.environ.get('EMAIL_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_PASS')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Email outbox (booking.outbox), drained by `manage.py email_worker`: attempts before
+# dead-lettering, seconds before the first retry (doubling), and how long a worker's claim lasts
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))
+EMAIL_OUTBOX_RETRY_BACKOFF = float(os.environ.get('EMAIL_OUTBOX_RETRY_BACKOFF', 30))
+EMAIL_OUTBOX_CLAIM_TIMEOUT = int(os.environ.get('EMAIL_OUTBOX_CLAIM_TIMEOUT', 300))
@@ -0,0 +1,51 @@
+"""
+Gunicorn settings for FitZone.
+
+Django's system checks run in ``on_starting``, so a configuration the
+workers cannot share (such as a per-process cache, see ``gym.checks``)
+stops the server before it starts.  Each worker is warmed in
+``post_fork`` (see ``gym.warmup``) before it accepts its first
+connection.  Set ``GUNICORN_WARMUP=0`` to skip.
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+
+
+def on_starting(server):
+    # Tell the Django settings (SERVER_WORKERS) how many workers there are,
+    # including any --workers given on the command line.
+    os.environ['GUNICORN_WORKERS'] = str(server.cfg.workers)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fitzone.settings')
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+
+    # Raises SystemCheckError, which aborts startup, on any error.
+    call_command('check')
+
+
+def post_fork(server, worker):
+    if os.environ.get('GUNICORN_WARMUP', '1') == '0':
+        return
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fitzone.settings')
+    import django
+    django.setup()
+
+    from django.db import connections
+
+    from gym import warmup
+
+    try:
+        report = warmup.run(on_step=lambda name: worker.notify())
+    except Exception:
+        server.log.exception("Warmup of worker %s failed", worker.pid)
+    else:
+        server.log.info(
+            "Worker %s warmed in %.2fs", worker.pid, sum(seconds for _, seconds in report.values())
+        )
+    finally:
+        # Requests open their own connections; do not carry the warmup ones over.
+        connections.close_all()
@@ -0,0 +1,56 @@
+"""
+Conditional GET for the read-only catalog endpoints.
+
+The validators come from the catalog versions and modification times
+kept in the cache, so a client that already holds the current page is
+answered with 304 before the list query or the serializer runs.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from gym import catalog
+
+
+class ConditionalGetMixin:
+    """Add strong ``ETag`` and ``Last-Modified`` validators to list and retrieve."""
+
+    def get_catalog_models(self):
+        return catalog.dependencies(self.queryset.model)
+
+    def get_etag(self, request):
+        versions = catalog.get_versions(*self.get_catalog_models())
+        # The representation also depends on the query string (page,
+        # search, ordering) and on which renderer the client negotiated.
+        key = '|'.join([
+            self.basename,
+            self.action,
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+            ','.join(map(str, versions)),
+        ])
+        return quote_etag(hashlib.sha256(key.encode()).hexdigest()[:32])
+
+    def get_last_modified(self):
+        return catalog.get_last_modified(*self.get_catalog_models())
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        last_modified = self.get_last_modified()
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,39 @@
+from django.db.models import Case, CharField, IntegerField, Value, When
+from rest_framework import filters
+
+from gym import search
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    ``?search=`` backed by the gym full-text index.
+
+    Matches are ranked best first and annotated with ``search_snippet``
+    (escaped HTML with ``<mark>`` around matches).  Only the
+    ``max_results`` best matches are returned, however many rows match;
+    the API docs say so through ``search_description``.  Falls back to
+    ``SearchFilter``'s ``icontains`` lookups on databases without a
+    full-text backend.
+    """
+    max_results = 200
+    search_description = f'A search term. Only the {max_results} best matches are returned.'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        hits = search.search(queryset.model, query, limit=self.max_results)
+        if hits is None:
+            return super().filter_queryset(request, queryset, view)
+        if not hits:
+            return queryset.none()
+        return queryset.filter(pk__in=[pk for pk, _ in hits]).annotate(
+            search_rank=Case(
+                *[When(pk=pk, then=Value(rank)) for rank, (pk, _) in enumerate(hits)],
+                output_field=IntegerField(),
+            ),
+            search_snippet=Case(
+                *[When(pk=pk, then=Value(snippet)) for pk, snippet in hits],
+                output_field=CharField(),
+            ),
+        ).order_by('search_rank')
@@ -0,0 +1,73 @@
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from gym import keyset
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite keyset.
+
+    Unlike DRF's ``CursorPagination``, which positions on the first
+    ordering field and walks ties with an offset, the cursor here holds
+    every ordering value plus the primary key, so low-cardinality orderings
+    such as ``-rating`` stay constant-cost.  The view's ``ordering`` is
+    used when it defines one.  That ordering is fixed, since each needs
+    its own index: an ``?ordering=`` parameter is rejected with a 400
+    rather than silently ignored.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    ordering = ('-pk',)
+
+    def get_ordering(self, view):
+        return keyset.with_tiebreaker(getattr(view, 'ordering', None) or self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if api_settings.ORDERING_PARAM in request.query_params:
+            raise ValidationError({api_settings.ORDERING_PARAM: ['This list has a fixed order.']})
+        ordering = self.get_ordering(view)
+        cursor = request.query_params.get(self.cursor_query_param)
+        position = None
+        if cursor:
+            try:
+                position = keyset.decode_cursor(cursor, queryset.model, ordering)
+            except ValueError:
+                raise NotFound('Invalid cursor')
+        rows, self.next_position = keyset.page(queryset, ordering, position, self.page_size)
+        return rows
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, keyset.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'The pagination cursor value.',
+            'schema': {'type': 'string'},
+        }]
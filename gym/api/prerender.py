@@ -0,0 +1,53 @@
+"""
+Pre-rendered JSON for the read-only catalog list endpoints.
+
+The first request for a given endpoint, query string and catalog version
+runs the normal queryset -> serializer -> renderer pipeline and keeps the
+resulting bytes in the cache.  Later requests write those bytes straight
+into the response.  Because the catalog versions are part of the key,
+any change to the underlying rows makes the next request regenerate them.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+from gym import catalog
+
+PRERENDERED_KEY = 'gym:api:list:{}'
+
+
+class PrerenderedListMixin:
+    """Serve JSON list pages from bytes rendered once per catalog version."""
+
+    def get_prerendered_key(self, request):
+        versions = catalog.get_versions(*catalog.dependencies(self.queryset.model))
+        # Pagination links are absolute, so scheme and host are part of the key.
+        params = sorted(request.query_params.lists())
+        key = repr((
+            self.basename, request.build_absolute_uri(request.path), params,
+            request.accepted_media_type, versions,
+        ))
+        return PRERENDERED_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+    def list(self, request, *args, **kwargs):
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return super().list(request, *args, **kwargs)
+        key = self.get_prerendered_key(request)
+        entry = cache.get(key)
+        if entry is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            content = request.accepted_renderer.render(
+                response.data, request.accepted_media_type, self.get_renderer_context()
+            )
+            entry = (request.accepted_media_type, content)
+            cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+        content_type, content = entry
+        response = HttpResponse(content, content_type=content_type)
+        patch_vary_headers(response, ['Accept'])
+        return response
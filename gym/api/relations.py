@@ -0,0 +1,59 @@
+"""
+Derive select_related / prefetch_related plans from serializer fields.
+
+A viewset that mixes in ``RelationPlanMixin`` never lists its joins by
+hand: the serializer already says which relations get rendered, so the
+plan is read from its fields once per serializer class and applied to
+every queryset the viewset builds.
+"""
+from functools import lru_cache
+
+from rest_framework import serializers
+
+
+def _walk(serializer, prefix, select, prefetch, in_prefetch):
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        path = prefix + field.source.replace('.', '__')
+        if isinstance(field, serializers.ListSerializer):
+            prefetch.append(path)
+            _walk(field.child, path + '__', select, prefetch, True)
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch.append(path)
+        elif isinstance(field, serializers.BaseSerializer):
+            (prefetch if in_prefetch else select).append(path)
+            _walk(field, path + '__', select, prefetch, in_prefetch)
+        elif isinstance(field, serializers.RelatedField) and not isinstance(field, serializers.PrimaryKeyRelatedField):
+            # Primary keys are read from the local ``<name>_id`` column.
+            (prefetch if in_prefetch else select).append(path)
+        elif '__' in path[len(prefix):]:
+            # Dotted source such as ``program.title`` crosses a relation.
+            (prefetch if in_prefetch else select).append(path.rsplit('__', 1)[0])
+
+
+@lru_cache(maxsize=None)
+def relation_plan(serializer_class):
+    """Return ``(select_related, prefetch_related)`` lookups for ``serializer_class``."""
+    select, prefetch = [], []
+    _walk(serializer_class(), '', select, prefetch, False)
+    return tuple(dict.fromkeys(select)), tuple(dict.fromkeys(prefetch))
+
+
+class RelationPlanMixin:
+    """
+    Apply the serializer's relation plan to ``get_queryset``.
+
+    ``query_budget`` is the number of queries a list page may cost
+    regardless of page size; the test suite holds every endpoint to it.
+    """
+    query_budget = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select, prefetch = relation_plan(self.get_serializer_class())
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
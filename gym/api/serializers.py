@@ -1,44 +1,145 @@
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from gym import images, ratings
 from gym.models import (
     Slider, Program, Feature, Specialization,
     Trainer, Faq, Gallery, Testimonial
 )
 
 
+class ImageVariantsSerializer(serializers.Serializer):
+    thumb = serializers.URLField()
+    card = serializers.URLField()
+    hero = serializers.URLField()
+    srcset = serializers.CharField()
+
+
+class DerivativeImageField(serializers.ImageField):
+    """
+    Read-only image rendered as the URL of its ``variant`` derivative.
+
+    Until the derivatives are written the URL is the original upload's.
+    """
+
+    def __init__(self, variant='card', **kwargs):
+        kwargs['read_only'] = True
+        self.variant = variant
+        super().__init__(**kwargs)
+
+    def absolute(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return self.absolute(images.derivative_url(value.name, self.variant))
+
+
+@extend_schema_field(ImageVariantsSerializer(allow_null=True))
+class DerivativeVariantsField(DerivativeImageField):
+    """
+    Read-only image rendered as every derivative URL plus a ``srcset``.
+
+    Until the derivatives are written every URL is the original upload's
+    and ``srcset`` is empty.
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        urls = {variant: self.absolute(images.derivative_url(value.name, variant)) for variant in images.VARIANTS}
+        urls['srcset'] = ', '.join(
+            f'{urls[variant]} {width}w' for variant, width in images.VARIANTS.items()
+        ) if images.has_derivatives(value.name) else ''
+        return urls
+
+
 class FeatureSerializer(serializers.ModelSerializer):
     class Meta:
         model = Feature
         fields = ['id', 'title']
 
 
-class ProgramSerializer(serializers.ModelSerializer):
+class SearchSnippetMixin(serializers.Serializer):
+    """Highlighted match, present when the list was filtered with ?search="""
+    search_snippet = serializers.SerializerMethodField()
+
+    def get_search_snippet(self, obj):
+        return getattr(obj, 'search_snippet', None)
+
+
+class RatingSerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    average = serializers.FloatField()
+    histogram = serializers.DictField(child=serializers.IntegerField())
+
+
+class RatedProgramListSerializer(serializers.ListSerializer):
+    """Fetch the rating aggregates of a whole page of programs at once."""
+
+    def to_representation(self, data):
+        programs = list(data.all() if hasattr(data, 'all') else data)
+        self.child.ratings = ratings.for_programs(program.title for program in programs)
+        return super().to_representation(programs)
+
+
+class ProgramSerializer(SearchSnippetMixin, serializers.ModelSerializer):
     features = FeatureSerializer(many=True, read_only=True)
+    thumbnail = DerivativeImageField()
+    cover = DerivativeImageField(variant='hero')
+    image1 = DerivativeImageField()
+    image2 = DerivativeImageField()
+    thumbnail_variants = DerivativeVariantsField(source='thumbnail')
+    cover_variants = DerivativeVariantsField(source='cover')
+    image1_variants = DerivativeVariantsField(source='image1')
+    image2_variants = DerivativeVariantsField(source='image2')
+    rating = serializers.SerializerMethodField()
     
     class Meta:
         model = Program
         fields = [
             'id', 'title', 'description', 'features',
             'thumbnail', 'cover', 'image1', 'image2',
-            'duration', 'price'
+            'thumbnail_variants', 'cover_variants', 'image1_variants', 'image2_variants',
+            'duration', 'price', 'rating', 'search_snippet'
         ]
+        list_serializer_class = RatedProgramListSerializer
+
+    @extend_schema_field(RatingSerializer(allow_null=True))
+    def get_rating(self, obj):
+        """Testimonial rating summary from the materialised aggregates"""
+        found = getattr(self, 'ratings', None)
+        if found is None:
+            # Nested without a list serializer (e.g. in bookings): read the
+            # catalog snapshot rather than querying once per row.
+            rating = ratings.for_program(obj.title)
+        else:
+            rating = found.get(ratings.program_key(obj.title))
+        return RatingSerializer(rating).data if rating else None
 
 
-class TrainerSerializer(serializers.ModelSerializer):
+class TrainerSerializer(SearchSnippetMixin, serializers.ModelSerializer):
     certifications = serializers.StringRelatedField(many=True)
+    picture = DerivativeImageField()
+    picture_variants = DerivativeVariantsField(source='picture')
     
     class Meta:
         model = Trainer
         fields = [
-            'id', 'name', 'specialization', 'picture',
+            'id', 'name', 'specialization', 'picture', 'picture_variants',
             'bio', 'experience', 'certifications',
-            'twitter', 'facebook', 'instagram'
+            'twitter', 'facebook', 'instagram', 'search_snippet'
         ]
 
 
 class SliderSerializer(serializers.ModelSerializer):
+    image = DerivativeImageField(variant='hero')
+    image_variants = DerivativeVariantsField(source='image')
+
     class Meta:
         model = Slider
-        fields = ['id', 'caption', 'slogan', 'image']
+        fields = ['id', 'caption', 'slogan', 'image', 'image_variants']
 
 
 class FaqSerializer(serializers.ModelSerializer):
@@ -49,13 +150,24 @@ class FaqSerializer(serializers.ModelSerializer):
 
 class GallerySerializer(serializers.ModelSerializer):
     category_display = serializers.CharField(source='get_category_display', read_only=True)
+    image = DerivativeImageField()
+    image_variants = DerivativeVariantsField(source='image')
     
     class Meta:
         model = Gallery
-        fields = ['id', 'title', 'image', 'category', 'category_display']
+        fields = ['id', 'title', 'image', 'image_variants', 'category', 'category_display']
+
+
+class GalleryFacetSerializer(serializers.Serializer):
+    category = serializers.CharField()
+    label = serializers.CharField()
+    count = serializers.IntegerField()
 
 
 class TestimonialSerializer(serializers.ModelSerializer):
+    image = DerivativeImageField(variant='thumb')
+    image_variants = DerivativeVariantsField(source='image')
+
     class Meta:
         model = Testimonial
-        fields = ['id', 'name', 'program', 'testimonial', 'image', 'rating']
\ No newline at end of file
+        fields = ['id', 'name', 'program', 'testimonial', 'image', 'image_variants', 'rating']
\ No newline at end of file
@@ -1,52 +1,85 @@
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets, filters
+from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from gym import facets
 from gym.models import (
     Slider, Program, Trainer, Faq, Gallery, Testimonial
 )
+from .conditional import ConditionalGetMixin
+from .filters import FullTextSearchFilter
+from .pagination import KeysetPagination
+from .prerender import PrerenderedListMixin
+from .relations import RelationPlanMixin
 from .serializers import (
     SliderSerializer, ProgramSerializer, TrainerSerializer,
-    FaqSerializer, GallerySerializer, TestimonialSerializer
+    FaqSerializer, GallerySerializer, GalleryFacetSerializer, TestimonialSerializer
 )
 
 
-class SliderViewSet(viewsets.ReadOnlyModelViewSet):
+# Query budgets count the pagination COUNT(*) (keyset pages have none),
+# the page itself, one query per prefetched relation and any per-page
+# lookup the serializer batches (program ratings).
+
+class SliderViewSet(ConditionalGetMixin, PrerenderedListMixin, RelationPlanMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Slider.objects.all()
     serializer_class = SliderSerializer
     permission_classes = [AllowAny]
+    query_budget = 2
 
 
-class ProgramViewSet(viewsets.ReadOnlyModelViewSet):
+class ProgramViewSet(ConditionalGetMixin, PrerenderedListMixin, RelationPlanMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Program.objects.all()
     serializer_class = ProgramSerializer
     permission_classes = [AllowAny]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'description']
     ordering_fields = ['price', 'title']
+    query_budget = 4
 
 
-class TrainerViewSet(viewsets.ReadOnlyModelViewSet):
+class TrainerViewSet(ConditionalGetMixin, PrerenderedListMixin, RelationPlanMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Trainer.objects.all()
     serializer_class = TrainerSerializer
     permission_classes = [AllowAny]
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [FullTextSearchFilter]
     search_fields = ['name', 'specialization']
+    query_budget = 3
 
 
-class FaqViewSet(viewsets.ReadOnlyModelViewSet):
+class FaqViewSet(ConditionalGetMixin, PrerenderedListMixin, RelationPlanMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Faq.objects.all()
     serializer_class = FaqSerializer
     permission_classes = [AllowAny]
+    query_budget = 2
 
 
-class GalleryViewSet(viewsets.ReadOnlyModelViewSet):
+class GalleryViewSet(ConditionalGetMixin, PrerenderedListMixin, RelationPlanMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Gallery.objects.all()
     serializer_class = GallerySerializer
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend]
     filterset_fields = ['category']
+    ordering = ['-id']
+    query_budget = 1
+
+    @extend_schema(responses=GalleryFacetSerializer(many=True))
+    @action(detail=False, pagination_class=None, filter_backends=[])
+    def facets(self, request):
+        """Image count per category, read from the precomputed facet table."""
+        return self.conditional(
+            lambda request: Response(GalleryFacetSerializer(facets.category_counts(), many=True).data), request
+        )
 
 
-class TestimonialViewSet(viewsets.ReadOnlyModelViewSet):
+class TestimonialViewSet(ConditionalGetMixin, PrerenderedListMixin, RelationPlanMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Testimonial.objects.all()
     serializer_class = TestimonialSerializer
     permission_classes = [AllowAny]
-    ordering = ['-rating']
\ No newline at end of file
+    pagination_class = KeysetPagination
+    filter_backends = []
+    ordering = ['-rating', '-id']
+    query_budget = 1
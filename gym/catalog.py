@@ -0,0 +1,340 @@
+"""
+In-process snapshot of the marketing catalog.
+
+The gym tables (programs, trainers, sliders, FAQs, testimonials) change a
+few times a week but are read on every anonymous page view.  Each worker
+keeps an immutable copy of those rows and only goes back to the database
+when the catalog version of a table has moved.  The gallery can grow to
+tens of thousands of rows, so it is paged from the database instead and
+only its version is tracked (see ``DEPENDENCIES``).
+
+Versions live in the Django cache so every worker sees an edit made in
+the admin; ``gym.signals`` bumps them on save, delete and M2M changes.
+"""
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.db.models.fields.files import FieldFile
+
+from .models import (
+    Slider, Program, Feature, Specialization, Trainer, Faq, Gallery, GalleryFacet, Testimonial, ProgramRating,
+)
+
+VERSION_KEY = 'gym:catalog:version:{}'
+MODIFIED_KEY = 'gym:catalog:modified:{}'
+
+_MISSING = object()
+
+# Versions of the models read while a ``track()`` block is active.
+_tracked = ContextVar('gym_catalog_tracked', default=None)
+
+
+def _fresh_version():
+    # Millisecond clock instead of 1 so a version lost to cache eviction
+    # or a restart can never collide with one a worker already holds.
+    return int(time.time() * 1000)
+
+
+def version_key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def get_versions(*models):
+    """Return the current catalog version of each model, in order."""
+    keys = [version_key(model) for model in models]
+    found = cache.get_many(keys)
+    missing = {key: _fresh_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return tuple(found[key] for key in keys)
+
+
+def get_version(model):
+    return get_versions(model)[0]
+
+
+def bump_version(model):
+    """Mark every snapshot built from ``model`` as stale."""
+    key = version_key(model)
+    cache.set(MODIFIED_KEY.format(model._meta.label_lower), int(time.time()), timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _fresh_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def get_last_modified(*models):
+    """
+    Unix time of the latest change to any of ``models``, or ``None``.
+
+    Recorded by ``bump_version``; when the cache has lost it the value is
+    recovered once from ``MAX(updated_at)`` rather than reading any rows.
+    """
+    keys = {model: MODIFIED_KEY.format(model._meta.label_lower) for model in models}
+    found = cache.get_many(keys.values())
+    for model, key in keys.items():
+        if key not in found:
+            latest = model.objects.aggregate(latest=Max('updated_at'))['latest']
+            found[key] = int(latest.timestamp()) if latest else 0
+            cache.set(key, found[key], timeout=None)
+    return max(found.values(), default=0) or None
+
+
+class RowSet(tuple):
+    """Tuple of rows with the bits of the QuerySet API templates rely on."""
+
+    __slots__ = ()
+
+    def all(self):
+        return self
+
+    def count(self, value=_MISSING):
+        if value is _MISSING:
+            return len(self)
+        return super().count(value)
+
+    def exists(self):
+        return bool(self)
+
+    def first(self):
+        return self[0] if self else None
+
+
+class ImageRef:
+    """Stored name and public URL of an image, detached from its storage."""
+
+    __slots__ = ('name', 'url')
+
+    def __init__(self, name, url):
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'url', url)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ImageRef is immutable')
+
+    def __bool__(self):
+        return bool(self.name)
+
+    def __str__(self):
+        return self.name
+
+
+class Row:
+    """
+    Immutable, slot-only copy of a model instance.
+
+    Subclasses list the copied fields in ``__slots__``; ``related`` maps
+    many-to-many fields to the row class of their targets and ``sources``
+    renames attributes that are read from a method on the instance.
+    """
+
+    __slots__ = ('pk',)
+    model = None
+    related = {}
+    sources = {}
+
+    def __init__(self, **values):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_instance(cls, obj):
+        values = {'pk': obj.pk}
+        for name in cls.__slots__:
+            value = getattr(obj, cls.sources.get(name, name))
+            if name in cls.related:
+                value = RowSet(cls.related[name].from_instance(child) for child in value.all())
+            elif isinstance(value, FieldFile):
+                value = ImageRef(value.name or '', value.url if value else '')
+            elif callable(value):
+                value = value()
+            values[name] = value
+        return cls(**values)
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __eq__(self, other):
+        if isinstance(other, Row):
+            return self.model is other.model and self.pk == other.pk
+        if isinstance(other, self.model):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.model, self.pk))
+
+    def __repr__(self):
+        return f'<{type(self).__name__}: {self.pk}>'
+
+
+class FeatureRow(Row):
+    __slots__ = ('title',)
+    model = Feature
+
+
+class SpecializationRow(Row):
+    __slots__ = ('name',)
+    model = Specialization
+
+
+class SliderRow(Row):
+    __slots__ = ('caption', 'slogan', 'image')
+    model = Slider
+
+
+class ProgramRow(Row):
+    __slots__ = ('title', 'description', 'features', 'thumbnail', 'cover', 'image1', 'image2', 'duration', 'price')
+    model = Program
+    related = {'features': FeatureRow}
+
+
+class TrainerRow(Row):
+    __slots__ = (
+        'name', 'specialization', 'picture', 'bio', 'experience',
+        'certifications', 'twitter', 'facebook', 'instagram',
+    )
+    model = Trainer
+    related = {'certifications': SpecializationRow}
+
+
+class FaqRow(Row):
+    __slots__ = ('question', 'answer')
+    model = Faq
+
+
+class GalleryFacetRow(Row):
+    __slots__ = ('count',)
+    model = GalleryFacet
+
+
+class TestimonialRow(Row):
+    __slots__ = ('name', 'program', 'testimonial', 'image', 'rating')
+    model = Testimonial
+
+
+class ProgramRatingRow(Row):
+    __slots__ = ('count', 'total', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5')
+    model = ProgramRating
+
+
+# What each snapshot is built from: row class, queryset and the models
+# whose version must match for the snapshot to be current.
+SnapshotSpec = namedtuple('SnapshotSpec', ['row_class', 'queryset', 'depends_on'])
+
+SNAPSHOTS = {
+    Slider: SnapshotSpec(SliderRow, lambda: Slider.objects.order_by('pk'), (Slider,)),
+    # Programs are shown with their testimonial ratings (see gym.ratings).
+    Program: SnapshotSpec(
+        ProgramRow, lambda: Program.objects.prefetch_related('features').order_by('pk'),
+        (Program, Feature, Testimonial),
+    ),
+    Trainer: SnapshotSpec(
+        TrainerRow,
+        lambda: Trainer.objects.prefetch_related('certifications').order_by('pk'),
+        (Trainer, Specialization),
+    ),
+    Faq: SnapshotSpec(FaqRow, lambda: Faq.objects.order_by('pk'), (Faq,)),
+    # Maintained alongside every gallery write, so it follows the gallery version.
+    GalleryFacet: SnapshotSpec(GalleryFacetRow, lambda: GalleryFacet.objects.order_by('pk'), (Gallery,)),
+    Testimonial: SnapshotSpec(TestimonialRow, lambda: Testimonial.objects.order_by('pk'), (Testimonial,)),
+    # Maintained alongside every testimonial write, so it follows the testimonial version.
+    ProgramRating: SnapshotSpec(ProgramRatingRow, lambda: ProgramRating.objects.order_by('pk'), (Testimonial,)),
+}
+
+# What is shown for each model depends on: the snapshot dependencies,
+# plus models read from the database whose responses are still cached
+# against their version (ETags, pre-rendered lists, page fragments).
+DEPENDENCIES = {
+    **{model: spec.depends_on for model, spec in SNAPSHOTS.items()},
+    Gallery: (Gallery,),
+}
+
+Snapshot = namedtuple('Snapshot', ['versions', 'rows', 'by_pk'])
+
+_snapshots = {}
+_lock = threading.Lock()
+
+
+def _snapshot(model):
+    spec = SNAPSHOTS[model]
+    versions = get_versions(*spec.depends_on)
+    snapshot = _snapshots.get(model)
+    if snapshot is None or snapshot.versions != versions:
+        with _lock:
+            snapshot = _snapshots.get(model)
+            if snapshot is None or snapshot.versions != versions:
+                rows = RowSet(spec.row_class.from_instance(obj) for obj in spec.queryset())
+                snapshot = Snapshot(versions, rows, {row.pk: row for row in rows})
+                _snapshots[model] = snapshot
+    tracked = _tracked.get()
+    if tracked is not None:
+        tracked.update(zip(spec.depends_on, snapshot.versions))
+    return snapshot
+
+
+def dependencies(model):
+    """Models whose changes affect what is shown for ``model``."""
+    return DEPENDENCIES[model]
+
+
+def get_rows(model):
+    """All rows of ``model`` in primary-key order."""
+    return _snapshot(model).rows
+
+
+def get_row(model, pk):
+    """The row of ``model`` with primary key ``pk``, or ``None``."""
+    return _snapshot(model).by_pk.get(pk)
+
+
+def record(versions):
+    """Record an already known ``{model: version}`` map in the active ``track()`` block."""
+    tracked = _tracked.get()
+    if tracked is not None:
+        for model, version in versions.items():
+            # Keep the oldest version seen so the dependent entry errs on stale.
+            tracked.setdefault(model, version)
+
+
+def depend_on(*models):
+    """Record ``models`` in the active ``track()`` block without loading a snapshot."""
+    record(dict(zip(models, get_versions(*models))))
+
+
+@contextmanager
+def track():
+    """
+    Collect ``{model: version}`` for every snapshot read inside the block.
+
+    Blocks nest: whatever an inner block collects is also recorded in the
+    enclosing one.
+    """
+    versions = {}
+    token = _tracked.set(versions)
+    try:
+        yield versions
+    finally:
+        _tracked.reset(token)
+        record(versions)
+
+
+def clear():
+    """Drop every snapshot held by this worker."""
+    with _lock:
+        _snapshots.clear()
@@ -0,0 +1,32 @@
+"""
+System checks for the catalog caches.
+
+Catalog versions (``gym.catalog``), the anonymous page cache
+(``gym.pagecache``) and the pre-rendered API lists all coordinate through
+the default cache.  A process-local backend keeps a separate copy per
+process, so an edit made in one process never reaches the others and
+they serve stale pages until restarted.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in settings.PROCESS_LOCAL_CACHES:
+        return []
+    hint = "Set CACHE_BACKEND to a shared cache (Redis, Memcached or the database cache)."
+    if settings.SERVER_WORKERS > 1:
+        return [Error(
+            f"{backend} is private to each of the {settings.SERVER_WORKERS} server workers, "
+            "so catalog edits are only seen by the worker that made them.",
+            hint=hint, id='gym.E001',
+        )]
+    if not settings.DEBUG:
+        return [Warning(
+            f"{backend} is private to this process, so catalog changes made by "
+            "management commands such as import_catalog are not seen until a restart.",
+            hint=hint, id='gym.W001',
+        )]
+    return []
@@ -1,10 +1,16 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import catalog
 from .models import Program, Trainer
 
+
 def footer_content(request):
-    programs = Program.objects.all()[:4]
-    trainers = Trainer.objects.all()[:4]
+    # Lazy so pages that never render the footer never look at the
+    # catalog; once evaluated the rows come from the worker snapshot.
+    programs = SimpleLazyObject(lambda: catalog.RowSet(catalog.get_rows(Program)[:4]))
+    trainers = SimpleLazyObject(lambda: catalog.RowSet(catalog.get_rows(Trainer)[:4]))
     context = {
         'footer_programs': programs,
         'footer_trainers': trainers
     }
-    return context
\ No newline at end of file
+    return context
@@ -0,0 +1,54 @@
+"""
+Gallery category facet counts.
+
+``GalleryFacet`` holds one row per category with the number of images in
+it.  ``gym.signals`` adjusts the affected rows in the same transaction as
+every gallery save and delete, so reading the counts never needs a
+``GROUP BY`` over the gallery.  Readers go through the catalog snapshot,
+which follows the gallery version, so steady-state reads cost no query.
+``manage.py rebuild_gallery_facets`` recounts after bulk updates that
+bypass signals.
+"""
+from collections import namedtuple
+
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from . import catalog
+from .models import Gallery, GalleryFacet
+
+Facet = namedtuple('Facet', ['category', 'label', 'count'])
+
+
+def category_choices():
+    return Gallery._meta.get_field('category').choices
+
+
+def adjust(category, delta):
+    """Add ``delta`` to the count of ``category``."""
+    updated = GalleryFacet.objects.filter(category=category).update(count=Greatest(F('count') + delta, 0))
+    if not updated:
+        recount(category)
+
+
+def recount(category):
+    GalleryFacet.objects.update_or_create(
+        category=category, defaults={'count': Gallery.objects.filter(category=category).count()}
+    )
+
+
+def rebuild():
+    """Recount every category from scratch; returns ``{category: count}``."""
+    counts = {value: 0 for value, _ in category_choices()}
+    counts.update(Gallery.objects.order_by().values_list('category').annotate(Count('id')))
+    GalleryFacet.objects.exclude(category__in=counts).delete()
+    for category, count in counts.items():
+        GalleryFacet.objects.update_or_create(category=category, defaults={'count': count})
+    catalog.bump_version(Gallery)
+    return counts
+
+
+def category_counts():
+    """A ``Facet`` for every category choice, in choice order, empty ones included."""
+    stored = {row.pk: row.count for row in catalog.get_rows(GalleryFacet)}
+    return [Facet(value, label, stored.get(value, 0)) for value, label in category_choices()]
@@ -0,0 +1,204 @@
+"""
+Fixed-size derivatives of the catalog images.
+
+Every uploaded image gets a ``thumb``, ``card`` and ``hero`` rendition,
+each bounded by width and stored under
+``derivatives/<variant>/<original name without extension>.<ext>``.
+Each rendition is encoded as a JPEG fallback plus WebP, and AVIF where
+Pillow supports it.  Originals are stored under content-hash names (see
+``gym.storage``), so derivative URLs are content-addressed too and
+``gym.media`` can serve them as immutable, picking the smallest format
+the client accepts.
+
+They are produced after the upload commits, in a process pool sized by
+``settings.IMAGE_DERIVATIVE_WORKERS`` (``0`` renders inline), so encoding
+never runs on the request thread.  Once an image's derivatives are written
+the catalog version of its model is bumped, so pages, fragments and API
+responses cached with the original's URL are rebuilt.
+
+Templates use the ``variant`` and ``srcset`` filters from
+``gym_images``; serializers keep each image field a single URL with
+``DerivativeImageField`` and add a ``<field>_variants`` object with
+``DerivativeVariantsField``.  All point at
+the derivatives once they are written, and at the original upload until
+then (or for good, if generation failed), so a fresh upload never links
+to a file that does not exist yet.  Derivatives that exist are never
+rewritten, because they may already be cached as immutable.
+"""
+import functools
+import io
+import logging
+import posixpath
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import ImageField
+from PIL import Image, ImageOps, features
+
+from . import catalog
+
+logger = logging.getLogger(__name__)
+
+# variant -> maximum width in pixels, smallest first
+VARIANTS = {
+    'thumb': 160,
+    'card': 480,
+    'hero': 1600,
+}
+
+Encoding = namedtuple('Encoding', ['format', 'extension', 'content_type', 'options'])
+
+# The JPEG fallback is what URLs point at; it is written last so its
+# presence means the modern encodings are in place as well.
+FALLBACK = Encoding('JPEG', 'jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True})
+MODERN_ENCODINGS = [
+    encoding for encoding in [
+        Encoding('AVIF', 'avif', 'image/avif', {'quality': 60}),
+        Encoding('WEBP', 'webp', 'image/webp', {'quality': 80, 'method': 6}),
+    ]
+    if features.check(encoding.format.lower())
+]
+ENCODINGS = MODERN_ENCODINGS + [FALLBACK]
+
+_pool = None
+
+# Images whose derivatives are known to exist; they are never removed.
+_ready = set()
+
+
+def derivative_name(name, variant, extension=FALLBACK.extension):
+    stem = posixpath.splitext(name)[0]
+    return posixpath.join('derivatives', variant, f'{stem}.{extension}')
+
+
+def has_derivatives(name):
+    """Whether every derivative of the stored image ``name`` has been written."""
+    if name in _ready:
+        return True
+    # generate_derivatives writes the largest variant's fallback last.
+    if default_storage.exists(derivative_name(name, list(VARIANTS)[-1])):
+        _ready.add(name)
+        return True
+    return False
+
+
+def clear():
+    _ready.clear()
+
+
+def derivative_url(name, variant):
+    """URL of the ``variant`` derivative of ``name``, or of ``name`` itself until it exists."""
+    if not name:
+        return ''
+    if not has_derivatives(name):
+        return default_storage.url(name)
+    return default_storage.url(derivative_name(name, variant))
+
+
+def srcset(name):
+    """``srcset`` attribute value listing every derivative with its width."""
+    if not name or not has_derivatives(name):
+        return ''
+    return ', '.join(f'{derivative_url(name, variant)} {width}w' for variant, width in VARIANTS.items())
+
+
+def render_variant(image, width):
+    """Return ``image`` scaled down to at most ``width`` pixels wide, as RGB."""
+    image = ImageOps.exif_transpose(image)
+    if image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image.convert('RGBA'), mask=image.convert('RGBA').getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def encode(image, encoding):
+    buffer = io.BytesIO()
+    image.save(buffer, format=encoding.format, **encoding.options)
+    return buffer.getvalue()
+
+
+def generate_derivatives(name):
+    """Write any missing derivative of the stored image ``name``; returns whether any was."""
+    missing = {
+        variant: width for variant, width in VARIANTS.items()
+        if not default_storage.exists(derivative_name(name, variant))
+    }
+    if not missing:
+        return False
+    with default_storage.open(name, 'rb') as source:
+        original = Image.open(source)
+        original.load()
+    for variant, width in missing.items():
+        image = render_variant(original, width)
+        for encoding in ENCODINGS:
+            target = derivative_name(name, variant, encoding.extension)
+            # Names are content-addressed, so an existing file already holds this rendition.
+            if not default_storage.exists(target):
+                default_storage.save(target, ContentFile(encode(image, encoding)))
+    return True
+
+
+def _init_worker():
+    # Spawned (non-forked) workers start without a configured Django.
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_DERIVATIVE_WORKERS, initializer=_init_worker)
+    return _pool
+
+
+def _finished(model, future):
+    if future.exception() is not None:
+        logger.error("Image derivative generation failed", exc_info=future.exception())
+    elif future.result():
+        catalog.bump_version(model)
+
+
+def _submit(model, names):
+    if settings.IMAGE_DERIVATIVE_WORKERS:
+        for name in names:
+            _get_pool().submit(generate_derivatives, name).add_done_callback(functools.partial(_finished, model))
+        return
+    written = False
+    for name in names:
+        try:
+            written = generate_derivatives(name) or written
+        except Exception:
+            logger.exception("Image derivative generation failed for %s", name)
+    if written:
+        catalog.bump_version(model)
+
+
+def image_names(instance):
+    """Stored names of every non-empty image field on ``instance``."""
+    return [
+        getattr(instance, field.attname).name
+        for field in instance._meta.fields
+        if isinstance(field, ImageField) and getattr(instance, field.attname)
+    ]
+
+
+def schedule_names(model, names):
+    """Queue derivatives for the stored images ``names`` of ``model`` once the write commits."""
+    names = list(names)
+    if names:
+        transaction.on_commit(lambda: _submit(model, names))
+
+
+def schedule(instance):
+    """Queue derivatives for the images of ``instance`` once the write commits."""
+    schedule_names(type(instance), image_names(instance))
@@ -0,0 +1,245 @@
+"""
+Bulk catalog import from JSON Lines or CSV.
+
+Used by ``manage.py import_catalog``.  Every record names its ``type``
+(``program``, ``trainer`` or ``gallery``) and carries the model's fields.
+Image fields hold a path to the source file, relative to the import
+file's directory unless absolute.  The relation lists (``features`` of a
+program and ``certifications`` of a trainer) hold titles or names;
+related rows that do not exist yet are created.  In CSV files list
+values are separated by ``|``.
+
+Records are read lazily and handled in batches of ``batch_size`` per
+type, so memory stays flat whatever the file size:
+
+* the images of a batch are validated and stored by a thread pool
+  (the content-hashed media storage skips files it already has);
+* rows with an ``id`` are upserted with
+  ``bulk_create(update_conflicts=True)``, and rows without one are
+  inserted; explicit ids then reset the primary key sequence, as
+  ``loaddata`` does, so later inserts do not collide with them;
+* when a record lists its relation, the through-table rows of the batch
+  are replaced in bulk;
+* the search index is refreshed and the catalog versions are bumped.
+  Derivatives are queued for the image process pool once the batch
+  commits.
+
+``bulk_create`` sends no signals, so gallery facet counts are recounted
+once at the end.  A record that fails validation is skipped and
+reported with its line number; the rest of its batch is still imported.
+"""
+import csv
+import json
+from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import ImageField
+from PIL import Image
+
+from . import facets, images, search, signals
+from .models import Feature, Gallery, Program, Specialization, Trainer
+
+ImportSpec = namedtuple('ImportSpec', ['model', 'relation', 'related_model', 'related_field'])
+
+IMPORTABLE = {
+    'program': ImportSpec(Program, 'features', Feature, 'title'),
+    'trainer': ImportSpec(Trainer, 'certifications', Specialization, 'name'),
+    'gallery': ImportSpec(Gallery, None, None, None),
+}
+LIST_SEPARATOR = '|'
+
+RecordError = namedtuple('RecordError', ['line', 'message'])
+
+
+def read_jsonl(file):
+    for line, text in enumerate(file, 1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text)
+        except ValueError as exc:
+            yield line, RecordError(line, f"invalid JSON: {exc}")
+
+
+def read_csv(file):
+    relations = {spec.relation for spec in IMPORTABLE.values() if spec.relation}
+    # Line 1 is the header.
+    for line, row in enumerate(csv.DictReader(file), 2):
+        record = {}
+        for key, value in row.items():
+            if key in relations:
+                record[key] = [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()] if value else []
+            elif value != '':
+                record[key] = value
+        yield line, record
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def image_fields(model):
+    return [field for field in model._meta.fields if isinstance(field, ImageField)]
+
+
+class CatalogImporter:
+    def __init__(self, source_dir, batch_size=500, workers=4, default_type=None):
+        self.source_dir = Path(source_dir)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.default_type = default_type
+        self.counts = Counter()
+        self.errors = []
+        self._related_pks = {}
+
+    def run(self, records):
+        """Import ``(line, record)`` pairs; returns ``counts`` by type."""
+        batches = defaultdict(list)
+        with ThreadPoolExecutor(max_workers=self.workers) as self.pool:
+            for line, record in records:
+                if isinstance(record, RecordError):
+                    self.errors.append(record)
+                    continue
+                if not isinstance(record, dict):
+                    self.errors.append(RecordError(line, f"expected an object, got {type(record).__name__}"))
+                    continue
+                kind = record.pop('type', None) or self.default_type
+                if kind not in IMPORTABLE:
+                    self.errors.append(RecordError(line, f"unknown record type {kind!r}"))
+                    continue
+                batches[kind].append((line, record))
+                if len(batches[kind]) >= self.batch_size:
+                    self.flush(kind, batches.pop(kind))
+            for kind, batch in batches.items():
+                self.flush(kind, batch)
+        self.errors.sort()
+        if self.counts['gallery']:
+            facets.rebuild()
+        return self.counts
+
+    def store_images(self, model, record):
+        """Validate and store the images of ``record``; returns ``{field: stored name}``."""
+        stored = {}
+        for field in image_fields(model):
+            source = record.get(field.name)
+            if not source:
+                continue
+            path = Path(source) if Path(source).is_absolute() else self.source_dir / source
+            with open(path, 'rb') as f:
+                Image.open(f).verify()
+                f.seek(0)
+                stored[field.name] = default_storage.save(field.generate_filename(None, path.name), File(f))
+        return stored
+
+    def _store_images_safely(self, args):
+        try:
+            return self.store_images(*args)
+        except (OSError, SyntaxError) as exc:
+            # PIL reports unreadable images as SyntaxError or OSError subclasses.
+            return exc
+
+    def build(self, spec, record, stored):
+        values = {key: value for key, value in record.items() if key != spec.relation}
+        values.update(stored)
+        try:
+            obj = spec.model(**values)
+        except (TypeError, ValueError) as exc:
+            raise ValidationError(str(exc))
+        obj.clean_fields()
+        return obj
+
+    def flush(self, kind, batch):
+        spec = IMPORTABLE[kind]
+        stored_images = self.pool.map(self._store_images_safely, [(spec.model, record) for _, record in batch])
+        rows = []
+        for (line, record), stored in zip(batch, stored_images):
+            if isinstance(stored, Exception):
+                self.errors.append(RecordError(line, f"image: {stored}"))
+                continue
+            try:
+                obj = self.build(spec, record, stored)
+            except ValidationError as exc:
+                self.errors.append(RecordError(line, '; '.join(exc.messages)))
+                continue
+            fields = frozenset(record) - {'id', spec.relation}
+            rows.append((obj, fields, record.get(spec.relation) if spec.relation else None))
+        if not rows:
+            return
+
+        with transaction.atomic():
+            self.upsert(spec.model, rows)
+            if spec.relation:
+                self.replace_relations(spec, rows)
+            if spec.model in search.DOCUMENTS:
+                for obj, _, _ in rows:
+                    search.index(obj)
+            images.schedule_names(spec.model, [
+                getattr(obj, field.attname).name
+                for obj, _, _ in rows for field in image_fields(spec.model) if getattr(obj, field.attname)
+            ])
+            for model in filter(None, (spec.model, spec.related_model)):
+                signals.invalidate(model)
+        self.counts[kind] += len(rows)
+
+    def upsert(self, model, rows):
+        new = []
+        # Only the columns a record supplied are overwritten on conflict.
+        by_fields = defaultdict(list)
+        for obj, fields, _ in rows:
+            if obj.pk is None:
+                new.append(obj)
+            else:
+                by_fields[fields].append(obj)
+        if new:
+            model.objects.bulk_create(new)
+        for fields, objs in by_fields.items():
+            model.objects.bulk_create(
+                objs, update_conflicts=True, unique_fields=['id'], update_fields=sorted(fields | {'updated_at'}),
+            )
+        if by_fields:
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+                    cursor.execute(sql)
+
+    def related_pks(self, spec, values):
+        """``{value: pk}`` of ``spec.related_model`` rows, creating the missing ones."""
+        cache = self._related_pks.setdefault(spec.related_model, {})
+        missing = set(values) - set(cache)
+        if missing:
+            found = spec.related_model.objects.filter(**{f'{spec.related_field}__in': missing}).order_by('-pk')
+            cache.update(found.values_list(spec.related_field, 'pk'))
+            created = spec.related_model.objects.bulk_create(
+                spec.related_model(**{spec.related_field: value}) for value in sorted(missing - set(cache))
+            )
+            cache.update((getattr(obj, spec.related_field), obj.pk) for obj in created)
+        return {value: cache[value] for value in values}
+
+    def replace_relations(self, spec, rows):
+        descriptor = getattr(spec.model, spec.relation)
+        through = descriptor.through
+        source = f'{descriptor.field.m2m_field_name()}_id'
+        target = f'{descriptor.field.m2m_reverse_field_name()}_id'
+        listed = [(obj, values) for obj, _, values in rows if values is not None]
+        if not listed:
+            return
+        pks = self.related_pks(spec, {value for _, values in listed for value in values})
+        through.objects.filter(**{f'{source}__in': [obj.pk for obj, _ in listed]}).delete()
+        through.objects.bulk_create(
+            [through(**{source: obj.pk, target: pks[value]}) for obj, values in listed for value in dict.fromkeys(values)],
+            batch_size=self.batch_size,
+        )
+
+
+def import_file(path, format=None, **options):
+    """Import the JSONL or CSV file at ``path``; returns the ``CatalogImporter``."""
+    path = Path(path)
+    format = format or ('csv' if path.suffix.lower() == '.csv' else 'jsonl')
+    importer = CatalogImporter(options.pop('source_dir', None) or path.parent, **options)
+    with open(path, newline='', encoding='utf-8') as file:
+        importer.run(READERS[format](file))
+    return importer
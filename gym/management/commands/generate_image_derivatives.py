@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from gym import catalog, images
+from gym.signals import IMAGE_MODELS
+
+
+class Command(BaseCommand):
+    help = "Generate missing thumb/card/hero derivatives for every catalog image"
+
+    def handle(self, *args, **options):
+        count = 0
+        for model in IMAGE_MODELS:
+            written = False
+            for instance in model.objects.iterator():
+                for name in images.image_names(instance):
+                    try:
+                        written = images.generate_derivatives(name) or written
+                    except (OSError, ValueError) as exc:
+                        self.stderr.write(f"Skipped {name}: {exc}")
+                        continue
+                    count += 1
+            if written:
+                catalog.bump_version(model)
+        self.stdout.write(self.style.SUCCESS(f"Checked derivatives for {count} images"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gym import importer
+
+
+class Command(BaseCommand):
+    help = "Import programs, trainers and gallery images from a JSON Lines or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSON Lines (.jsonl) or CSV (.csv) file to import")
+        parser.add_argument(
+            '--format', choices=sorted(importer.READERS), help="File format; guessed from the extension by default",
+        )
+        parser.add_argument(
+            '--type', choices=sorted(importer.IMPORTABLE), help="Record type for records without a 'type' key",
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows written per database round trip")
+        parser.add_argument('--workers', type=int, default=4, help="Threads storing referenced images")
+        parser.add_argument(
+            '--media-source', help="Directory image paths are relative to; defaults to the file's directory",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            result = importer.import_file(
+                options['path'], format=options['format'], default_type=options['type'],
+                batch_size=options['batch_size'], workers=options['workers'], source_dir=options['media_source'],
+            )
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+        for error in result.errors:
+            self.stderr.write(f"line {error.line}: {error.message}")
+        summary = ', '.join(f"{count} {kind}" for kind, count in sorted(result.counts.items())) or "nothing"
+        self.stdout.write(self.style.SUCCESS(f"Imported {summary}; {len(result.errors)} records skipped"))
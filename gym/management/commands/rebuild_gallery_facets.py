@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from gym import facets
+
+
+class Command(BaseCommand):
+    help = "Recount the gallery category facets (after bulk updates that skip signals)"
+
+    def handle(self, *args, **options):
+        for category, count in facets.rebuild().items():
+            self.stdout.write(f"{category}: {count}")
+        self.stdout.write(self.style.SUCCESS("Gallery facets rebuilt"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from gym import ratings
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-program testimonial rating aggregates"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Testimonials fetched per database round trip")
+
+    def handle(self, *args, **options):
+        count = ratings.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ratings for {count} programs"))
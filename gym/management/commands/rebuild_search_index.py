@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from gym import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for programs and trainers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Rows fetched per database round trip")
+
+    def handle(self, *args, **options):
+        if search.get_backend() is None:
+            self.stdout.write(self.style.WARNING("This database has no full-text backend; nothing to do."))
+            return
+        for model in search.DOCUMENTS:
+            count = search.rebuild(model, chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f"Indexed {count} {model._meta.verbose_name_plural}"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from gym import warmup
+
+
+class Command(BaseCommand):
+    help = "Precompile templates, resolve URLs, prime the catalog and request every view once"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-requests', action='store_true', help="Do not issue synthetic requests")
+
+    def handle(self, *args, **options):
+        report = warmup.run(requests=not options['skip_requests'])
+
+        (compiled, failed), seconds = report['templates']
+        self.stdout.write(f"Compiled {len(compiled)} templates in {seconds:.2f}s")
+        for name in failed:
+            self.stdout.write(self.style.WARNING(f"  could not compile {name}"))
+        paths, seconds = report['urls']
+        self.stdout.write(f"Resolved {len(paths)} URLs in {seconds:.2f}s")
+        rows, seconds = report['catalog']
+        self.stdout.write(f"Loaded {rows} catalog rows in {seconds:.2f}s")
+        if 'requests' in report:
+            responses, seconds = report['requests']
+            self.stdout.write(f"Requested {len(responses)} views in {seconds:.2f}s")
+            for path, status in responses:
+                if status >= 500:
+                    self.stdout.write(self.style.ERROR(f"  {path} answered {status}"))
+        self.stdout.write(self.style.SUCCESS("Warmup complete"))
@@ -0,0 +1,210 @@
+"""
+Media file serving with format negotiation.
+
+A request for a derivative's JPEG URL is answered with the smallest
+stored encoding of the same rendition that the client explicitly lists
+in ``Accept`` (AVIF, WebP), falling back to the JPEG itself.  Derivatives
+and content-hashed originals never change under the same name, so they
+are sent with a one-year ``immutable`` cache lifetime.
+
+The file itself is handed to the front proxy when
+``settings.MEDIA_SENDFILE_HEADER`` is set (``X-Accel-Redirect`` for nginx,
+``X-Sendfile`` for Apache/lighttpd).  Otherwise it is sent from here as a
+``FileResponse`` over the open file descriptor, which gunicorn's
+``wsgi.file_wrapper`` passes to ``os.sendfile`` so the bytes never enter
+Python.  Single byte ranges and ``If-Modified-Since`` are honoured either
+way.
+
+``fitzone.urls`` routes ``MEDIA_URL`` here unless ``settings.MEDIA_SERVE``
+is off, for deployments whose web server serves ``MEDIA_ROOT`` directly
+(and so skips the negotiation and immutable caching above).
+"""
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import images
+from .storage import is_hashed_name
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+MUTABLE_MAX_AGE = 60 * 60
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def accepted_types(accept):
+    """Media types explicitly listed in an ``Accept`` header with ``q > 0``."""
+    types = set()
+    for item in accept.split(','):
+        media_type, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            types.add(media_type.lower())
+    return types
+
+
+def negotiate(path, accept, document_root):
+    """Path of the smallest accepted encoding of the derivative at ``path``."""
+    stem, extension = posixpath.splitext(path)
+    if extension.lstrip('.') != images.FALLBACK.extension:
+        return path
+    accepted = accepted_types(accept)
+    best, best_size = path, None
+    for encoding in images.ENCODINGS:
+        if encoding is not images.FALLBACK and encoding.content_type not in accepted:
+            continue
+        candidate = f'{stem}.{encoding.extension}'
+        try:
+            size = os.stat(os.path.join(document_root, candidate)).st_size
+        except OSError:
+            continue
+        if best_size is None or size < best_size:
+            best, best_size = candidate, size
+    return best
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) for a single-range ``Range`` header.
+
+    Returns ``None`` when the header is absent, malformed or asks for
+    several ranges (the whole file is sent instead) and raises
+    ``ValueError`` when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not size:
+        # An empty file has no byte to start a range at.
+        raise ValueError('Unsatisfiable range')
+    if not first:
+        suffix = int(last)
+        if not suffix:
+            raise ValueError('Unsatisfiable range')
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Unsatisfiable range')
+    return start, end
+
+
+class FileRange:
+    """
+    ``length`` bytes of ``file`` starting at its current position.
+
+    Exposes ``fileno()`` so WSGI servers with a sendfile-capable
+    ``wsgi.file_wrapper`` can send the range with ``os.sendfile``, bounded
+    by ``Content-Length``; other servers read it in blocks.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def send_file(request, path, document_root, accel_prefix):
+    """
+    Response for the file at ``path`` below ``document_root``.
+
+    ``accel_prefix`` is the nginx ``internal`` location aliasing
+    ``document_root``, used when the sendfile header is ``X-Accel-Redirect``.
+    """
+    fullpath = safe_join(document_root, path)
+    try:
+        statobj = os.stat(fullpath)
+    except OSError:
+        raise Http404('Media file not found')
+    if not stat.S_ISREG(statobj.st_mode):
+        raise Http404('Media file not found')
+    last_modified = http_date(statobj.st_mtime)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), statobj.st_mtime):
+        response = HttpResponseNotModified()
+        response['Last-Modified'] = last_modified
+        return response
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header:
+        # The proxy reads the file and deals with Range itself.
+        response = HttpResponse(content_type=content_type)
+        if header == 'X-Accel-Redirect':
+            response[header] = quote(accel_prefix.rstrip('/') + '/' + path)
+        else:
+            response[header] = fullpath
+    else:
+        size = statobj.st_size
+        range_header = request.META.get('HTTP_RANGE')
+        if request.META.get('HTTP_IF_RANGE', last_modified) != last_modified:
+            # The client's partial copy is stale; send the whole file.
+            range_header = None
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        file = open(fullpath, 'rb')
+        if byte_range is None:
+            response = FileResponse(file, content_type=content_type)
+        else:
+            start, end = byte_range
+            file.seek(start)
+            response = FileResponse(FileRange(file, end - start + 1), content_type=content_type, status=206)
+            response['Content-Length'] = end - start + 1
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Last-Modified'] = last_modified
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def is_derivative(path):
+    return path.startswith('derivatives/')
+
+
+def serve_media(request, path, document_root=None):
+    document_root = document_root or settings.MEDIA_ROOT
+    path = posixpath.normpath(path).lstrip('/')
+    if is_derivative(path):
+        path = negotiate(path, request.headers.get('Accept', ''), document_root)
+    response = send_file(request, path, document_root, settings.MEDIA_ACCEL_PREFIX)
+    if is_derivative(path) or is_hashed_name(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=MUTABLE_MAX_AGE)
+    if is_derivative(path):
+        patch_vary_headers(response, ['Accept'])
+    return response
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym', '0002_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gallery',
+            index=models.Index(fields=['category', 'id'], name='gallery_category_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['rating', 'id'], name='testimonial_rating_id_idx'),
+        ),
+    ]
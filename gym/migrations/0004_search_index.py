@@ -0,0 +1,64 @@
+from django.db import migrations
+
+# The DDL and upserts are copied from gym.search as it stood when this
+# migration was written, so later changes to that module cannot alter it.
+CREATE_SQL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS gym_search USING fts5("
+        "kind UNINDEXED, object_id UNINDEXED, title, body, tokenize='porter unicode61')",
+    ],
+    'postgresql': [
+        "CREATE TABLE IF NOT EXISTS gym_search ("
+        "kind varchar(20) NOT NULL, object_id bigint NOT NULL, title text NOT NULL, body text NOT NULL, "
+        "document tsvector NOT NULL, PRIMARY KEY (kind, object_id))",
+        "CREATE INDEX IF NOT EXISTS gym_search_document_idx ON gym_search USING GIN (document)",
+    ],
+}
+INSERT_SQL = {
+    'sqlite': "INSERT INTO gym_search (kind, object_id, title, body) VALUES (%s, %s, %s, %s)",
+    'postgresql': (
+        "INSERT INTO gym_search (kind, object_id, title, body, document) VALUES (%s, %s, %s, %s, "
+        "setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'B'))"
+    ),
+}
+DROP_SQL = "DROP TABLE IF EXISTS gym_search"
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in CREATE_SQL:
+        return
+    Program = apps.get_model('gym', 'Program')
+    Trainer = apps.get_model('gym', 'Trainer')
+    documents = [
+        ('program', program.pk, program.title, program.description) for program in Program.objects.all()
+    ] + [
+        ('trainer', trainer.pk, trainer.name, f'{trainer.specialization}\n{trainer.bio}')
+        for trainer in Trainer.objects.all()
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        for sql in CREATE_SQL[vendor]:
+            cursor.execute(sql)
+        for kind, object_id, title, body in documents:
+            params = [kind, object_id, title, body]
+            if vendor == 'postgresql':
+                params += [title, body]
+            cursor.execute(INSERT_SQL[vendor], params)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor not in CREATE_SQL:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_categories(apps, schema_editor):
+    Gallery = apps.get_model('gym', 'Gallery')
+    GalleryFacet = apps.get_model('gym', 'GalleryFacet')
+    counts = {value: 0 for value, _ in Gallery._meta.get_field('category').choices}
+    counts.update(Gallery.objects.order_by().values_list('category').annotate(Count('id')))
+    GalleryFacet.objects.bulk_create(GalleryFacet(category=category, count=count) for category, count in counts.items())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym', '0004_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GalleryFacet',
+            fields=[
+                ('category', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_categories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:01
+
+from django.db import migrations, models
+
+
+def aggregate_ratings(apps, schema_editor):
+    Testimonial = apps.get_model('gym', 'Testimonial')
+    ProgramRating = apps.get_model('gym', 'ProgramRating')
+    totals = {}
+    for program, rating in Testimonial.objects.values_list('program', 'rating').iterator(chunk_size=2000):
+        row = totals.setdefault((program or '').strip().lower(), ProgramRating(program=(program or '').strip().lower()))
+        row.count += 1
+        row.total += rating
+        if 1 <= rating <= 5:
+            setattr(row, f'stars_{rating}', getattr(row, f'stars_{rating}') + 1)
+    ProgramRating.objects.bulk_create(totals.values(), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym', '0005_gallery_facets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgramRating',
+            fields=[
+                ('program', models.CharField(max_length=120, primary_key=True, serialize=False)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(aggregate_ratings, migrations.RunPython.noop),
+    ]
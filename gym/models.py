@@ -5,6 +5,7 @@ class Slider(models.Model):
     caption = models.CharField(max_length=50)
     slogan = models.CharField(max_length=120)
     image = models.ImageField(upload_to='sliders/')
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.caption[:20]
@@ -22,18 +23,21 @@ class Program(models.Model):
     image2 = models.ImageField(upload_to='programs/', blank = True , null = True)
     duration = models.CharField(max_length=50, help_text="e.g., 3 months, 6 weeks")
     price = models.DecimalField(max_digits=8, decimal_places=2, null = True,blank = True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.title
     
 class Feature(models.Model):
     title = models.CharField(max_length=120)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.title
     
 class Specialization(models.Model):
     name = models.CharField(max_length=120)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.name
@@ -51,6 +55,7 @@ class Trainer(models.Model):
     twitter = models.CharField(max_length=120,blank = True,null = True)
     facebook = models.CharField(max_length=120,blank = True,null = True)
     instagram = models.CharField(max_length=120,blank = True,null = True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.name
@@ -58,6 +63,7 @@ class Trainer(models.Model):
 class Faq(models.Model):
     question = models.CharField(max_length=120)
     answer = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.question
@@ -71,12 +77,26 @@ class Gallery(models.Model):
         ('facility', 'Facility'),
         ('events', 'Events'),
     ], default='facility')
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.title
     
     class Meta:
         verbose_name_plural = "Galleries"
+        indexes = [
+            # Keyset pagination within a category, newest first
+            models.Index(fields=['category', 'id'], name='gallery_category_id_idx'),
+        ]
+
+
+class GalleryFacet(models.Model):
+    """Number of gallery images per category, kept current by ``gym.signals``."""
+    category = models.CharField(max_length=50, primary_key=True)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.category}: {self.count}"
 
 class Testimonial(models.Model):
     name = models.CharField(max_length=120)
@@ -84,7 +104,34 @@ class Testimonial(models.Model):
     testimonial = models.TextField()
     image = models.ImageField(upload_to="testimonials/")
     rating = models.IntegerField(choices=[(i, i) for i in range(1, 6)], default=5)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.name} - {self.program}"
+
+    class Meta:
+        indexes = [
+            # Keyset pagination ordered by rating, best first
+            models.Index(fields=['rating', 'id'], name='testimonial_rating_id_idx'),
+        ]
+
+
+class ProgramRating(models.Model):
+    """
+    Testimonial rating totals per program, kept current by ``gym.signals``.
+
+    ``Testimonial.program`` is free text, so rows are keyed on its
+    trimmed, lower-cased value (see ``gym.ratings.program_key``).
+    """
+    program = models.CharField(max_length=120, primary_key=True)
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.program}: {self.count}"
     
@@ -0,0 +1,90 @@
+"""
+Shared full-page cache for anonymous visitors of the marketing site.
+
+Every entry remembers which catalog models were read while the page was
+rendered, together with their versions at the time.  A hit is only
+served while all of those versions are unchanged, so editing a trainer
+retires the pages that show trainers and leaves the FAQ page alone.
+
+Requests from logged-in members or with pending flash messages never
+read from or write to the cache.
+"""
+import hashlib
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+from . import catalog
+
+PAGE_KEY = 'gym:page:{}'
+
+
+def page_key(request):
+    path = request.build_absolute_uri()
+    return PAGE_KEY.format(hashlib.sha256(path.encode()).hexdigest())
+
+
+def is_cacheable_request(request):
+    if request.method != 'GET':
+        return False
+    storage = getattr(request, '_messages', None)
+    if storage is not None and len(storage):
+        return False
+    if settings.SESSION_COOKIE_NAME in request.COOKIES and request.session.get('user_id'):
+        return False
+    return True
+
+
+def is_cacheable_response(request, response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    if 'private' in response.get('Cache-Control', '') or 'no-store' in response.get('Cache-Control', ''):
+        return False
+    # A page that emitted a CSRF token is tied to the visitor's cookie.
+    if request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+        return False
+    # Messages added while rendering belong to this visitor only.
+    storage = getattr(request, '_messages', None)
+    return storage is None or not len(storage)
+
+
+def get(request):
+    """Return the cached response for ``request`` if every dependency is current."""
+    entry = cache.get(page_key(request))
+    if entry is None:
+        return None
+    models = [apps.get_model(label) for label in entry['models']]
+    if catalog.get_versions(*models) != entry['versions']:
+        return None
+    return entry['response']
+
+
+def store(request, response, versions):
+    """Cache ``response`` with the ``{model: version}`` map it was rendered from."""
+    models = sorted(versions, key=lambda model: model._meta.label_lower)
+    cache.set(page_key(request), {
+        'models': [model._meta.label_lower for model in models],
+        'versions': tuple(versions[model] for model in models),
+        'response': response,
+    }, settings.PAGE_CACHE_TIMEOUT)
+
+
+class CachedPageMixin:
+    """Serve anonymous GETs of a catalog page from the shared page cache."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return super().dispatch(request, *args, **kwargs)
+        response = get(request)
+        if response is not None:
+            return response
+        with catalog.track() as versions:
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        patch_vary_headers(response, ['Cookie'])
+        if is_cacheable_response(request, response):
+            store(request, response, versions)
+        return response
@@ -0,0 +1,94 @@
+"""
+Materialised testimonial ratings per program.
+
+``ProgramRating`` holds, per program, the number of testimonials, the
+sum of their ratings and a 1-5 star histogram.  ``gym.signals`` applies
+each testimonial save and delete as a delta in the same transaction, so
+showing a program's average never aggregates the testimonial table.
+Pages read them through the catalog snapshot (which follows the
+testimonial version), making a lookup a dictionary hit; the API fetches
+the rows for a whole page by primary key in one query.
+
+``Testimonial.program`` is free text; it is matched to ``Program.title``
+after trimming and lower-casing.  ``manage.py rebuild_program_ratings``
+recomputes everything in one chunked pass over the testimonials.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, Greatest, Lower, Trim
+
+from . import catalog
+from .models import ProgramRating, Testimonial
+
+STARS = range(1, 6)
+
+Rating = namedtuple('Rating', ['count', 'average', 'histogram'])
+
+
+def program_key(name):
+    return (name or '').strip().lower()
+
+
+def adjust(program, rating, delta):
+    """Apply ``delta`` testimonials rated ``rating`` to ``program``."""
+    key = program_key(program)
+    changes = {
+        'count': Greatest(F('count') + delta, 0),
+        'total': Greatest(F('total') + delta * rating, 0),
+    }
+    if rating in STARS:
+        changes[f'stars_{rating}'] = Greatest(F(f'stars_{rating}') + delta, 0)
+    if not ProgramRating.objects.filter(program=key).update(**changes):
+        recount(key)
+
+
+def recount(key):
+    """Recompute the row for one program key from its testimonials."""
+    totals = (
+        Testimonial.objects.annotate(key=Lower(Trim('program'))).filter(key=key)
+        .aggregate(
+            count=Count('id'),
+            total=Coalesce(Sum('rating'), 0),
+            **{f'stars_{stars}': Count('id', filter=Q(rating=stars)) for stars in STARS},
+        )
+    )
+    ProgramRating.objects.update_or_create(program=key, defaults=totals)
+
+
+def rebuild(chunk_size=2000):
+    """Recompute every row in one pass over the testimonials; returns the program count."""
+    totals = {}
+    testimonials = Testimonial.objects.order_by().values_list('program', 'rating')
+    for program, rating in testimonials.iterator(chunk_size=chunk_size):
+        row = totals.setdefault(program_key(program), {'count': 0, 'total': 0, **{f'stars_{s}': 0 for s in STARS}})
+        row['count'] += 1
+        row['total'] += rating
+        if rating in STARS:
+            row[f'stars_{rating}'] += 1
+    with transaction.atomic():
+        ProgramRating.objects.all().delete()
+        ProgramRating.objects.bulk_create(
+            (ProgramRating(program=key, **row) for key, row in totals.items()), batch_size=chunk_size
+        )
+    catalog.bump_version(Testimonial)
+    return len(totals)
+
+
+def summarize(row):
+    if row is None or not row.count:
+        return None
+    histogram = {stars: getattr(row, f'stars_{stars}') for stars in STARS}
+    return Rating(row.count, round(row.total / row.count, 1), histogram)
+
+
+def for_program(title):
+    """``Rating`` for the program called ``title``, or ``None`` without testimonials."""
+    return summarize(catalog.get_row(ProgramRating, program_key(title)))
+
+
+def for_programs(titles):
+    """``{program key: Rating}`` for ``titles``, fetched by primary key in one query."""
+    rows = ProgramRating.objects.filter(program__in={program_key(title) for title in titles})
+    return {row.program: summarize(row) for row in rows}
@@ -0,0 +1,173 @@
+"""
+Full-text search over programs and trainers.
+
+Documents live in a separate ``gym_search`` index table: an FTS5 virtual
+table on SQLite and a ``tsvector`` column with a GIN index on PostgreSQL.
+``gym.signals`` keeps it current row by row as programs and trainers are
+saved or deleted, and ``manage.py rebuild_search_index`` refills it from
+scratch.  Every query term is prefix-matched, results come back ranked
+(title hits weigh more than body hits) with a highlighted snippet: the
+database marks matches with private-use characters, and ``highlight``
+escapes the text before turning those into ``<mark>`` tags.
+
+On any other database ``get_backend()`` returns ``None`` and callers fall
+back to plain ``icontains`` filtering.
+"""
+import re
+
+from django.db import connection
+from django.utils.html import escape
+
+from .models import Program, Trainer
+
+INDEX_TABLE = 'gym_search'
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+# Around matches in the raw snippet; never HTML, so escaping leaves them alone
+MATCH_START = '\ue000'
+MATCH_STOP = '\ue001'
+MAX_TERMS = 8
+
+
+def query_terms(query):
+    """Split a user query into at most ``MAX_TERMS`` lower-case word tokens."""
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+class SQLiteBackend:
+    create_sql = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} USING fts5("
+        "kind UNINDEXED, object_id UNINDEXED, title, body, tokenize='porter unicode61')",
+    ]
+    drop_sql = [f"DROP TABLE IF EXISTS {INDEX_TABLE}"]
+
+    def upsert(self, cursor, kind, object_id, title, body):
+        self.delete(cursor, kind, object_id)
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE} (kind, object_id, title, body) VALUES (%s, %s, %s, %s)",
+            [kind, object_id, title, body],
+        )
+
+    def delete(self, cursor, kind, object_id):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE kind = %s AND object_id = %s", [kind, object_id])
+
+    def clear(self, cursor, kind):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE kind = %s", [kind])
+
+    def search(self, cursor, kind, terms, limit):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        cursor.execute(
+            f"SELECT object_id, snippet({INDEX_TABLE}, -1, %s, %s, '…', 16) FROM {INDEX_TABLE} "
+            f"WHERE {INDEX_TABLE} MATCH %s AND kind = %s "
+            f"ORDER BY bm25({INDEX_TABLE}, 0.0, 0.0, 10.0, 1.0) LIMIT %s",
+            [MATCH_START, MATCH_STOP, match, kind, limit],
+        )
+        return cursor.fetchall()
+
+
+class PostgresBackend:
+    create_sql = [
+        f"CREATE TABLE IF NOT EXISTS {INDEX_TABLE} ("
+        "kind varchar(20) NOT NULL, object_id bigint NOT NULL, title text NOT NULL, body text NOT NULL, "
+        "document tsvector NOT NULL, PRIMARY KEY (kind, object_id))",
+        f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_document_idx ON {INDEX_TABLE} USING GIN (document)",
+    ]
+    drop_sql = [f"DROP TABLE IF EXISTS {INDEX_TABLE}"]
+
+    def upsert(self, cursor, kind, object_id, title, body):
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE} (kind, object_id, title, body, document) VALUES (%s, %s, %s, %s, "
+            "setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'B')) "
+            "ON CONFLICT (kind, object_id) DO UPDATE SET "
+            "title = EXCLUDED.title, body = EXCLUDED.body, document = EXCLUDED.document",
+            [kind, object_id, title, body, title, body],
+        )
+
+    def delete(self, cursor, kind, object_id):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE kind = %s AND object_id = %s", [kind, object_id])
+
+    def clear(self, cursor, kind):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE kind = %s", [kind])
+
+    def search(self, cursor, kind, terms, limit):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        cursor.execute(
+            "SELECT object_id, ts_headline('english', title || ' ' || body, q, %s) "
+            f"FROM {INDEX_TABLE}, to_tsquery('english', %s) AS q "
+            "WHERE kind = %s AND document @@ q ORDER BY ts_rank(document, q) DESC, object_id LIMIT %s",
+            [f'StartSel={MATCH_START}, StopSel={MATCH_STOP}, MaxWords=24, MinWords=8', tsquery, kind, limit],
+        )
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend(),
+    'postgresql': PostgresBackend(),
+}
+
+# kind stored in the index, and how a row is turned into (title, body)
+DOCUMENTS = {
+    Program: ('program', lambda obj: (obj.title, obj.description)),
+    Trainer: ('trainer', lambda obj: (obj.name, f'{obj.specialization}\n{obj.bio}')),
+}
+
+
+def highlight(snippet):
+    """HTML for a raw ``snippet``: the text escaped and each match wrapped in ``<mark>``."""
+    return escape(snippet).replace(MATCH_START, HIGHLIGHT_START).replace(MATCH_STOP, HIGHLIGHT_STOP)
+
+
+def get_backend(conn=connection):
+    return BACKENDS.get(conn.vendor)
+
+
+def index(obj):
+    """Add or refresh ``obj`` in the search index."""
+    backend = get_backend()
+    if backend is None:
+        return
+    kind, document = DOCUMENTS[type(obj)]
+    with connection.cursor() as cursor:
+        backend.upsert(cursor, kind, obj.pk, *document(obj))
+
+
+def unindex(model, pk):
+    """Remove the row ``pk`` of ``model`` from the search index."""
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.delete(cursor, DOCUMENTS[model][0], pk)
+
+
+def rebuild(model, chunk_size=500):
+    """Re-index every row of ``model``; returns the number of rows indexed."""
+    backend = get_backend()
+    if backend is None:
+        return 0
+    kind, document = DOCUMENTS[model]
+    count = 0
+    with connection.cursor() as cursor:
+        backend.clear(cursor, kind)
+        for obj in model.objects.iterator(chunk_size=chunk_size):
+            backend.upsert(cursor, kind, obj.pk, *document(obj))
+            count += 1
+    return count
+
+
+def search(model, query, limit=200):
+    """
+    Ranked ``[(pk, snippet), ...]`` for ``query``, best match first, at
+    most ``limit`` of them.  Snippets are safe HTML.
+
+    Returns ``None`` when the database has no full-text backend.
+    """
+    backend = get_backend()
+    if backend is None:
+        return None
+    terms = query_terms(query)
+    if not terms:
+        return []
+    with connection.cursor() as cursor:
+        hits = backend.search(cursor, DOCUMENTS[model][0], terms, limit)
+    return [(pk, highlight(snippet)) for pk, snippet in hits]
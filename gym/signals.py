@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from . import catalog, facets, images, ratings, search
+from .models import Slider, Program, Feature, Specialization, Trainer, Faq, Gallery, Testimonial
+
+CATALOG_MODELS = (Slider, Program, Feature, Specialization, Trainer, Faq, Gallery, Testimonial)
+IMAGE_MODELS = (Slider, Program, Trainer, Gallery, Testimonial)
+
+
+def invalidate(model):
+    """Bump the catalog version of ``model`` now and again once the write commits."""
+    catalog.bump_version(model)
+    # A worker may rebuild between the first bump and the commit and
+    # snapshot the old rows; the second bump retires that snapshot.
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: catalog.bump_version(model))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def catalog_row_changed(sender, **kwargs):
+    if sender in CATALOG_MODELS:
+        invalidate(sender)
+
+
+@receiver(m2m_changed, sender=Program.features.through)
+@receiver(m2m_changed, sender=Trainer.certifications.through)
+def catalog_relation_changed(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate(type(instance) if isinstance(instance, (Program, Trainer)) else kwargs['model'])
+
+
+@receiver(post_save, sender=Program)
+@receiver(post_save, sender=Trainer)
+def search_document_saved(sender, instance, **kwargs):
+    search.index(instance)
+
+
+@receiver(post_delete, sender=Program)
+@receiver(post_delete, sender=Trainer)
+def search_document_deleted(sender, instance, **kwargs):
+    search.unindex(sender, instance.pk)
+
+
+@receiver(post_save)
+def catalog_images_saved(sender, instance, **kwargs):
+    if sender in IMAGE_MODELS and not kwargs.get('raw'):
+        images.schedule(instance)
+
+
+@receiver(pre_save, sender=Gallery)
+def gallery_category_loaded(sender, instance, **kwargs):
+    # Remember the stored category so post_save can move the count.
+    instance._stored_category = (
+        Gallery.objects.filter(pk=instance.pk).values_list('category', flat=True).first()
+        if instance.pk is not None else None
+    )
+
+
+@receiver(post_save, sender=Gallery)
+def gallery_facet_saved(sender, instance, **kwargs):
+    previous = getattr(instance, '_stored_category', None)
+    if previous == instance.category:
+        return
+    if previous is not None:
+        facets.adjust(previous, -1)
+    facets.adjust(instance.category, 1)
+
+
+@receiver(post_delete, sender=Gallery)
+def gallery_facet_deleted(sender, instance, **kwargs):
+    facets.adjust(instance.category, -1)
+
+
+@receiver(pre_save, sender=Testimonial)
+def testimonial_rating_loaded(sender, instance, **kwargs):
+    # Remember the stored (program, rating) so post_save can apply the difference.
+    instance._stored_rating = (
+        Testimonial.objects.filter(pk=instance.pk).values_list('program', 'rating').first()
+        if instance.pk is not None else None
+    )
+
+
+@receiver(post_save, sender=Testimonial)
+def testimonial_rating_saved(sender, instance, **kwargs):
+    previous = getattr(instance, '_stored_rating', None)
+    current = (instance.program, instance.rating)
+    if previous is not None:
+        if (ratings.program_key(previous[0]), previous[1]) == (ratings.program_key(current[0]), current[1]):
+            return
+        ratings.adjust(*previous, -1)
+    ratings.adjust(*current, 1)
+
+
+@receiver(post_delete, sender=Testimonial)
+def testimonial_rating_deleted(sender, instance, **kwargs):
+    ratings.adjust(instance.program, instance.rating, -1)
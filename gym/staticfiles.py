@@ -0,0 +1,120 @@
+"""
+Fingerprinted, minified and precompressed static assets.
+
+``collectstatic`` with ``CompressedManifestStaticFilesStorage`` writes every
+file under a content-hashed name (``css/style.3f2a9c1b7e0d.css``), strips
+comments and whitespace from stylesheets, and stores ``.gz`` (and, when
+the ``brotli`` package is installed, ``.br``) siblings next to each
+compressible file.  ``serve_static`` then answers ``/static/`` requests
+with the best precompressed variant the client accepts, so nothing is
+compressed per request, and marks hashed names as cacheable for a year.
+With ``MEDIA_SENDFILE_HEADER = 'X-Accel-Redirect'`` the file is handed to
+nginx under ``STATIC_ACCEL_PREFIX``, a location aliasing ``STATIC_ROOT``.
+"""
+import gzip
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from . import media
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.xml', '.map', '.html')
+MIN_COMPRESS_SIZE = 256
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+# Content-Encoding -> file suffix, in order of preference
+PRECOMPRESSED = {'br': '.br', 'gzip': '.gz'}
+
+
+# Quoted strings and comments, matched left to right so a "/*" inside a
+# string is not a comment and a quote inside a comment is not a string.
+STRING_OR_COMMENT_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/', re.S)
+PLACEHOLDER_RE = re.compile(r'\x00(\d+)\x00')
+
+
+def minify_css(css):
+    """Drop comments and insignificant whitespace from a stylesheet, leaving strings intact."""
+    strings = []
+
+    def protect(match):
+        if match.group().startswith('/*'):
+            return ''
+        strings.append(match.group())
+        return f'\x00{len(strings) - 1}\x00'
+
+    css = STRING_OR_COMMENT_RE.sub(protect, css)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}').strip()
+    return PLACEHOLDER_RE.sub(lambda match: strings[int(match.group(1))], css)
+
+
+def compressors():
+    """File suffix -> compress function for every available encoder."""
+    available = {'.gz': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        available['.br'] = lambda data: brotli.compress(data, quality=11)
+    return available
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that minifies CSS and precompresses text assets."""
+
+    def _save(self, name, content):
+        if name.endswith('.css'):
+            content.seek(0)
+            content = ContentFile(minify_css(content.read().decode()).encode())
+        return super()._save(name, content)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compress in compressors().items():
+            compressed = compress(data)
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            if len(compressed) < len(data):
+                self._save(name + suffix, ContentFile(compressed))
+
+
+def serve_static(request, path, document_root=None):
+    """Serve a collected static file, preferring a precompressed variant."""
+    document_root = document_root or settings.STATIC_ROOT
+    path = posixpath.normpath(path).lstrip('/')
+    accepted = media.accepted_types(request.headers.get('Accept-Encoding', ''))
+    original, encoding = path, None
+    for name, suffix in PRECOMPRESSED.items():
+        if name in accepted and os.path.isfile(safe_join(document_root, path + suffix)):
+            path, encoding = path + suffix, name
+            break
+    response = media.send_file(request, path, document_root, settings.STATIC_ACCEL_PREFIX)
+    if encoding and response.status_code in (200, 206):
+        response['Content-Encoding'] = encoding
+    if HASHED_NAME_RE.search(original):
+        patch_cache_control(response, public=True, max_age=media.IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=media.MUTABLE_MAX_AGE)
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
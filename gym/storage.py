@@ -0,0 +1,62 @@
+"""
+Content-addressed media storage.
+
+Uploads are stored as ``<upload_to>/<sha256 prefix><ext>`` instead of
+under the client's file name, so a stored name never changes meaning:
+replacing an image produces a new name (and new derivative names), and
+``gym.media`` can mark every media URL as immutable.  Uploading the same
+bytes twice reuses the existing file, including when two writers race to
+store it: the loser gets the winner's name rather than a suffixed copy.
+"""
+import hashlib
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+
+HASH_LENGTH = 24
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def is_hashed_name(name):
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    return len(stem) == HASH_LENGTH and all(c in '0123456789abcdef' for c in stem)
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """File system storage naming uploads after a hash of their content."""
+    # Derivatives are already named after their (hashed) original.
+    verbatim_prefixes = ('derivatives/',)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if name.startswith(self.verbatim_prefixes) or not hasattr(content, 'chunks'):
+            return super().save(name, content, max_length)
+        directory, filename = posixpath.split(name.replace('\\', '/'))
+        extension = posixpath.splitext(filename)[1].lower()
+        name = posixpath.join(directory, content_hash(content) + extension)
+        if self.exists(name):
+            return name
+        try:
+            return super().save(name, content, max_length)
+        except FileExistsError:
+            # Another writer stored the same bytes since the check above.
+            if not self.exists(name):
+                raise
+            return name
+
+    def get_available_name(self, name, max_length=None):
+        # A hashed name that is taken already holds these bytes; signal
+        # ``save`` instead of falling back to a random suffix.
+        if not is_hashed_name(name):
+            return super().get_available_name(name, max_length)
+        if self.exists(name):
+            raise FileExistsError(name)
+        return name
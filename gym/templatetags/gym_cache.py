@@ -0,0 +1,145 @@
+"""
+``{% catalogcache %}``: fragment caching keyed on catalog versions.
+
+Usage::
+
+    {% load gym_cache %}
+    {% catalogcache "footer" %}...{% endcatalogcache %}
+    {% catalogcache "slider" depends "gym.Slider" %}...{% endcatalogcache %}
+    {% catalogcache "nav" request.path %}...{% endcatalogcache %}
+
+A miss renders the body inside ``catalog.track()`` and stores it with
+the versions of every catalog model read, plus any listed after
+``depends`` (for rows the view loaded before the fragment was rendered).
+Later renders reuse the markup while all of those versions are
+unchanged, so there is no explicit timeout tuning or invalidation.
+Extra arguments before ``depends`` are folded into the key, as with
+Django's ``{% cache %}``.
+
+A fragment that touches the session, the CSRF token or flash messages
+while rendering is visitor-specific and is never stored.  While the
+visitor has pending flash messages the cache is bypassed altogether, as
+the page cache does, so ``{% if messages %}`` cannot hide them.
+"""
+import hashlib
+from contextlib import contextmanager
+
+from django import template
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+
+from gym import catalog
+
+register = template.Library()
+
+FRAGMENT_KEY = 'gym:fragment:{}:{}'
+
+
+def has_pending_messages(request):
+    storage = getattr(request, '_messages', None)
+    return storage is not None and len(storage) > 0
+
+
+def fragment_key(name, vary_on):
+    digest = hashlib.sha256(repr([str(value) for value in vary_on]).encode()).hexdigest()
+    return FRAGMENT_KEY.format(name, digest)
+
+
+@contextmanager
+def visitor_usage(request):
+    """
+    Yield a list that ends up non-empty if the block used visitor state.
+
+    The session's ``accessed`` flag, the CSRF ``NEEDS_UPDATE`` marker and
+    the message storage's ``used`` flag are cleared for the duration of
+    the block and restored afterwards, so earlier use by the view does
+    not hide use by the fragment.
+    """
+    used = []
+    if request is None:
+        yield used
+        return
+    session = getattr(request, 'session', None)
+    messages = getattr(request, '_messages', None)
+    session_accessed = getattr(session, 'accessed', False)
+    messages_used = getattr(messages, 'used', False)
+    csrf_used = request.META.pop('CSRF_COOKIE_NEEDS_UPDATE', False)
+    if session is not None:
+        session.accessed = False
+    if messages is not None:
+        messages.used = False
+    try:
+        yield used
+    finally:
+        if session is not None and session.accessed:
+            used.append('session')
+        if messages is not None and messages.used:
+            used.append('messages')
+        if request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+            used.append('csrf')
+        if session is not None:
+            session.accessed = session.accessed or session_accessed
+        if messages is not None:
+            messages.used = messages.used or messages_used
+        if csrf_used:
+            request.META['CSRF_COOKIE_NEEDS_UPDATE'] = True
+
+
+class CatalogCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary_on, depends):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+        self.depends = depends
+
+    def render(self, context):
+        request = context.get('request')
+        if has_pending_messages(request):
+            return self.nodelist.render(context)
+        name = self.name.resolve(context)
+        key = fragment_key(name, [var.resolve(context) for var in self.vary_on])
+        depends = [apps.get_model(label.resolve(context)) for label in self.depends]
+
+        entry = cache.get(key)
+        if entry is not None:
+            models = [apps.get_model(label) for label in entry['models']]
+            if catalog.get_versions(*models) == entry['versions']:
+                catalog.record(dict(zip(models, entry['versions'])))
+                return entry['content']
+
+        with visitor_usage(request) as used, catalog.track() as versions:
+            if depends:
+                catalog.depend_on(*depends)
+            content = self.nodelist.render(context)
+        if not used:
+            models = sorted(versions, key=lambda model: model._meta.label_lower)
+            cache.set(key, {
+                'models': [model._meta.label_lower for model in models],
+                'versions': tuple(versions[model] for model in models),
+                'content': content,
+            }, settings.PAGE_CACHE_TIMEOUT)
+        return content
+
+
+@register.tag('catalogcache')
+def do_catalogcache(parser, token):
+    """Cache the enclosed fragment until a catalog model it read changes."""
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name.")
+    nodelist = parser.parse(('endcatalogcache',))
+    parser.delete_first_token()
+    args = bits[2:]
+    depends = []
+    if 'depends' in args:
+        index = args.index('depends')
+        args, depends = args[:index], args[index + 1:]
+        if not depends:
+            raise template.TemplateSyntaxError(f"'{bits[0]}' tag expects model labels after 'depends'.")
+    return CatalogCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(arg) for arg in args],
+        [parser.compile_filter(label) for label in depends],
+    )
@@ -0,0 +1,17 @@
+from django import template
+
+from gym import images
+
+register = template.Library()
+
+
+@register.filter
+def variant(image, name):
+    """URL of the ``name`` derivative (thumb, card or hero) of ``image``."""
+    return images.derivative_url(getattr(image, 'name', ''), name)
+
+
+@register.filter
+def srcset(image):
+    """``srcset`` value listing every derivative of ``image``."""
+    return images.srcset(getattr(image, 'name', ''))
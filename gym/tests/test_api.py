@@ -0,0 +1,367 @@
+import pytest
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from booking.api.serializers import BookingSerializer
+from gym import keyset
+from gym.api import views
+from gym.api.relations import relation_plan
+from gym.api.serializers import ProgramSerializer, TrainerSerializer, GallerySerializer
+from gym.models import Testimonial
+from gym.tests.factories import (
+    SliderFactory, ProgramFactory, FeatureFactory, TrainerFactory,
+    SpecializationFactory, FaqFactory, GalleryFactory, TestimonialFactory
+)
+
+
+def make_programs(count):
+    features = FeatureFactory.create_batch(2)
+    for i in range(count):
+        ProgramFactory(features=features)
+
+
+def make_trainers(count):
+    certifications = SpecializationFactory.create_batch(2)
+    for i in range(count):
+        TrainerFactory(certifications=certifications)
+
+
+ENDPOINTS = [
+    ('slider-list', views.SliderViewSet, SliderFactory.create_batch),
+    ('program-list', views.ProgramViewSet, make_programs),
+    ('trainer-list', views.TrainerViewSet, make_trainers),
+    ('faq-list', views.FaqViewSet, FaqFactory.create_batch),
+    ('gallery-list', views.GalleryViewSet, GalleryFactory.create_batch),
+    ('testimonial-list', views.TestimonialViewSet, TestimonialFactory.create_batch),
+]
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+class TestRelationPlan:
+    def test_nested_many_serializer_is_prefetched(self):
+        """Test nested many=True serializers become prefetch lookups"""
+        assert relation_plan(ProgramSerializer) == ((), ('features',))
+
+    def test_many_related_field_is_prefetched(self):
+        """Test StringRelatedField(many=True) becomes a prefetch lookup"""
+        assert relation_plan(TrainerSerializer) == ((), ('certifications',))
+
+    def test_plain_fields_need_no_joins(self):
+        """Test serializers without relations produce an empty plan"""
+        assert relation_plan(GallerySerializer) == ((), ())
+
+    def test_nested_single_serializer_is_joined(self):
+        """Test nested FK serializers are joined and their relations prefetched"""
+        select, prefetch = relation_plan(BookingSerializer)
+
+        assert select == ('program', 'trainer')
+        assert set(prefetch) == {'program__features', 'trainer__certifications'}
+
+
+def warm_validators(api_client, url_name):
+    # A cold cache recovers each dependency's Last-Modified with one
+    # MAX(updated_at) query; a running worker already holds them.
+    api_client.get(reverse(url_name))
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+    @pytest.mark.parametrize('url_name, viewset, make', ENDPOINTS)
+    def test_list_stays_within_budget(self, api_client, url_name, viewset, make):
+        """Test a full list page stays within the endpoint's query budget"""
+        warm_validators(api_client, url_name)
+        make(15)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(reverse(url_name))
+
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 10
+        assert len(queries) <= viewset.query_budget
+
+    @pytest.mark.parametrize('url_name, viewset, make', ENDPOINTS)
+    def test_query_count_independent_of_page_size(self, api_client, url_name, viewset, make):
+        """Test list queries do not grow with the number of rows"""
+        warm_validators(api_client, url_name)
+        make(2)
+        with CaptureQueriesContext(connection) as small:
+            api_client.get(reverse(url_name))
+
+        make(12)
+        with CaptureQueriesContext(connection) as full:
+            api_client.get(reverse(url_name))
+
+        assert len(small) == len(full)
+
+
+@pytest.mark.django_db
+class TestProgramAPI:
+    def test_program_list_includes_features(self, api_client, program, feature):
+        """Test programs are serialized with their nested features"""
+        response = api_client.get(reverse('program-list'))
+
+        assert response.json()['results'][0]['features'] == [{'id': feature.id, 'title': feature.title}]
+
+    def test_trainer_detail_includes_certifications(self, api_client, trainer, specialization):
+        """Test trainers are serialized with their certifications"""
+        response = api_client.get(reverse('trainer-detail', kwargs={'pk': trainer.pk}))
+
+        assert response.status_code == 200
+        assert response.data['certifications'] == [specialization.name]
+
+    def test_image_fields_stay_urls(self, api_client, program):
+        """Test image fields remain URL strings, with the derivatives in separate fields"""
+        result = api_client.get(reverse('program-list')).json()['results'][0]
+
+        for field in ('thumbnail', 'cover', 'image1', 'image2'):
+            assert result[field] is None or isinstance(result[field], str)
+        assert result['thumbnail'].startswith('http')
+        assert result['thumbnail_variants']['card'] == result['thumbnail']
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def test_list_sends_validators(self, api_client, faq):
+        """Test list responses carry ETag and Last-Modified"""
+        response = api_client.get(reverse('faq-list'))
+
+        assert response.status_code == 200
+        assert response['ETag'].startswith('"')
+        assert 'Last-Modified' in response
+
+    def test_matching_etag_returns_304_without_queries(self, api_client, faq, django_assert_num_queries):
+        """Test If-None-Match short-circuits before the list query"""
+        url = reverse('faq-list')
+        etag = api_client.get(url)['ETag']
+
+        with django_assert_num_queries(0):
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert not response.content
+
+    def test_etag_changes_after_edit(self, api_client, faq):
+        """Test editing a row invalidates the previous ETag"""
+        url = reverse('faq-list')
+        etag = api_client.get(url)['ETag']
+        faq.answer = "Weekdays only"
+        faq.save()
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_etag_changes_with_related_edit(self, api_client, program, feature):
+        """Test renaming a nested feature invalidates the program list ETag"""
+        url = reverse('program-list')
+        etag = api_client.get(url)['ETag']
+        feature.title = "Meal Plans"
+        feature.save()
+
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_etag_varies_with_query_string(self, api_client, faq):
+        """Test each page or search gets its own ETag"""
+        url = reverse('faq-list')
+
+        assert api_client.get(url)['ETag'] != api_client.get(url + '?page=1')['ETag']
+
+    def test_if_modified_since_returns_304(self, api_client, faq):
+        """Test a current If-Modified-Since is answered with 304"""
+        url = reverse('faq-list')
+        last_modified = api_client.get(url)['Last-Modified']
+
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        assert response.status_code == 304
+
+    def test_last_modified_recovered_from_updated_at(self, api_client, faq):
+        """Test Last-Modified falls back to MAX(updated_at) on a cold cache"""
+        from django.core.cache import cache
+        from django.utils.http import http_date
+        cache.clear()
+
+        response = api_client.get(reverse('faq-list'))
+
+        assert response['Last-Modified'] == http_date(int(faq.updated_at.timestamp()))
+
+    def test_detail_sends_validators(self, api_client, trainer):
+        """Test retrieve responses are conditional too"""
+        url = reverse('trainer-detail', kwargs={'pk': trainer.pk})
+        etag = api_client.get(url)['ETag']
+
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+
+@pytest.mark.django_db
+class TestPrerenderedLists:
+    def test_repeat_list_served_without_queries(self, api_client, django_assert_num_queries):
+        """Test a repeated list request writes stored bytes without touching the database"""
+        FaqFactory.create_batch(3)
+        url = reverse('faq-list')
+        first = api_client.get(url)
+
+        with django_assert_num_queries(0):
+            second = api_client.get(url)
+
+        assert second.status_code == 200
+        assert second['Content-Type'] == 'application/json'
+        assert second.content == first.content
+
+    def test_bytes_regenerated_after_edit(self, api_client, faq):
+        """Test stored bytes are replaced once the rows change"""
+        url = reverse('faq-list')
+        api_client.get(url)
+        faq.question = "Is there parking?"
+        faq.save()
+
+        response = api_client.get(url)
+
+        assert response.json()['results'][0]['question'] == "Is there parking?"
+
+    def test_query_parameters_are_part_of_key(self, api_client):
+        """Test each page and search term gets its own stored payload"""
+        for title in ["Alpha Program", "Beta Program"]:
+            ProgramFactory(title=title)
+        url = reverse('program-list')
+
+        alpha = api_client.get(url, {'search': 'Alpha'}).json()
+        beta = api_client.get(url, {'search': 'Beta'}).json()
+
+        assert [p['title'] for p in alpha['results']] == ["Alpha Program"]
+        assert [p['title'] for p in beta['results']] == ["Beta Program"]
+
+    def test_ordering_is_part_of_key(self, api_client):
+        """Test ordering variants are stored separately"""
+        ProgramFactory(title="A", price=10)
+        ProgramFactory(title="B", price=20)
+        url = reverse('program-list')
+
+        ascending = api_client.get(url, {'ordering': 'price'}).json()['results']
+        descending = api_client.get(url, {'ordering': '-price'}).json()['results']
+
+        assert [p['title'] for p in ascending] == ["A", "B"]
+        assert [p['title'] for p in descending] == ["B", "A"]
+
+    def test_invalid_page_not_stored(self, api_client, faq):
+        """Test error responses pass through untouched"""
+        response = api_client.get(reverse('faq-list'), {'page': 99})
+
+        assert response.status_code == 404
+
+    def test_browsable_api_bypasses_stored_bytes(self, api_client, faq):
+        """Test only JSON responses are served from stored bytes"""
+        response = api_client.get(reverse('faq-list'), HTTP_ACCEPT='text/html')
+
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/html')
+
+
+def walk(api_client, url, params=None):
+    """Follow next links and return every result in order"""
+    results = []
+    response = api_client.get(url, params)
+    while True:
+        body = response.json()
+        results.extend(body['results'])
+        if not body['next']:
+            return results
+        response = api_client.get(body['next'])
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def test_gallery_pages_have_no_count(self, api_client, gallery):
+        """Test keyset pages skip the COUNT(*) and only link forward"""
+        body = api_client.get(reverse('gallery-list')).json()
+
+        assert set(body) == {'next', 'results'}
+        assert body['next'] is None
+
+    def test_gallery_walk_visits_every_row_once(self, api_client):
+        """Test following cursors returns each image exactly once, newest first"""
+        images = GalleryFactory.create_batch(23)
+
+        results = walk(api_client, reverse('gallery-list'))
+
+        assert [r['id'] for r in results] == [g.id for g in reversed(images)]
+
+    def test_gallery_walk_within_category(self, api_client):
+        """Test cursors keep the category filter"""
+        events = GalleryFactory.create_batch(12, category='events')
+        GalleryFactory.create_batch(5, category='gym')
+
+        results = walk(api_client, reverse('gallery-list'), {'category': 'events'})
+
+        assert sorted(r['id'] for r in results) == sorted(g.id for g in events)
+
+    def test_testimonial_ties_on_rating_are_not_skipped(self, api_client):
+        """Test equal ratings are paged by id without duplicates or gaps"""
+        TestimonialFactory.create_batch(13, rating=5)
+        TestimonialFactory.create_batch(9, rating=4)
+
+        results = walk(api_client, reverse('testimonial-list'))
+
+        assert len({r['id'] for r in results}) == 22
+        assert [r['rating'] for r in results] == [5] * 13 + [4] * 9
+
+    def test_deep_page_costs_one_query(self, api_client, django_assert_num_queries):
+        """Test a page deep into the gallery is a single range query"""
+        GalleryFactory.create_batch(35)
+        url = reverse('gallery-list')
+        next_url = api_client.get(url).json()['next']
+        next_url = api_client.get(next_url).json()['next']
+
+        with django_assert_num_queries(1):
+            response = api_client.get(next_url)
+        assert len(response.json()['results']) == 10
+
+    def test_seek_uses_index_range(self, testimonial):
+        """Test the seek condition bounds the leading index column instead of scanning"""
+        ordering = ['-rating', '-id']
+        queryset = keyset.seek(Testimonial.objects.order_by(*ordering), ordering, [4, 100])
+
+        plan = queryset.explain()
+
+        if connection.vendor == 'sqlite':
+            assert 'SEARCH' in plan and 'rating<?' in plan
+        assert list(queryset) == list(Testimonial.objects.filter(
+            Q(rating__lt=4) | Q(rating=4, id__lt=100)
+        ).order_by(*ordering))
+
+    def test_ordering_param_is_rejected(self, api_client, testimonial):
+        """Test keyset lists refuse an ordering they cannot seek on"""
+        response = api_client.get(reverse('testimonial-list'), {'ordering': 'created_at'})
+
+        assert response.status_code == 400
+        assert 'ordering' in response.json()
+
+    def test_invalid_cursor_returns_404(self, api_client, gallery):
+        """Test a tampered cursor is rejected"""
+        response = api_client.get(reverse('gallery-list'), {'cursor': 'not-a-cursor'})
+
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('url_name, position', [
+        ('testimonial-list', ['x', 1]),
+        ('testimonial-list', [5, 2 ** 63]),
+        ('testimonial-list', [True, 1]),
+        ('gallery-list', [{'a': 1}]),
+        ('gallery-list', [None]),
+        ('gallery-list', ['\u00b2']),
+        ('gallery-list', [1e400]),
+        ('gallery-list', [2 ** 70]),
+    ])
+    def test_cursor_values_of_the_wrong_type_return_404(self, api_client, testimonial, url_name, position):
+        """Test a well-formed cursor whose values do not fit the ordering fields is rejected"""
+        response = api_client.get(reverse(url_name), {'cursor': keyset.encode_cursor(position)})
+
+        assert response.status_code == 404
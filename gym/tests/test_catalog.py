@@ -0,0 +1,126 @@
+import pytest
+from django.urls import reverse
+from gym import catalog
+from gym.checks import check_shared_cache
+from gym.models import Program, Trainer, Faq
+from gym.tests.factories import (
+    TrainerFactory, SpecializationFactory, FaqFactory, GalleryFactory
+)
+
+
+@pytest.mark.django_db
+class TestCatalogSnapshot:
+    def test_rows_copy_model_fields(self, program, feature):
+        """Test snapshot rows carry the fields and relations templates use"""
+        row = catalog.get_row(Program, program.pk)
+
+        assert row.id == program.pk
+        assert row.title == program.title
+        assert row.thumbnail.url == program.thumbnail.url
+        assert not row.image1
+        assert [f.title for f in row.features.all()] == [feature.title]
+        assert row == program
+
+    def test_rows_are_immutable(self, faq):
+        """Test snapshot rows reject attribute assignment"""
+        row = catalog.get_row(Faq, faq.pk)
+
+        with pytest.raises(AttributeError):
+            row.question = "Changed?"
+        assert not hasattr(row, '__dict__')
+
+    def test_warm_snapshot_runs_no_queries(self, django_assert_num_queries):
+        """Test a current snapshot is served without touching the database"""
+        FaqFactory.create_batch(3)
+        catalog.get_rows(Faq)
+
+        with django_assert_num_queries(0):
+            assert len(catalog.get_rows(Faq)) == 3
+
+    def test_save_invalidates_snapshot(self, faq):
+        """Test saving a row rebuilds the snapshot"""
+        catalog.get_rows(Faq)
+        faq.question = "Do you offer day passes?"
+        faq.save()
+
+        assert catalog.get_row(Faq, faq.pk).question == "Do you offer day passes?"
+
+    def test_delete_invalidates_snapshot(self, faq):
+        """Test deleting a row removes it from the snapshot"""
+        pk = faq.pk
+        catalog.get_rows(Faq)
+        faq.delete()
+
+        assert catalog.get_row(Faq, pk) is None
+
+    def test_m2m_change_invalidates_snapshot(self):
+        """Test adding a certification rebuilds the trainer snapshot"""
+        trainer = TrainerFactory()
+        catalog.get_rows(Trainer)
+        trainer.certifications.add(SpecializationFactory(name="Yoga"))
+
+        row = catalog.get_row(Trainer, trainer.pk)
+        assert [c.name for c in row.certifications.all()] == ["Yoga"]
+
+    def test_related_edit_invalidates_parent(self, program, feature):
+        """Test renaming a feature rebuilds the program snapshot"""
+        catalog.get_rows(Program)
+        feature.title = "Nutrition Plan"
+        feature.save()
+
+        row = catalog.get_row(Program, program.pk)
+        assert row.features.first().title == "Nutrition Plan"
+
+    def test_unrelated_edit_keeps_snapshot(self, faq, django_assert_num_queries):
+        """Test editing a gallery image does not rebuild the FAQ snapshot"""
+        catalog.get_rows(Faq)
+        GalleryFactory()
+
+        with django_assert_num_queries(0):
+            catalog.get_rows(Faq)
+
+
+@pytest.mark.django_db
+class TestCatalogViews:
+    def test_home_page_warm_runs_no_queries(self, client, slider, program, trainer, testimonial,
+                                            django_assert_num_queries):
+        """Test the home page is served from the snapshot once warm"""
+        url = reverse('gym:index')
+        client.get(url)
+
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert program.title.encode() in response.content
+
+    def test_program_details_warm_runs_no_queries(self, client, program, django_assert_num_queries):
+        """Test program details are served from the snapshot once warm"""
+        url = reverse('gym:program_details', kwargs={'pk': program.pk})
+        client.get(url)
+
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response.status_code == 200
+
+
+class TestSharedCacheCheck:
+    def test_local_cache_with_several_workers(self, settings):
+        """Test the check fails a per-process cache shared by several workers"""
+        settings.SERVER_WORKERS = 3
+
+        assert [error.id for error in check_shared_cache(None)] == ['gym.E001']
+
+    def test_single_process(self, settings):
+        """Test one process may use a local cache, with a warning outside DEBUG"""
+        settings.SERVER_WORKERS = 1
+        settings.DEBUG = True
+        assert check_shared_cache(None) == []
+
+        settings.DEBUG = False
+        assert [error.id for error in check_shared_cache(None)] == ['gym.W001']
+
+    def test_shared_cache(self, settings):
+        """Test a shared backend passes with any number of workers"""
+        settings.SERVER_WORKERS = 3
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'}}
+
+        assert check_shared_cache(None) == []
@@ -59,4 +59,37 @@ class TestFooterContextProcessor:
         context = footer_content(request)
         
         assert len(context['footer_programs']) == 2
-        assert len(context['footer_trainers']) == 3
\ No newline at end of file
+        assert len(context['footer_trainers']) == 3
+
+    def test_footer_content_is_lazy(self, django_assert_num_queries):
+        """Test footer_content does no work until the footer is rendered"""
+        ProgramFactory()
+        request = RequestFactory().get('/')
+
+        with django_assert_num_queries(0):
+            footer_content(request)
+
+    def test_footer_content_warm_cache_no_queries(self, django_assert_num_queries):
+        """Test footer_content runs zero queries on a warm cache"""
+        for i in range(6):
+            ProgramFactory()
+            TrainerFactory()
+        request = RequestFactory().get('/')
+        context = footer_content(request)
+        len(context['footer_programs']), len(context['footer_trainers'])
+
+        with django_assert_num_queries(0):
+            context = footer_content(request)
+            assert len(context['footer_programs']) == 4
+            assert len(context['footer_trainers']) == 4
+
+    def test_footer_content_refreshes_after_edit(self):
+        """Test footer_content picks up a renamed program"""
+        program = ProgramFactory(title="Old Title")
+        request = RequestFactory().get('/')
+        assert footer_content(request)['footer_programs'][0].title == "Old Title"
+
+        program.title = "New Title"
+        program.save()
+
+        assert footer_content(request)['footer_programs'][0].title == "New Title"
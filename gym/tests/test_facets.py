@@ -0,0 +1,110 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from gym import facets
+from gym.models import Gallery, GalleryFacet
+from gym.tests.factories import GalleryFactory
+
+
+def counts():
+    return {facet.category: facet.count for facet in facets.category_counts()}
+
+
+@pytest.mark.django_db
+class TestFacetMaintenance:
+    def test_every_category_listed(self):
+        """Test empty categories are reported with a zero count, in choice order"""
+        assert [facet.category for facet in facets.category_counts()] == ['gym', 'classes', 'facility', 'events']
+        assert set(counts().values()) == {0}
+
+    def test_create_increments(self):
+        """Test saving new images bumps their category"""
+        GalleryFactory(category='gym')
+        GalleryFactory(category='gym')
+        GalleryFactory(category='events')
+
+        assert counts() == {'gym': 2, 'classes': 0, 'facility': 0, 'events': 1}
+
+    def test_category_change_moves_count(self):
+        """Test recategorising an image moves it between facets"""
+        image = GalleryFactory(category='gym')
+
+        image.category = 'classes'
+        image.save()
+
+        assert counts()['gym'] == 0
+        assert counts()['classes'] == 1
+
+    def test_plain_resave_keeps_count(self):
+        """Test saving without a category change leaves counts alone"""
+        image = GalleryFactory(category='gym')
+
+        image.title = 'Renamed'
+        image.save()
+
+        assert counts()['gym'] == 1
+
+    def test_delete_decrements(self):
+        """Test deleting an image lowers its category"""
+        image = GalleryFactory(category='facility')
+
+        image.delete()
+
+        assert counts()['facility'] == 0
+
+    def test_missing_row_is_recounted(self):
+        """Test a lost facet row is rebuilt from the gallery on the next write"""
+        GalleryFactory(category='gym')
+        GalleryFacet.objects.filter(category='gym').delete()
+
+        GalleryFactory(category='gym')
+
+        assert counts()['gym'] == 2
+
+    def test_rebuild_after_bulk_update(self):
+        """Test the rebuild command repairs counts after signal-less bulk updates"""
+        GalleryFactory(category='gym')
+        Gallery.objects.update(category='events')
+
+        call_command('rebuild_gallery_facets')
+
+        assert counts() == {'gym': 0, 'classes': 0, 'facility': 0, 'events': 1}
+
+    def test_reads_need_no_query(self, django_assert_num_queries):
+        """Test facet reads are served from the catalog snapshot"""
+        GalleryFactory(category='gym')
+        facets.category_counts()
+
+        with django_assert_num_queries(0):
+            assert counts()['gym'] == 1
+
+
+@pytest.mark.django_db
+class TestFacetExposure:
+    def test_api_endpoint(self):
+        """Test /api/gym/gallery/facets/ returns the counts"""
+        GalleryFactory(category='classes')
+
+        response = APIClient().get(reverse('gallery-facets'))
+
+        assert response.status_code == 200
+        assert {'category': 'classes', 'label': 'Classes', 'count': 1} in response.json()
+        assert 'ETag' in response
+
+    def test_api_endpoint_conditional(self):
+        """Test a repeat request with the ETag is answered with 304"""
+        client = APIClient()
+        etag = client.get(reverse('gallery-facets'))['ETag']
+
+        assert client.get(reverse('gallery-facets'), HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    def test_gallery_page_context(self, client):
+        """Test the gallery page shows per-category counts and a total"""
+        GalleryFactory(category='events')
+        GalleryFactory(category='gym')
+
+        response = client.get(reverse('gym:gallery'))
+
+        assert response.context['facet_total'] == 2
+        assert facets.Facet('events', 'Events', 1) in response.context['facets']
@@ -0,0 +1,166 @@
+import pytest
+from django.contrib import messages
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.template import Context, RequestContext, Template, TemplateSyntaxError
+from django.core.cache import cache
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+from gym import catalog
+from gym.models import Program, Slider
+from gym.templatetags.gym_cache import fragment_key
+from gym.tests.factories import ProgramFactory, SliderFactory
+
+
+class Counter:
+    """Renders as the number of times it has been rendered"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return str(self.calls)
+
+
+def render(source, request=None, **context):
+    template = Template('{% load gym_cache %}' + source)
+    if request is None:
+        return template.render(Context(context))
+    return template.render(RequestContext(request, context))
+
+
+def visitor_request():
+    request = RequestFactory().get('/')
+    SessionMiddleware(lambda r: None).process_request(request)
+    request._messages = FallbackStorage(request)
+    return request
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+    def test_fragment_rendered_once(self):
+        """Test a second render reuses the stored markup"""
+        counter = Counter()
+        source = '{% catalogcache "frag" %}{{ counter }}{% endcatalogcache %}'
+
+        assert render(source, counter=counter) == '1'
+        assert render(source, counter=counter) == '1'
+        assert counter.calls == 1
+
+    def test_tracked_model_change_rerenders(self):
+        """Test a fragment reading programs is re-rendered after a program changes"""
+        counter = Counter()
+        source = '{% catalogcache "programs" %}{{ programs|length }}-{{ counter }}{% endcatalogcache %}'
+        programs = lambda: SimpleLazyObject(lambda: catalog.get_rows(Program))  # noqa: E731
+
+        assert render(source, programs=programs(), counter=counter) == '0-1'
+        ProgramFactory()
+
+        assert render(source, programs=programs(), counter=counter) == '1-2'
+
+    def test_untouched_model_change_keeps_fragment(self):
+        """Test changes to models the fragment never read do not evict it"""
+        counter = Counter()
+        source = '{% catalogcache "programs" %}{{ programs|length }}-{{ counter }}{% endcatalogcache %}'
+        render(source, programs=SimpleLazyObject(lambda: catalog.get_rows(Program)), counter=counter)
+
+        SliderFactory()
+
+        assert render(source, programs=[], counter=counter) == '0-1'
+
+    def test_declared_dependency(self):
+        """Test models listed after 'depends' invalidate rows loaded before the fragment"""
+        counter = Counter()
+        source = '{% catalogcache "slider" depends "gym.Slider" %}{{ counter }}{% endcatalogcache %}'
+        render(source, counter=counter)
+
+        SliderFactory()
+
+        assert render(source, counter=counter) == '2'
+
+    def test_vary_on_arguments(self):
+        """Test extra arguments produce separate entries"""
+        counter = Counter()
+        source = '{% catalogcache "nav" path %}{{ counter }}{% endcatalogcache %}'
+
+        assert render(source, path='/a/', counter=counter) == '1'
+        assert render(source, path='/b/', counter=counter) == '2'
+        assert render(source, path='/a/', counter=counter) == '1'
+
+    def test_hit_is_recorded_in_enclosing_track(self):
+        """Test a cached fragment still makes the surrounding page depend on its models"""
+        source = '{% catalogcache "slider" depends "gym.Slider" %}x{% endcatalogcache %}'
+        render(source)
+
+        with catalog.track() as versions:
+            render(source)
+
+        assert versions == {Slider: catalog.get_version(Slider)}
+
+
+@pytest.mark.django_db
+class TestVisitorSpecificFragments:
+    def test_csrf_fragment_not_stored(self):
+        """Test fragments emitting a CSRF token are rendered every time"""
+        counter = Counter()
+        source = '{% catalogcache "form" %}{% csrf_token %}{{ counter }}{% endcatalogcache %}'
+
+        render(source, visitor_request(), counter=counter)
+        render(source, visitor_request(), counter=counter)
+
+        assert counter.calls == 2
+
+    def test_session_fragment_not_stored(self):
+        """Test fragments reading the session are rendered every time"""
+        counter = Counter()
+        source = '{% catalogcache "user" %}{{ request.session.user_id }}{{ counter }}{% endcatalogcache %}'
+
+        render(source, visitor_request(), counter=counter)
+        render(source, visitor_request(), counter=counter)
+
+        assert counter.calls == 2
+
+    def test_pending_messages_bypass_cache(self):
+        """Test a visitor with flash messages never gets or stores a cached fragment"""
+        counter = Counter()
+        source = '{% catalogcache "flash" %}{% for m in messages %}{{ m }}{% endfor %}{{ counter }}{% endcatalogcache %}'
+        render(source, visitor_request(), counter=counter)
+        request = visitor_request()
+        messages.success(request, 'Booked!')
+
+        assert render(source, request, counter=counter) == 'Booked!2'
+        assert render(source, visitor_request(), counter=counter) == '1'
+
+    def test_earlier_session_use_is_preserved(self):
+        """Test the session flag set by the view survives a cacheable fragment"""
+        request = visitor_request()
+        request.session.get('user_id')
+
+        render('{% catalogcache "plain" %}x{% endcatalogcache %}', request)
+
+        assert request.session.accessed
+
+    def test_fragment_name_required(self):
+        """Test the tag rejects a missing fragment name"""
+        with pytest.raises(TemplateSyntaxError):
+            render('{% catalogcache %}{% endcatalogcache %}')
+
+
+@pytest.mark.django_db
+class TestPartials:
+    def test_site_partials_are_cached(self, client, slider):
+        """Test rendering the home page stores the header, footer and slider fragments"""
+        client.get(reverse('gym:index'))
+
+        for name in ('header', 'footer', 'slider'):
+            assert cache.get(fragment_key(name, [])) is not None
+
+    def test_slider_fragment_follows_slider_changes(self, client, slider):
+        """Test a new slide shows up on the next render of the slider fragment"""
+        client.get(reverse('gym:index'))
+
+        SliderFactory(caption='Brand new slide')
+
+        assert 'Brand new slide' in client.get(reverse('gym:index')).content.decode()
@@ -0,0 +1,368 @@
+import posixpath
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.urls import reverse
+from PIL import Image
+from django.http import Http404
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+from gym import catalog, images, media
+from gym.models import Gallery
+from gym.storage import is_hashed_name
+from gym.tests.factories import GalleryFactory, TestimonialFactory
+from factory.django import ImageField
+
+
+@pytest.fixture
+def inline_derivatives(settings):
+    settings.IMAGE_DERIVATIVE_WORKERS = 0
+
+
+@pytest.mark.django_db
+class TestDerivatives:
+    def test_upload_generates_bounded_variants(self, inline_derivatives, django_capture_on_commit_callbacks):
+        """Test saving an image renders every variant no wider than its bound"""
+        with django_capture_on_commit_callbacks(execute=True):
+            gallery = GalleryFactory(image=ImageField(width=2000, height=1000))
+
+        for variant, width in images.VARIANTS.items():
+            with default_storage.open(images.derivative_name(gallery.image.name, variant)) as f:
+                rendered = Image.open(f)
+                assert rendered.width == width
+                assert rendered.height == width // 2
+
+    def test_small_images_are_not_upscaled(self, inline_derivatives, django_capture_on_commit_callbacks):
+        """Test derivatives never exceed the original size"""
+        with django_capture_on_commit_callbacks(execute=True):
+            gallery = GalleryFactory(image=ImageField(width=100, height=100))
+
+        with default_storage.open(images.derivative_name(gallery.image.name, 'hero')) as f:
+            assert Image.open(f).size == (100, 100)
+
+    def test_generation_waits_for_commit(self, inline_derivatives, django_capture_on_commit_callbacks):
+        """Test nothing is rendered inside the uploading transaction"""
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            gallery = GalleryFactory(image=ImageField(width=123, height=45))
+
+        assert callbacks
+        assert not default_storage.exists(images.derivative_name(gallery.image.name, 'thumb'))
+
+    def test_every_encoding_is_written(self, inline_derivatives, django_capture_on_commit_callbacks):
+        """Test each variant is stored as JPEG plus every supported modern format"""
+        with django_capture_on_commit_callbacks(execute=True):
+            gallery = GalleryFactory()
+
+        for encoding in images.ENCODINGS:
+            name = images.derivative_name(gallery.image.name, 'card', encoding.extension)
+            with default_storage.open(name) as f:
+                assert Image.open(f).format == encoding.format
+
+    def test_existing_derivatives_are_not_rewritten(self, inline_derivatives, django_capture_on_commit_callbacks):
+        """Test regenerating after an interrupted run leaves files already served as immutable untouched"""
+        with django_capture_on_commit_callbacks(execute=True):
+            gallery = GalleryFactory()
+        hero = images.derivative_name(gallery.image.name, 'hero')
+        kept = [images.derivative_name(gallery.image.name, 'hero', encoding.extension) for encoding in images.ENCODINGS]
+        kept.remove(hero)
+        default_storage.delete(hero)
+        before = [default_storage.get_modified_time(name) for name in kept]
+
+        images.generate_derivatives(gallery.image.name)
+
+        assert [default_storage.get_modified_time(name) for name in kept] == before
+        assert default_storage.exists(hero)
+        # No second copy under an alternative name either.
+        assert len(default_storage.listdir(posixpath.dirname(hero))[1]) == len(images.ENCODINGS)
+
+    def test_written_derivatives_retire_cached_responses(
+        self, inline_derivatives, django_capture_on_commit_callbacks, monkeypatch
+    ):
+        """Test responses cached with the original URL are rebuilt once derivatives exist"""
+        submit, queued = images._submit, []
+        monkeypatch.setattr(images, '_submit', lambda *args: queued.append(args))
+        with django_capture_on_commit_callbacks(execute=True):
+            gallery = GalleryFactory()
+        client = APIClient()
+        before = client.get(reverse('gallery-list'))
+        assert before.json()['results'][0]['image'].endswith(gallery.image.url)
+
+        for args in queued:
+            submit(*args)
+        after = client.get(reverse('gallery-list'), HTTP_IF_NONE_MATCH=before['ETag'])
+
+        assert after.status_code == 200
+        assert after.json()['results'][0]['image'].endswith(images.derivative_url(gallery.image.name, 'card'))
+
+    def test_pool_completion_bumps_the_version(self, gallery):
+        """Test a finished pool task marks its model's snapshots stale, and a failed one does not"""
+        done, failed = Future(), Future()
+        done.set_result(True)
+        failed.set_exception(OSError('unreadable'))
+        version = catalog.get_version(Gallery)
+
+        images._finished(Gallery, failed)
+        assert catalog.get_version(Gallery) == version
+
+        images._finished(Gallery, done)
+        assert catalog.get_version(Gallery) != version
+
+    def test_backfill_command(self, inline_derivatives):
+        """Test generate_image_derivatives fills in missing variants"""
+        testimonial = TestimonialFactory()
+
+        call_command('generate_image_derivatives')
+
+        assert default_storage.exists(images.derivative_name(testimonial.image.name, 'thumb'))
+
+
+@pytest.mark.django_db
+class TestDerivativeUrls:
+    def test_template_filters(self, gallery):
+        """Test variant and srcset filters point at derivatives"""
+        images.generate_derivatives(gallery.image.name)
+        rendered = Template(
+            "{% load gym_images %}{{ img.image|variant:'card' }}|{{ img.image|srcset }}"
+        ).render(Context({'img': gallery}))
+        card, srcset = rendered.split('|')
+
+        assert card == default_storage.url(images.derivative_name(gallery.image.name, 'card'))
+        assert srcset.count('w, ') == len(images.VARIANTS) - 1
+        assert srcset.endswith(' 1600w')
+
+    def test_empty_image_renders_nothing(self):
+        """Test filters tolerate missing images"""
+        rendered = Template("{% load gym_images %}{{ image|variant:'thumb' }}{{ image|srcset }}").render(Context({}))
+
+        assert rendered == ''
+
+    def test_list_pages_never_link_originals(self, client, program, trainer, testimonial, slider):
+        """Test the home page only references derivatives"""
+        for original in (program.thumbnail, trainer.picture, testimonial.image, slider.image):
+            images.generate_derivatives(original.name)
+        content = client.get(reverse('gym:index')).content.decode()
+
+        for original in (program.thumbnail, trainer.picture, testimonial.image, slider.image):
+            assert f'src="{original.url}"' not in content
+        assert images.derivative_url(testimonial.image.name, 'thumb') in content
+
+    def test_api_exposes_variants_only(self, gallery):
+        """Test serializers keep the image field a URL string and add the variants beside it"""
+        images.generate_derivatives(gallery.image.name)
+        result = APIClient().get(reverse('gallery-list')).json()['results'][0]
+
+        assert result['image'].endswith(images.derivative_url(gallery.image.name, 'card'))
+        assert set(result['image_variants']) == {'thumb', 'card', 'hero', 'srcset'}
+        assert result['image_variants']['card'] == result['image']
+        assert not any(url.endswith(gallery.image.url) for url in [result['image'], *result['image_variants'].values()])
+
+    def test_original_until_derivatives_exist(self, gallery):
+        """Test a fresh upload links its original until the derivatives are written"""
+        assert images.derivative_url(gallery.image.name, 'card') == gallery.image.url
+        assert images.srcset(gallery.image.name) == ''
+        result = APIClient().get(reverse('gallery-list')).json()['results'][0]
+        assert result['image'].endswith(gallery.image.url)
+        assert result['image_variants']['card'].endswith(gallery.image.url)
+        assert result['image_variants']['srcset'] == ''
+
+        images.generate_derivatives(gallery.image.name)
+
+        assert images.derivative_url(gallery.image.name, 'card').endswith('.jpg')
+        assert 'derivatives/card/' in images.derivative_url(gallery.image.name, 'card')
+
+
+@pytest.mark.django_db
+class TestHashedStorage:
+    def test_uploads_are_named_by_content(self):
+        """Test stored names derive from the file bytes, not the client name"""
+        gallery = GalleryFactory(image=ImageField(filename='holiday photo.JPG', color='red'))
+
+        assert is_hashed_name(gallery.image.name)
+        assert gallery.image.name.startswith('gallery/')
+        assert gallery.image.name.endswith('.jpg')
+
+    def test_identical_uploads_share_a_file(self):
+        """Test uploading the same bytes twice reuses the stored file"""
+        first = default_storage.save('gallery/a.png', ContentFile(b'same bytes'))
+        second = default_storage.save('gallery/b.png', ContentFile(b'same bytes'))
+
+        assert first == second
+
+    def test_racing_writer_reuses_the_stored_file(self, monkeypatch):
+        """Test a file stored after the existence check is reused, not suffixed"""
+        first = default_storage.save('gallery/a.png', ContentFile(b'same bytes'))
+        checks = iter([False])
+        exists = default_storage.exists
+        monkeypatch.setattr(default_storage, 'exists', lambda name: next(checks, True) and exists(name))
+
+        second = default_storage.save('gallery/b.png', ContentFile(b'same bytes'))
+
+        assert second == first
+        assert default_storage.listdir('gallery')[1] == [posixpath.basename(first)]
+
+    def test_concurrent_uploads_share_a_file(self):
+        """Test threads saving the same bytes at once all get the hashed name"""
+        barrier = threading.Barrier(8)
+
+        def save(index):
+            barrier.wait()
+            return default_storage.save(f'gallery/{index}.png', ContentFile(b'racing bytes'))
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            names = set(pool.map(save, range(8)))
+
+        assert len(names) == 1
+        assert is_hashed_name(names.pop())
+        assert len(default_storage.listdir('gallery')[1]) == 1
+
+
+@pytest.mark.django_db
+class TestMediaServing:
+    def get(self, path, accept=''):
+        request = RequestFactory().get('/media/' + path, HTTP_ACCEPT=accept)
+        return media.serve_media(request, path)
+
+    @pytest.fixture
+    def card(self, inline_derivatives, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            gallery = GalleryFactory(image=ImageField(width=800, height=600))
+        return images.derivative_name(gallery.image.name, 'card')
+
+    def test_jpeg_without_modern_accept(self, card):
+        """Test clients that do not list a modern format get the JPEG"""
+        response = self.get(card, 'image/*,*/*;q=0.8')
+
+        assert response['Content-Type'] == 'image/jpeg'
+        assert 'Accept' in response['Vary']
+
+    def test_negotiates_smallest_accepted_format(self, card):
+        """Test the smallest accepted encoding is served"""
+        stem = card[:-len('.jpg')]
+        sizes = {e.content_type: default_storage.size(f'{stem}.{e.extension}') for e in images.ENCODINGS}
+
+        response = self.get(card, ', '.join(sizes))
+
+        assert response['Content-Type'] == min(sizes, key=sizes.get)
+
+    def test_zero_quality_is_not_accepted(self, card):
+        """Test a format listed with q=0 is never chosen"""
+        response = self.get(card, 'image/webp;q=0,image/avif;q=0')
+
+        assert response['Content-Type'] == 'image/jpeg'
+
+    def test_derivatives_are_immutable(self, card):
+        """Test derivative responses carry a one-year immutable lifetime"""
+        cache_control = self.get(card)['Cache-Control']
+
+        assert 'immutable' in cache_control
+        assert f'max-age={media.IMMUTABLE_MAX_AGE}' in cache_control
+
+    def test_unhashed_files_are_not_immutable(self, settings, tmp_path):
+        """Test files outside the hashed namespace get a short lifetime"""
+        (tmp_path / 'legacy.jpg').write_bytes(b'x')
+        request = RequestFactory().get('/media/legacy.jpg')
+
+        response = media.serve_media(request, 'legacy.jpg', document_root=tmp_path)
+
+        assert response.status_code == 200
+        assert 'immutable' not in response['Cache-Control']
+
+
+class TestMediaDelivery:
+    @pytest.fixture
+    def root(self, tmp_path):
+        (tmp_path / 'clip.txt').write_bytes(b'0123456789')
+        return tmp_path
+
+    def get(self, root, **headers):
+        request = RequestFactory().get('/media/clip.txt', **headers)
+        return media.serve_media(request, 'clip.txt', document_root=root)
+
+    def test_full_file_streams_from_descriptor(self, root):
+        """Test whole-file responses wrap the file descriptor for sendfile"""
+        response = self.get(root)
+
+        assert response.status_code == 200
+        assert response['Accept-Ranges'] == 'bytes'
+        assert response.file_to_stream.fileno() > 0
+        assert b''.join(response.streaming_content) == b'0123456789'
+
+    @pytest.mark.parametrize('header, body, content_range', [
+        ('bytes=2-5', b'2345', 'bytes 2-5/10'),
+        ('bytes=7-', b'789', 'bytes 7-9/10'),
+        ('bytes=-3', b'789', 'bytes 7-9/10'),
+        ('bytes=8-100', b'89', 'bytes 8-9/10'),
+    ])
+    def test_byte_ranges(self, root, header, body, content_range):
+        """Test single byte ranges are answered with 206 and just those bytes"""
+        response = self.get(root, HTTP_RANGE=header)
+
+        assert response.status_code == 206
+        assert response['Content-Range'] == content_range
+        assert int(response['Content-Length']) == len(body)
+        assert response.file_to_stream.fileno() > 0
+        assert b''.join(response.streaming_content) == body
+
+    def test_unsatisfiable_range(self, root):
+        """Test a range past the end of the file is rejected with 416"""
+        response = self.get(root, HTTP_RANGE='bytes=20-')
+
+        assert response.status_code == 416
+        assert response['Content-Range'] == 'bytes */10'
+
+    @pytest.mark.parametrize('header', ['bytes=-5', 'bytes=0-'])
+    def test_empty_file_ranges_are_unsatisfiable(self, root, header):
+        """Test any range on an empty file is a 416, not a negative Content-Range"""
+        (root / 'clip.txt').write_bytes(b'')
+
+        response = self.get(root, HTTP_RANGE=header)
+
+        assert response.status_code == 416
+        assert response['Content-Range'] == 'bytes */0'
+
+    def test_multiple_ranges_send_whole_file(self, root):
+        """Test multi-range requests fall back to a full 200 response"""
+        assert self.get(root, HTTP_RANGE='bytes=0-1,4-5').status_code == 200
+
+    def test_stale_if_range_sends_whole_file(self, root):
+        """Test a mismatched If-Range ignores the Range header"""
+        response = self.get(root, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='Wed, 01 Jan 2020 00:00:00 GMT')
+
+        assert response.status_code == 200
+
+    def test_if_modified_since(self, root):
+        """Test an up-to-date client copy gets 304 Not Modified"""
+        last_modified = self.get(root)['Last-Modified']
+
+        assert self.get(root, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+    def test_missing_file(self, root):
+        """Test unknown paths raise 404"""
+        request = RequestFactory().get('/media/missing.jpg')
+
+        with pytest.raises(Http404):
+            media.serve_media(request, 'missing.jpg', document_root=root)
+
+    def test_accel_redirect(self, root, settings):
+        """Test nginx gets an internal redirect instead of the file body"""
+        settings.MEDIA_SENDFILE_HEADER = 'X-Accel-Redirect'
+        settings.MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+        response = self.get(root, HTTP_RANGE='bytes=0-1')
+
+        assert response.status_code == 200
+        assert response['X-Accel-Redirect'] == '/protected-media/clip.txt'
+        assert response.content == b''
+
+    def test_x_sendfile(self, root, settings):
+        """Test Apache gets the absolute file path"""
+        settings.MEDIA_SENDFILE_HEADER = 'X-Sendfile'
+
+        response = self.get(root)
+
+        assert response['X-Sendfile'] == str(root / 'clip.txt')
@@ -0,0 +1,207 @@
+import csv
+import json
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from PIL import Image
+from gym import facets, images, importer, search
+from gym.models import Feature, Gallery, Program, Specialization, Trainer
+from gym.tests.factories import FeatureFactory, ProgramFactory
+
+
+@pytest.fixture
+def source(tmp_path):
+    """A directory with a few source images next to the import file."""
+    for name, size, colour in [('a.png', (64, 32), 'red'), ('b.png', (48, 48), 'blue'), ('c.jpg', (40, 30), 'green')]:
+        Image.new('RGB', size, colour).save(tmp_path / name)
+    return tmp_path
+
+
+def write_jsonl(path, records):
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    return path
+
+
+def program_record(**overrides):
+    record = {
+        'type': 'program', 'title': 'Power Lifting', 'description': 'Heavy compound lifts',
+        'thumbnail': 'a.png', 'cover': 'b.png', 'duration': '3 months', 'price': '99.00',
+        'features': ['Coaching', 'Meal plan'],
+    }
+    record.update(overrides)
+    return record
+
+
+@pytest.mark.django_db
+class TestCatalogImport:
+    def test_jsonl_creates_rows_and_relations(self, source):
+        """Test JSON Lines records become rows with their features, creating missing ones"""
+        FeatureFactory(title='Coaching')
+        path = write_jsonl(source / 'catalog.jsonl', [
+            program_record(),
+            {'type': 'gallery', 'title': 'Floor', 'image': 'c.jpg', 'category': 'facility'},
+        ])
+
+        result = importer.import_file(path)
+
+        assert result.errors == []
+        assert result.counts == {'program': 1, 'gallery': 1}
+        program = Program.objects.get(title='Power Lifting')
+        assert sorted(program.features.values_list('title', flat=True)) == ['Coaching', 'Meal plan']
+        assert Feature.objects.filter(title='Coaching').count() == 1
+        assert Gallery.objects.get().category == 'facility'
+
+    def test_images_are_stored_content_hashed(self, source):
+        """Test referenced files are copied into media storage under their hash"""
+        path = write_jsonl(source / 'catalog.jsonl', [program_record(), program_record(title='Same images')])
+
+        importer.import_file(path)
+
+        first, second = Program.objects.order_by('pk')
+        assert first.thumbnail.name.startswith('programs/')
+        assert first.thumbnail.name == second.thumbnail.name
+        assert default_storage.exists(first.cover.name)
+
+    def test_derivatives_queued_on_commit(self, source, settings, django_capture_on_commit_callbacks):
+        """Test derivatives of imported images are rendered once the batch commits"""
+        settings.IMAGE_DERIVATIVE_WORKERS = 0
+        Image.new('RGB', (321, 123), 'purple').save(source / 'unique.png')
+        path = write_jsonl(source / 'catalog.jsonl', [
+            {'type': 'gallery', 'title': 'Fresh', 'image': 'unique.png', 'category': 'gym'},
+        ])
+
+        with django_capture_on_commit_callbacks(execute=True):
+            importer.import_file(path)
+
+        name = Gallery.objects.get().image.name
+        assert default_storage.exists(images.derivative_name(name, 'thumb'))
+
+    def test_upsert_by_id_replaces_listed_relation(self, source):
+        """Test records with an existing id update that row and replace its features"""
+        program = ProgramFactory(title='Old title', features=[FeatureFactory(title='Gone')])
+        path = write_jsonl(source / 'catalog.jsonl', [program_record(id=program.pk, features=['Sauna'])])
+
+        importer.import_file(path)
+
+        program.refresh_from_db()
+        assert Program.objects.count() == 1
+        assert program.title == 'Power Lifting'
+        assert list(program.features.values_list('title', flat=True)) == ['Sauna']
+
+    def test_explicit_ids_reset_the_sequence(self, source, monkeypatch):
+        """Test importing new rows by id moves the primary key sequence past them"""
+        reset = []
+        sequence_reset_sql = connection.ops.sequence_reset_sql
+        monkeypatch.setattr(
+            connection.ops, 'sequence_reset_sql', lambda style, models: reset.append(models) or sequence_reset_sql(style, models)
+        )
+        path = write_jsonl(source / 'catalog.jsonl', [program_record(id=500), {
+            'type': 'gallery', 'title': 'No id', 'image': 'c.jpg', 'category': 'gym',
+        }])
+
+        importer.import_file(path)
+
+        assert reset == [[Program]]
+        assert ProgramFactory().pk > 500
+
+    def test_omitted_relation_is_kept(self, source):
+        """Test updating a row without a relation list leaves its relation alone"""
+        program = ProgramFactory(features=[FeatureFactory(title='Kept')])
+        record = program_record(id=program.pk)
+        del record['features']
+        path = write_jsonl(source / 'catalog.jsonl', [record])
+
+        importer.import_file(path)
+
+        assert list(program.features.values_list('title', flat=True)) == ['Kept']
+
+    def test_csv_with_default_type(self, source):
+        """Test CSV rows split list columns on '|' and take the --type default"""
+        path = source / 'trainers.csv'
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, ['name', 'specialization', 'picture', 'bio', 'experience', 'certifications', 'twitter'])
+            writer.writeheader()
+            writer.writerow({
+                'name': 'Sam', 'specialization': 'Yoga', 'picture': 'a.png', 'bio': 'Calm',
+                'experience': '5 years', 'certifications': 'RYT 200|First aid', 'twitter': '',
+            })
+
+        result = importer.import_file(path, default_type='trainer')
+
+        trainer = Trainer.objects.get()
+        assert result.counts == {'trainer': 1}
+        assert trainer.twitter is None
+        assert sorted(trainer.certifications.values_list('name', flat=True)) == ['First aid', 'RYT 200']
+        assert Specialization.objects.count() == 2
+
+    def test_invalid_records_are_reported_by_line(self, source):
+        """Test bad records are skipped with their line number while the rest import"""
+        path = write_jsonl(source / 'catalog.jsonl', [
+            program_record(),
+            program_record(duration=''),
+            {'type': 'coupon'},
+            program_record(title='Missing image', cover='nope.png'),
+        ])
+
+        result = importer.import_file(path)
+
+        assert [error.line for error in result.errors] == [2, 3, 4]
+        assert Program.objects.count() == 1
+
+    def test_malformed_json_lines_are_reported(self, source):
+        """Test undecodable lines and non-object values are skipped by line, not fatal"""
+        path = source / 'catalog.jsonl'
+        path.write_text('\n'.join([
+            json.dumps(program_record(title='First')),
+            '{"type": "program", "title": ',
+            '[1, 2]',
+            json.dumps(program_record(title='Last')),
+        ]) + '\n')
+
+        result = importer.import_file(path, batch_size=1)
+
+        assert [error.line for error in result.errors] == [2, 3]
+        assert 'invalid JSON' in result.errors[0].message
+        assert 'expected an object' in result.errors[1].message
+        assert sorted(Program.objects.values_list('title', flat=True)) == ['First', 'Last']
+
+    def test_small_batches(self, source):
+        """Test records spanning several batches are all written"""
+        path = write_jsonl(source / 'catalog.jsonl', [program_record(title=f'Program {i}') for i in range(7)])
+
+        result = importer.import_file(path, batch_size=3)
+
+        assert result.counts == {'program': 7}
+        assert Program.objects.count() == 7
+        assert Feature.objects.count() == 2
+
+    def test_facets_and_search_updated(self, source):
+        """Test bulk writes still refresh gallery facets and the search index"""
+        path = write_jsonl(source / 'catalog.jsonl', [
+            program_record(title='Kettlebell basics'),
+            {'type': 'gallery', 'title': 'Class', 'image': 'c.jpg', 'category': 'classes'},
+        ])
+
+        importer.import_file(path)
+
+        assert {facet.category: facet.count for facet in facets.category_counts()}['classes'] == 1
+        if search.get_backend() is not None:
+            assert [pk for pk, _ in search.search(Program, 'kettle')] == [Program.objects.get().pk]
+
+    def test_command(self, source, capsys):
+        """Test the management command reports counts and skipped lines"""
+        path = write_jsonl(source / 'catalog.jsonl', [program_record(), program_record(price='cheap')])
+
+        call_command('import_catalog', str(path), '--batch-size', '10')
+
+        out, err = capsys.readouterr()
+        assert 'Imported 1 program; 1 records skipped' in out
+        assert 'line 2:' in err
+
+    def test_command_missing_file(self, tmp_path):
+        """Test a missing file is a command error"""
+        with pytest.raises(CommandError):
+            call_command('import_catalog', str(tmp_path / 'missing.jsonl'))
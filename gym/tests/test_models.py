@@ -195,4 +195,14 @@ class TestTestimonialModel:
             testimonial="Good experience",
             image=test_image
         )
-        assert testimonial.rating == 5
\ No newline at end of file
+        assert testimonial.rating == 5
+
+@pytest.mark.django_db
+class TestUpdatedAt:
+    def test_updated_at_moves_on_save(self, faq):
+        """Test updated_at is refreshed on every save"""
+        first = faq.updated_at
+        faq.answer = "Open 6AM - 10PM"
+        faq.save()
+
+        assert faq.updated_at > first
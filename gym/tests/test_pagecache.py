@@ -0,0 +1,94 @@
+import pytest
+from django.contrib import messages
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.test import RequestFactory
+from django.urls import reverse
+from gym import pagecache
+from gym.tests.factories import FaqFactory, TrainerFactory
+
+
+def anonymous_request(path='/'):
+    request = RequestFactory().get(path)
+    SessionMiddleware(lambda r: None).process_request(request)
+    request._messages = FallbackStorage(request)
+    return request
+
+
+@pytest.mark.django_db
+class TestAnonymousPageCache:
+    def test_second_visit_served_from_cache(self, client, faq, django_assert_num_queries):
+        """Test a repeat anonymous visit is served without rendering"""
+        url = reverse('gym:faqs')
+        first = client.get(url)
+
+        with django_assert_num_queries(0):
+            second = client.get(url)
+
+        assert second.status_code == 200
+        assert second.content == first.content
+        assert second.context is None
+
+    def test_response_varies_on_cookie(self, client, faq):
+        """Test cached pages tell shared caches to vary on Cookie"""
+        response = client.get(reverse('gym:faqs'))
+
+        assert 'Cookie' in response['Vary']
+
+    def test_trainer_edit_evicts_only_trainer_pages(self, client, django_assert_num_queries):
+        """Test editing a trainer leaves pages without trainers cached"""
+        trainer = TrainerFactory()
+        FaqFactory()
+        trainers_url, faqs_url = reverse('gym:trainers'), reverse('gym:faqs')
+        client.get(trainers_url)
+        client.get(faqs_url)
+
+        trainer.name = "Renamed Trainer"
+        trainer.save()
+
+        with django_assert_num_queries(0):
+            client.get(faqs_url)
+        response = client.get(trainers_url)
+        assert response.context is not None
+        assert b"Renamed Trainer" in response.content
+
+    def test_dependencies_recorded_from_render(self, client, faq):
+        """Test dependencies are recorded from what the page actually read"""
+        client.get(reverse('gym:faqs'))
+
+        entry = cache.get(pagecache.page_key(anonymous_request(reverse('gym:faqs'))))
+        assert entry['models'] == ['gym.faq']
+
+    def test_logged_in_member_bypasses_cache(self, client, faq):
+        """Test pages for a member with a session user_id are never shared"""
+        session = client.session
+        session['user_id'] = 1
+        session.save()
+        url = reverse('gym:faqs')
+        client.get(url)
+
+        assert client.get(url).context is not None
+        assert cache.get(pagecache.page_key(anonymous_request(url))) is None
+
+    def test_pending_messages_bypass_cache(self):
+        """Test a request carrying flash messages is not cacheable"""
+        request = anonymous_request()
+        assert pagecache.is_cacheable_request(request)
+
+        messages.success(request, "Message sent successfully!")
+
+        assert not pagecache.is_cacheable_request(request)
+
+    def test_post_is_not_cacheable(self):
+        """Test only GET requests use the page cache"""
+        request = RequestFactory().post('/')
+
+        assert not pagecache.is_cacheable_request(request)
+
+    def test_missing_detail_not_cached(self, client):
+        """Test 404 detail pages are never stored"""
+        url = reverse('gym:trainer_details', kwargs={'pk': 9999})
+
+        assert client.get(url).status_code == 404
+        assert cache.get(pagecache.page_key(anonymous_request(url))) is None
@@ -0,0 +1,124 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from gym import ratings
+from gym.models import ProgramRating, Testimonial
+from gym.tests.factories import ProgramFactory, TestimonialFactory
+
+
+def stored(program):
+    return ProgramRating.objects.get(program=ratings.program_key(program))
+
+
+@pytest.mark.django_db
+class TestRatingMaintenance:
+    def test_create_accumulates(self):
+        """Test new testimonials add to count, sum and histogram"""
+        TestimonialFactory(program='Yoga', rating=5)
+        TestimonialFactory(program='Yoga', rating=3)
+
+        row = stored('Yoga')
+        assert (row.count, row.total, row.stars_5, row.stars_3) == (2, 8, 1, 1)
+
+    def test_program_name_normalised(self):
+        """Test free-text program names are matched ignoring case and padding"""
+        TestimonialFactory(program='HIIT Blast', rating=4)
+        TestimonialFactory(program='  hiit blast ', rating=2)
+
+        assert stored('Hiit Blast').count == 2
+
+    def test_rating_change(self):
+        """Test editing a rating moves it between histogram buckets"""
+        testimonial = TestimonialFactory(program='Yoga', rating=5)
+
+        testimonial.rating = 2
+        testimonial.save()
+
+        row = stored('Yoga')
+        assert (row.count, row.total, row.stars_5, row.stars_2) == (1, 2, 0, 1)
+
+    def test_program_change(self):
+        """Test moving a testimonial to another program moves its rating"""
+        testimonial = TestimonialFactory(program='Yoga', rating=4)
+
+        testimonial.program = 'Boxing'
+        testimonial.save()
+
+        assert stored('Yoga').count == 0
+        assert stored('Boxing').total == 4
+
+    def test_delete(self):
+        """Test deleting a testimonial removes its rating"""
+        keep = TestimonialFactory(program='Yoga', rating=5)
+        TestimonialFactory(program='Yoga', rating=1).delete()
+
+        row = stored(keep.program)
+        assert (row.count, row.total, row.stars_1) == (1, 5, 0)
+
+    def test_rebuild_command(self):
+        """Test the chunked rebuild recomputes aggregates after bulk changes"""
+        TestimonialFactory(program='Yoga', rating=5)
+        TestimonialFactory(program='Yoga', rating=4)
+        Testimonial.objects.update(rating=1)
+
+        call_command('rebuild_program_ratings', chunk_size=1)
+
+        row = stored('Yoga')
+        assert (row.count, row.total, row.stars_1, row.stars_5) == (2, 2, 2, 0)
+
+
+@pytest.mark.django_db
+class TestRatingReads:
+    def test_summary(self):
+        """Test the summary carries count, rounded average and histogram"""
+        for rating in (5, 4, 4):
+            TestimonialFactory(program='Yoga', rating=rating)
+
+        rating = ratings.for_program('yoga')
+
+        assert rating == ratings.Rating(3, 4.3, {1: 0, 2: 0, 3: 0, 4: 2, 5: 1})
+
+    def test_no_testimonials(self):
+        """Test programs without testimonials have no rating"""
+        assert ratings.for_program('Unknown') is None
+
+    def test_read_needs_no_query(self, django_assert_num_queries):
+        """Test page reads come from the catalog snapshot"""
+        TestimonialFactory(program='Yoga', rating=5)
+        ratings.for_program('Yoga')
+
+        with django_assert_num_queries(0):
+            assert ratings.for_program('Yoga').count == 1
+
+    def test_api_exposes_rating(self, program, testimonial):
+        """Test programs in the API carry their rating summary"""
+        result = APIClient().get(reverse('program-list')).json()['results'][0]
+
+        assert result['rating'] == {'count': 1, 'average': 5.0, 'histogram': {'1': 0, '2': 0, '3': 0, '4': 0, '5': 1}}
+
+    def test_api_detail_and_unrated(self):
+        """Test a program without testimonials reports a null rating"""
+        program = ProgramFactory()
+
+        response = APIClient().get(reverse('program-detail', args=[program.pk]))
+
+        assert response.json()['rating'] is None
+
+    def test_new_testimonial_refreshes_api(self, program):
+        """Test a new testimonial changes the program list representation"""
+        client = APIClient()
+        first = client.get(reverse('program-list'))
+
+        TestimonialFactory(program=program.title, rating=3)
+        second = client.get(reverse('program-list'), HTTP_IF_NONE_MATCH=first['ETag'])
+
+        assert second.status_code == 200
+        assert second.json()['results'][0]['rating']['count'] == 1
+
+    def test_program_page(self, client, program, testimonial):
+        """Test the program page shows the average and histogram"""
+        response = client.get(reverse('gym:program_details', args=[program.pk]))
+
+        assert response.context['rating'].average == 5.0
+        assert 'Member Ratings' in response.content.decode()
@@ -0,0 +1,118 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+from gym import search
+from gym.models import Program, Trainer
+from gym.tests.factories import ProgramFactory, TrainerFactory
+
+
+@pytest.mark.django_db
+class TestSearchIndex:
+    def test_saved_program_is_searchable(self):
+        """Test programs are indexed as they are saved"""
+        program = ProgramFactory(title="Kettlebell Basics", description="Swings and goblet squats")
+
+        assert [pk for pk, _ in search.search(Program, "kettlebell")] == [program.pk]
+
+    def test_prefix_matching(self):
+        """Test partial words match as prefixes"""
+        program = ProgramFactory(title="Strength Foundations", description="Compound lifts")
+
+        assert [pk for pk, _ in search.search(Program, "stren lif")] == [program.pk]
+
+    def test_title_hits_rank_above_body_hits(self):
+        """Test a title match outranks a description-only match"""
+        body_hit = ProgramFactory(title="Morning Routine", description="Includes some yoga stretches")
+        title_hit = ProgramFactory(title="Yoga Flow", description="Slow breathing practice")
+
+        assert [pk for pk, _ in search.search(Program, "yoga")] == [title_hit.pk, body_hit.pk]
+
+    def test_snippet_highlights_match(self):
+        """Test results carry a highlighted snippet"""
+        ProgramFactory(title="Boxing Conditioning", description="Pad work and footwork drills")
+
+        (_, snippet), = search.search(Program, "footwork")
+        assert '<mark>footwork</mark>' in snippet.lower()
+
+    def test_snippet_escapes_content(self):
+        """Test markup in indexed text comes back escaped, with only the highlight as HTML"""
+        ProgramFactory(title="Boxing", description='<script>alert(1)</script> footwork & "pads"')
+
+        (_, snippet), = search.search(Program, "footwork")
+        assert '<script>' not in snippet
+        assert '&lt;script&gt;' in snippet
+        assert '<mark>footwork</mark> &amp; &quot;pads&quot;' in snippet.lower()
+
+    def test_update_reindexes(self):
+        """Test edits replace the indexed document"""
+        program = ProgramFactory(title="Spin Class")
+        program.title = "Rowing Class"
+        program.save()
+
+        assert search.search(Program, "spin") == []
+        assert [pk for pk, _ in search.search(Program, "rowing")] == [program.pk]
+
+    def test_delete_unindexes(self):
+        """Test deleted trainers disappear from the index"""
+        trainer = TrainerFactory(name="Maria Lopez")
+        trainer.delete()
+
+        assert search.search(Trainer, "lopez") == []
+
+    def test_punctuation_only_query(self):
+        """Test a query without words matches nothing"""
+        ProgramFactory()
+
+        assert search.search(Program, '"*) - (') == []
+
+    def test_rebuild_command(self):
+        """Test rebuild_search_index restores a cleared index"""
+        program = ProgramFactory(title="Pilates Core")
+        with connection.cursor() as cursor:
+            search.get_backend().clear(cursor, 'program')
+        assert search.search(Program, "pilates") == []
+
+        call_command('rebuild_search_index')
+
+        assert [pk for pk, _ in search.search(Program, "pilates")] == [program.pk]
+
+
+@pytest.mark.django_db
+class TestSearchAPI:
+    def test_program_search_ranked_with_snippets(self):
+        """Test ?search returns ranked programs with snippets"""
+        ProgramFactory(title="Morning Routine", description="Includes some yoga stretches")
+        ProgramFactory(title="Yoga Flow", description="Slow breathing practice")
+        ProgramFactory(title="Powerlifting", description="Heavy singles")
+
+        results = APIClient().get(reverse('program-list'), {'search': 'yoga'}).json()['results']
+
+        assert [r['title'] for r in results] == ["Yoga Flow", "Morning Routine"]
+        assert '<mark>' in results[0]['search_snippet']
+
+    def test_trainer_search_by_specialization(self):
+        """Test trainers are found by specialization prefix"""
+        TrainerFactory(name="Sam Lee", specialization="Kickboxing")
+        TrainerFactory(name="Ana Ruiz", specialization="Pilates")
+
+        results = APIClient().get(reverse('trainer-list'), {'search': 'kick'}).json()['results']
+
+        assert [r['name'] for r in results] == ["Sam Lee"]
+
+    def test_no_search_has_null_snippet(self, program):
+        """Test plain listings report no snippet"""
+        results = APIClient().get(reverse('program-list')).json()['results']
+
+        assert results[0]['search_snippet'] is None
+
+    def test_fallback_without_fulltext_backend(self, monkeypatch):
+        """Test icontains search is used when the database has no backend"""
+        ProgramFactory(title="Yoga Flow")
+        ProgramFactory(title="Powerlifting")
+        monkeypatch.setattr(search, 'get_backend', lambda conn=None: None)
+
+        results = APIClient().get(reverse('program-list'), {'search': 'yoga'}).json()['results']
+
+        assert [r['title'] for r in results] == ["Yoga Flow"]
@@ -0,0 +1,128 @@
+import gzip
+import json
+
+import pytest
+from django.conf import settings as django_settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import RequestFactory
+from gym import staticfiles
+
+
+@pytest.fixture
+def collected(settings, tmp_path):
+    """Run collectstatic for the project's own assets into a temporary root"""
+    settings.STATIC_ROOT = tmp_path
+    settings.STATICFILES_FINDERS = ['django.contrib.staticfiles.finders.FileSystemFinder']
+    settings.STORAGES = {
+        **settings.STORAGES,
+        'staticfiles': {'BACKEND': 'gym.staticfiles.CompressedManifestStaticFilesStorage'},
+    }
+    call_command('collectstatic', interactive=False, verbosity=0)
+    return tmp_path
+
+
+def serve(root, path, **headers):
+    request = RequestFactory().get('/static/' + path, **headers)
+    return staticfiles.serve_static(request, path, document_root=root)
+
+
+class TestMinify:
+    def test_strips_comments_and_whitespace(self):
+        """Test comments, indentation and redundant semicolons are removed"""
+        css = "/* nav */\n.nav a:hover ,\n.nav > li {\n    color: red;\n    margin: 0 auto;\n}\n"
+
+        assert staticfiles.minify_css(css) == '.nav a:hover,.nav>li{color:red;margin:0 auto}'
+
+    def test_keeps_descendant_pseudo_selectors(self):
+        """Test the space in 'a :hover' (a descendant selector) is preserved"""
+        assert staticfiles.minify_css('.card :hover { color: red; }') == '.card :hover{color:red}'
+
+
+    def test_string_literals_are_untouched(self):
+        """Test whitespace, punctuation and comment markers inside quotes survive"""
+        css = (
+            '.tag::after { content: "a , b ;  c" ; }\n'
+            ".hero { background: url('img/hero  1.png') ; font-family: 'Open  Sans' , Arial; }\n"
+            '.odd::before { content: "/* not a comment */" ; }\n'
+            '.quote::before { content: "say \\"hi , there\\"" ; }\n'
+        )
+
+        assert staticfiles.minify_css(css) == (
+            '.tag::after{content:"a , b ;  c"}'
+            ".hero{background:url('img/hero  1.png');font-family:'Open  Sans',Arial}"
+            '.odd::before{content:"/* not a comment */"}'
+            '.quote::before{content:"say \\"hi , there\\""}'
+        )
+
+class TestCollectstatic:
+    def test_stylesheet_is_hashed_and_minified(self, collected):
+        """Test the site stylesheet is written under a hashed, minified name"""
+        manifest = json.loads((collected / 'staticfiles.json').read_text())
+        hashed = manifest['paths']['css/style.css']
+        css = (collected / hashed).read_text()
+
+        assert staticfiles.HASHED_NAME_RE.search(hashed)
+        assert '\n' not in css
+        assert '/*' not in css
+
+    def test_precompressed_siblings(self, collected):
+        """Test a gzip variant with identical content sits next to the asset"""
+        hashed = json.loads((collected / 'staticfiles.json').read_text())['paths']['css/style.css']
+
+        assert gzip.decompress((collected / f'{hashed}.gz').read_bytes()) == (collected / hashed).read_bytes()
+        if staticfiles.brotli is not None:
+            assert (collected / f'{hashed}.br').exists()
+
+    def test_template_links_hashed_stylesheet(self, collected):
+        """Test {% static %} resolves to the fingerprinted file"""
+        rendered = Template("{% load static %}{% static 'css/style.css' %}").render(Context())
+
+        assert rendered == django_settings.STATIC_URL + staticfiles_storage.stored_name('css/style.css')
+        assert rendered != django_settings.STATIC_URL + 'css/style.css'
+
+
+class TestServeStatic:
+    @pytest.fixture
+    def hashed(self, collected):
+        return json.loads((collected / 'staticfiles.json').read_text())['paths']['css/style.css']
+
+    def test_serves_gzip_when_accepted(self, collected, hashed):
+        """Test gzip-accepting clients get the precompressed bytes"""
+        response = serve(collected, hashed, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        assert response['Content-Encoding'] == 'gzip'
+        assert response['Content-Type'].startswith('text/css')
+        assert gzip.decompress(b''.join(response.streaming_content)) == (collected / hashed).read_bytes()
+        assert 'Accept-Encoding' in response['Vary']
+
+    def test_serves_brotli_first(self, collected, hashed):
+        """Test brotli is preferred over gzip when both exist and are accepted"""
+        (collected / f'{hashed}.br').write_bytes(b'brotli bytes')
+
+        response = serve(collected, hashed, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        assert response['Content-Encoding'] == 'br'
+
+    def test_identity_without_accept_encoding(self, collected, hashed):
+        """Test clients that accept no encoding get the plain file"""
+        response = serve(collected, hashed)
+
+        assert not response.has_header('Content-Encoding')
+        assert b''.join(response.streaming_content) == (collected / hashed).read_bytes()
+
+    def test_hashed_names_cached_for_a_year(self, collected, hashed):
+        """Test fingerprinted files are immutable and unhashed ones are not"""
+        assert 'immutable' in serve(collected, hashed)['Cache-Control']
+        assert 'immutable' not in serve(collected, 'css/style.css')['Cache-Control']
+
+    def test_accel_redirect_uses_static_location(self, collected, hashed, settings):
+        """Test nginx is redirected to the location aliasing STATIC_ROOT, not the media one"""
+        settings.MEDIA_SENDFILE_HEADER = 'X-Accel-Redirect'
+        settings.STATIC_ACCEL_PREFIX = '/protected-static/'
+
+        response = serve(collected, hashed, HTTP_ACCEPT_ENCODING='gzip')
+
+        assert response['X-Accel-Redirect'] == f'/protected-static/{hashed}.gz'
+        assert response['Content-Encoding'] == 'gzip'
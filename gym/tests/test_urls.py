@@ -1,5 +1,8 @@
+import importlib
+
 import pytest
-from django.urls import reverse, resolve
+from django.urls import clear_url_caches, reverse, resolve
+from fitzone import urls as project_urls
 from gym import views
 
 
@@ -52,4 +55,24 @@ class TestGymURLs:
         """Test contact URL resolves correctly"""
         url = reverse('gym:contact')
         assert url == '/contact/'
-        assert resolve(url).func.view_class == views.ContactView
\ No newline at end of file
+        assert resolve(url).func.view_class == views.ContactView
+
+class TestMediaRoute:
+    """Test /media/ is routed to Django unless MEDIA_SERVE is turned off"""
+
+    @pytest.mark.parametrize('debug, media_serve, routed', [
+        (True, True, True),
+        (False, True, True),
+        (False, False, False),
+    ])
+    def test_media_route(self, settings, debug, media_serve, routed):
+        """Test production serves media in-process by default, and not once MEDIA_SERVE is off"""
+        original = settings.DEBUG, settings.MEDIA_SERVE
+        settings.DEBUG, settings.MEDIA_SERVE = debug, media_serve
+        try:
+            patterns = importlib.reload(project_urls).urlpatterns
+            assert ('media' in {getattr(pattern, 'name', None) for pattern in patterns}) == routed
+        finally:
+            settings.DEBUG, settings.MEDIA_SERVE = original
+            importlib.reload(project_urls)
+            clear_url_caches()
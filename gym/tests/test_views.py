@@ -185,9 +185,18 @@ class TestGalleryListView:
         # Should show only 9 items on first page
         assert len(response.context['object_list']) == 9
         
-        # Check second page
-        response = client.get(url + '?page=2')
+        # Load the next batch from the keyset cursor
+        response = client.get(url, {'after': response.context['next_after']})
         assert len(response.context['object_list']) == 3
+        assert response.context['next_after'] is None
+
+    @pytest.mark.parametrize('after', ['\u00b2', 'x', '9' * 30, '1.5'])
+    def test_gallery_ignores_invalid_after(self, client, gallery, after):
+        """Test an unusable keyset position shows the first page instead of failing"""
+        response = client.get(reverse('gym:gallery'), {'after': after})
+
+        assert response.status_code == 200
+        assert list(response.context['object_list']) == [gallery]
 
     def test_gallery_displays_items(self, client, gallery):
         """Test gallery displays items"""
@@ -196,6 +205,40 @@ class TestGalleryListView:
         
         assert gallery.title.encode() in response.content
 
+    def test_gallery_filters_by_category(self, client):
+        """Test gallery shows only the selected category"""
+        events = GalleryFactory(category='events')
+        GalleryFactory(category='gym')
+
+        response = client.get(reverse('gym:gallery'), {'category': 'events'})
+
+        assert list(response.context['object_list']) == [events]
+        assert response.context['category'] == 'events'
+
+    def test_gallery_ignores_unknown_category(self, client, gallery):
+        """Test an unknown category falls back to the full gallery"""
+        response = client.get(reverse('gym:gallery'), {'category': 'spa'})
+
+        assert len(response.context['object_list']) == 1
+        assert response.context['category'] == ''
+
+    def test_gallery_newest_first(self, client):
+        """Test gallery batches are ordered newest first"""
+        first, second = GalleryFactory(), GalleryFactory()
+
+        response = client.get(reverse('gym:gallery'))
+
+        assert list(response.context['object_list']) == [second, first]
+
+    def test_gallery_edit_evicts_cached_page(self, client, gallery):
+        """Test the cached gallery page picks up edits"""
+        url = reverse('gym:gallery')
+        client.get(url)
+        gallery.title = "New Squat Racks"
+        gallery.save()
+
+        assert b"New Squat Racks" in client.get(url).content
+
 
 @pytest.mark.django_db
 class TestContactView:
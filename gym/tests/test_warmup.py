@@ -0,0 +1,72 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.template import engines
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from gym import catalog, warmup
+from gym.models import Gallery, Program
+
+
+@pytest.mark.django_db
+class TestWarmup:
+    def test_templates_compile(self):
+        """Test every project template is loaded without errors"""
+        compiled, failed = warmup.compile_templates()
+
+        assert not failed
+        assert {'base.html', 'gym/index.html', 'booking/send_otp.html'} <= set(compiled)
+
+    def test_templates_land_in_cached_loader(self):
+        """Test compiled templates are served from the cached loader afterwards"""
+        warmup.compile_templates()
+        loader = engines['django'].engine.template_loaders[0]
+
+        assert any('gym/index.html' in key for key in loader.get_template_cache)
+
+    def test_routes_use_existing_rows(self, program, trainer):
+        """Test detail routes are reversed with real primary keys"""
+        urls = warmup.route_urls()
+
+        assert urls['gym:program_details'] == reverse('gym:program_details', kwargs={'pk': program.pk})
+        assert urls['gym:trainer_details'] == reverse('gym:trainer_details', kwargs={'pk': trainer.pk})
+        assert urls['Booking:booking'] == reverse('Booking:booking')
+
+    def test_detail_routes_skipped_without_rows(self):
+        """Test detail routes are left out when there is nothing to show"""
+        assert 'gym:program_details' not in warmup.route_urls()
+
+    def test_catalog_primed(self, program, django_assert_num_queries):
+        """Test catalog reads after warmup need no queries"""
+        warmup.prime_catalog()
+
+        with django_assert_num_queries(0):
+            assert catalog.get_rows(Program)[0].pk == program.pk
+
+    def test_gallery_not_held_in_memory(self, gallery):
+        """Test priming never loads the gallery table into the worker"""
+        with CaptureQueriesContext(connection) as queries:
+            warmup.prime_catalog()
+
+        assert not any('"gym_gallery"' in query['sql'] for query in queries)
+        assert Gallery not in catalog.SNAPSHOTS
+        assert catalog.dependencies(Gallery) == (Gallery,)
+
+    def test_synthetic_requests(self, program, trainer, faq):
+        """Test every view answers without a server error"""
+        responses = warmup.synthetic_requests()
+        paths = [path for path, _ in responses]
+
+        assert reverse('gym:index') in paths
+        assert reverse('program-list') in paths
+        assert reverse('Booking:logout') not in paths
+        assert all(status < 500 for _, status in responses)
+
+    def test_command(self, capsys):
+        """Test manage.py warmup reports every step"""
+        call_command('warmup', skip_requests=True)
+
+        output = capsys.readouterr().out
+        assert 'Compiled' in output
+        assert 'Requested' not in output
+        assert 'Warmup complete' in output
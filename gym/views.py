@@ -1,54 +1,117 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.http import Http404
 from .models import Slider, Program, Trainer, Faq, Gallery, Testimonial
 from django.views.generic import ListView, DetailView, TemplateView
 from django.core.mail import send_mail
+from . import catalog, facets, keyset, ratings
+from .pagecache import CachedPageMixin
 
 
-class HomeView(ListView):
+class CatalogListMixin:
+    """List view served from the worker's catalog snapshot."""
+    model = None
+
+    def get_queryset(self):
+        return catalog.get_rows(self.model)
+
+
+class CatalogDetailMixin:
+    """Detail view served from the worker's catalog snapshot."""
+    model = None
+
+    def get_object(self, queryset=None):
+        row = catalog.get_row(self.model, self.kwargs.get(self.pk_url_kwarg))
+        if row is None:
+            raise Http404(f"No {self.model._meta.verbose_name} found matching the query")
+        return row
+
+
+class HomeView(CachedPageMixin, CatalogListMixin, ListView):
     template_name = "gym/index.html"
-    queryset = Program.objects.all()
+    model = Program
     context_object_name = 'programs'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["sliders"] = Slider.objects.all()
-        context['trainers'] = Trainer.objects.all()
-        context['testimonials'] = Testimonial.objects.all()[:3]
+        context["sliders"] = catalog.get_rows(Slider)
+        context['trainers'] = catalog.get_rows(Trainer)
+        context['testimonials'] = catalog.RowSet(catalog.get_rows(Testimonial)[:3])
         return context
 
 
-class ProgramListView(ListView):
+class ProgramListView(CachedPageMixin, CatalogListMixin, ListView):
     template_name = 'gym/programs.html'
-    queryset = Program.objects.all()
+    model = Program
     context_object_name = "programs_list"
 
 
-class ProgramDetailsView(DetailView):
+class ProgramDetailsView(CachedPageMixin, CatalogDetailMixin, DetailView):
     template_name = 'gym/program_details.html'
-    queryset = Program.objects.all()
+    model = Program
     context_object_name = 'program_details'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['rating'] = ratings.for_program(self.object.title)
+        return context
+
 
-class FaqsView(ListView):
+class FaqsView(CachedPageMixin, CatalogListMixin, ListView):
     template_name = "gym/faqs.html"
-    queryset = Faq.objects.all()
+    model = Faq
 
 
-class TrainersView(ListView):
+class TrainersView(CachedPageMixin, CatalogListMixin, ListView):
     template_name = "gym/trainers.html"
-    queryset = Trainer.objects.all()
+    model = Trainer
 
 
-class TrainerDetailsView(DetailView):
+class TrainerDetailsView(CachedPageMixin, CatalogDetailMixin, DetailView):
     template_name = "gym/trainer_details.html"
-    queryset = Trainer.objects.all()
+    model = Trainer
 
 
-class GalleryListView(ListView):
+class GalleryListView(CachedPageMixin, ListView):
+    """
+    Gallery in "load more" batches, optionally filtered by category.
+
+    Uses keyset pagination (``?after=<id>``) on the (category, id) index
+    rather than OFFSET, so late batches cost the same as the first.
+    """
     template_name = 'gym/gallery.html'
-    queryset = Gallery.objects.all()
+    model = Gallery
     paginate_by = 9
+    ordering = ['-id']
+
+    def get_queryset(self):
+        catalog.depend_on(Gallery)
+        queryset = Gallery.objects.all()
+        self.category = self.request.GET.get('category', '')
+        if self.category in dict(Gallery._meta.get_field('category').choices):
+            queryset = queryset.filter(category=self.category)
+        else:
+            self.category = ''
+        return queryset
+
+    def paginate_queryset(self, queryset, page_size):
+        after = self.request.GET.get('after')
+        try:
+            position = keyset.clean_position(queryset.model, self.ordering, [after]) if after else None
+        except ValueError:
+            # A stale or hand-edited link starts over from the first page.
+            position = None
+        rows, next_position = keyset.page(queryset, self.ordering, position, page_size)
+        self.next_after = next_position[0] if next_position else None
+        return (None, None, rows, next_position is not None)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['category'] = self.category
+        context['facets'] = facets.category_counts()
+        context['facet_total'] = sum(facet.count for facet in context['facets'])
+        context['next_after'] = self.next_after
+        return context
 
 
 class ContactView(TemplateView):
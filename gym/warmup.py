@@ -0,0 +1,142 @@
+"""
+Warm a freshly started process before it takes traffic.
+
+Run by ``manage.py warmup`` and by the gunicorn ``post_fork`` hook in
+``gunicorn.conf.py``.  Each step pays a first-request cost up front:
+
+* ``compile_templates`` parses every project and local-app template into
+  the cached template loader;
+* ``resolve_urls`` reverses and resolves every route of ``gym.urls`` and
+  ``booking.urls``, populating the URL resolver caches;
+* ``prime_catalog`` loads every catalog snapshot (not the gallery, which
+  is paged from the database);
+* ``synthetic_requests`` sends one anonymous GET through the full
+  middleware stack to each page view and gym API list endpoint (plus the
+  OpenAPI schema), which imports and initialises DRF and spectacular
+  and fills the page and fragment caches.
+"""
+import importlib
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.test import Client
+from django.urls import resolve, reverse
+
+from . import catalog
+
+URLCONFS = ['gym.urls', 'booking.urls']
+LOCAL_APPS = ['gym', 'booking']
+API_URLCONF = 'gym.api.urls'
+# Views whose GET changes the visitor's state
+SKIP_REQUESTS = {'Booking:logout'}
+
+
+def template_names():
+    """Names of every template in ``TEMPLATES['DIRS']`` and the local apps."""
+    engine = engines['django'].engine
+    directories = [Path(directory) for directory in engine.dirs]
+    directories += [Path(apps.get_app_config(label).path) / 'templates' for label in LOCAL_APPS]
+    names = set()
+    for directory in directories:
+        names.update(path.relative_to(directory).as_posix() for path in directory.rglob('*.html'))
+    return sorted(names)
+
+
+def compile_templates():
+    """Load every template once; returns ``(compiled, failed)`` name lists."""
+    engine = engines['django'].engine
+    compiled, failed = [], []
+    for name in template_names():
+        try:
+            engine.get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError):
+            failed.append(name)
+        else:
+            compiled.append(name)
+    return compiled, failed
+
+
+def sample_pk(model):
+    if model in catalog.SNAPSHOTS:
+        rows = catalog.get_rows(model)
+        return rows[0].pk if rows else None
+    return model.objects.values_list('pk', flat=True).first()
+
+
+def route_urls():
+    """``{url name: path}`` for every route of ``URLCONFS`` that can be reversed."""
+    urls = {}
+    for urlconf in URLCONFS:
+        module = importlib.import_module(urlconf)
+        for pattern in module.urlpatterns:
+            name = f'{module.app_name}:{pattern.name}'
+            kwargs = {}
+            if pattern.pattern.converters:
+                model = getattr(getattr(pattern.callback, 'view_class', None), 'model', None)
+                pk = sample_pk(model) if model is not None else None
+                if pk is None or set(pattern.pattern.converters) != {'pk'}:
+                    continue
+                kwargs = {'pk': pk}
+            urls[name] = reverse(name, kwargs=kwargs)
+    return urls
+
+
+def resolve_urls():
+    """Reverse and resolve every route; returns the paths resolved."""
+    paths = list(route_urls().values())
+    for path in paths:
+        resolve(path)
+    return paths
+
+
+def prime_catalog():
+    """Load every catalog snapshot; returns the number of rows held."""
+    return sum(len(catalog.get_rows(model)) for model in catalog.SNAPSHOTS)
+
+
+def request_urls():
+    router = importlib.import_module(API_URLCONF).router
+    urls = [path for name, path in route_urls().items() if name not in SKIP_REQUESTS]
+    urls += [reverse(f'{basename}-list') for _, _, basename in router.registry]
+    urls.append(reverse('schema'))
+    return urls
+
+
+def warmup_host():
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def synthetic_requests():
+    """GET every view once; returns ``[(path, status code), ...]``."""
+    client = Client(HTTP_HOST=warmup_host(), raise_request_exception=False)
+    return [(path, client.get(path).status_code) for path in request_urls()]
+
+
+def run(requests=True, on_step=None):
+    """
+    Run every warmup step and return ``{step: (result, seconds)}``.
+
+    ``on_step(name)`` is called after each step, e.g. to heartbeat a
+    gunicorn worker that is not serving yet.
+    """
+    steps = [
+        ('templates', compile_templates),
+        ('urls', resolve_urls),
+        ('catalog', prime_catalog),
+    ]
+    if requests:
+        steps.append(('requests', synthetic_requests))
+    report = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        result = step()
+        report[name] = (result, time.perf_counter() - started)
+        if on_step is not None:
+            on_step(name)
+    return report